@@ -0,0 +1,135 @@
+"""
+End-to-end debate benchmark against the offline mock provider.
+
+Runs N concurrent debates through DebateOrchestrator and reports per-debate wall time,
+LLM calls per debate, turn latency percentiles and event-loop lag:
+
+    python benchmarks/bench_debates.py --debates 20 --model mock-fast --json bench.json
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import project_root, summarize, LoopLagMonitor, print_report
+
+from core.cache import CompletionCache
+from core.debate import DebateOrchestrator, StreamingTurn
+from core.llm_service import LLMService
+from models.personality import ModelPreference
+
+class TimedLLMService(LLMService):
+    """LLMService that records the latency of every call and counts calls per debate."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.turn_latencies = []
+        self.call_latencies = []
+        self.calls_per_debate = Counter()
+
+    def _record(self, debate_id, start: float, is_turn: bool):
+        latency = time.perf_counter() - start
+        self.call_latencies.append(latency)
+        if is_turn:
+            self.turn_latencies.append(latency)
+        self.calls_per_debate[debate_id] += 1
+
+    async def generate_response(self, personality, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().generate_response(personality, *args, **kwargs)
+        finally:
+            self._record(kwargs.get("debate_id"), start, personality.name != "Moderator")
+
+    async def stream_response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            async for delta in super().stream_response(*args, **kwargs):
+                yield delta
+        finally:
+            self._record(kwargs.get("debate_id"), start, True)
+
+    async def generate_summary(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().generate_summary(*args, **kwargs)
+        finally:
+            self._record(kwargs.get("debate_id"), start, False)
+
+async def run_debate(orchestrator: DebateOrchestrator, topic: str, debaters, pipelined: bool, stream: bool):
+    debate = await orchestrator.start_debate(topic, debaters, pipelined=pipelined)
+    start = time.perf_counter()
+    async for title, content, reply_to in debate.run_rounds(stream=stream):
+        if isinstance(content, StreamingTurn):
+            await content.result()
+    return debate.debate_id, time.perf_counter() - start
+
+async def main(args):
+    random.seed(args.seed)
+    cache = CompletionCache(max_entries=0) if args.no_cache else None
+    provider, _, model_name = args.model.partition("/")
+    if not model_name:
+        provider, model_name = "mock", provider
+    service = TimedLLMService(
+        model_override=ModelPreference(provider=provider, model_name=model_name),
+        response_cache=cache
+    )
+    service.mock_client.random.seed(args.seed)
+    orchestrator = DebateOrchestrator(llm_service=service)
+    debaters = args.debaters.split(",") if args.debaters else orchestrator.personality_manager.list_personalities()
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_debate(orchestrator, f"{args.topic} (#{index % args.topics})", debaters, not args.sequential, args.stream)
+        for index in range(args.debates)
+    ))
+    total = time.perf_counter() - start
+    await monitor.stop()
+
+    personalities = service.metrics.snapshot()["personalities"]
+    report = {
+        "config": {
+            "debates": args.debates,
+            "debaters": len(debaters),
+            "model": f"{provider}/{model_name}",
+            "pipelined": not args.sequential,
+            "stream": args.stream
+        },
+        "total_seconds": total,
+        "debates_per_hour": args.debates / total * 3600,
+        "debate_wall_seconds": summarize([wall for _, wall in results]),
+        "calls_per_debate": summarize([float(service.calls_per_debate[debate_id]) for debate_id, _ in results]),
+        "upstream_calls_per_debate": len(service.mock_client.calls) / args.debates,
+        "turn_latency_seconds": summarize(service.turn_latencies),
+        "call_latency_seconds": summarize(service.call_latencies),
+        "event_loop_lag_seconds": summarize(monitor.samples),
+        # Spend attributed from cost_per_1k_tokens in config/models.json
+        "cost_per_debate": sum(p["cost"] for p in personalities.values()) / args.debates,
+        "tokens_per_debate": sum(p["prompt_tokens"] + p["completion_tokens"] for p in personalities.values()) / args.debates
+    }
+    print_report("debate benchmark", report, args.json)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent debates against the mock provider")
+    parser.add_argument("--debates", type=int, default=10, help="number of concurrent debates")
+    parser.add_argument("--model", default="mock-fast", help="mock model name, or provider/model")
+    parser.add_argument("--debaters", default=None, help="comma-separated personalities (default: all)")
+    parser.add_argument("--topic", default="Is free will an illusion?")
+    parser.add_argument("--topics", type=int, default=1, help="number of distinct topics to spread debates over")
+    parser.add_argument("--sequential", action="store_true", help="disable pipelined round execution")
+    parser.add_argument("--stream", action="store_true", help="stream personality turns")
+    parser.add_argument("--no-cache", action="store_true", help="disable the local response cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,240 @@
+"""
+Discord load simulation: replays /thinktank invocations through the bot's real command path.
+
+Each invocation calls ThinkTankBot.handle_thinktank with fake Discord objects from
+benchmarks/fake_discord.py, so deferring, the scheduler, thread creation, the ThreadSender
+post/edit loop and the followup all run as they do in production, against simulated send
+latency and rate limits and the mock LLM provider. Invocations come from a JSONL trace, one
+per line:
+
+    {"at": 0.5, "guild_id": 1, "channel_id": 10, "user_id": 100, "input_statement": "Is free will an illusion?", "debators": "socrates,nietzsche"}
+
+"at" is seconds from the start of the run; "debators" is optional. Without --trace, a trace of
+--invocations Poisson arrivals at --rate per second is generated (and saved with --write-trace):
+
+    python benchmarks/bench_discord.py --invocations 2000 --rate 20 --max-concurrent 64 --json discord.json
+    python benchmarks/bench_discord.py --trace invocations.jsonl --speed 10
+
+Reports end-to-end latency, time to the first thread message, message throughput, rate-limit
+waits per route, event-loop lag and memory growth per concurrent debate.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import project_root, summarize, LoopLagMonitor, print_report
+from benchmarks.fake_discord import FakeChannel, FakeDiscord, FakeInteraction
+
+TOPICS = [
+    "Is free will an illusion?",
+    "Should AI systems have rights?",
+    "Is morality objective?",
+    "Does technology make us happier?"
+]
+# Seconds between memory and concurrency samples
+SAMPLE_INTERVAL = 0.25
+
+def generate_trace(invocations: int, rate: float, guilds: int, channels: int, users: int, seed: int):
+    """Poisson arrivals spread over guilds, channels and users."""
+    rng = random.Random(seed)
+    trace = []
+    at = 0.0
+    for _ in range(invocations):
+        at += rng.expovariate(rate)
+        guild_id = rng.randrange(guilds) + 1
+        trace.append({
+            "at": round(at, 4),
+            "guild_id": guild_id,
+            "channel_id": guild_id * 1000 + rng.randrange(channels),
+            "user_id": guild_id * 100000 + rng.randrange(users),
+            "input_statement": rng.choice(TOPICS)
+        })
+    return trace
+
+def load_trace(path: str):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def outcome(interaction: FakeInteraction, error) -> str:
+    if error is not None:
+        return "exception"
+    if not interaction.followups:
+        return "no_followup"
+    content = interaction.followups[-1][1]
+    if content.startswith("Debate complete"):
+        return "completed"
+    if content.startswith("An error occurred"):
+        return "error"
+    if "cancelled" in content:
+        return "cancelled"
+    return "rejected"
+
+def slope(points):
+    """Least-squares slope of y over x, 0.0 when x doesn't vary."""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+async def main(args, trace):
+    # The bot reads its limits and model from the environment, as in production
+    from bot.main import ThinkTankBot
+    # Importing the bot configures logging at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+
+    bot = ThinkTankBot()
+    bot.debate_orchestrator.llm_service.mock_client.random.seed(args.seed)
+    if bot.debate_pool is not None:
+        await bot.debate_pool.start()
+    discord = FakeDiscord(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    loop = asyncio.get_running_loop()
+    results = []
+
+    async def invoke(record):
+        channel = FakeChannel(discord, record["channel_id"], record["guild_id"])
+        interaction = FakeInteraction(discord, channel, record["user_id"])
+        error = None
+        try:
+            await bot.handle_thinktank(interaction, record["input_statement"], record.get("debators") or args.debaters)
+        except Exception as e:
+            error = e
+        thread = channel.threads[0] if channel.threads else None
+        results.append((interaction, thread, outcome(interaction, error)))
+        discord.forget(interaction.id)
+        if thread is not None:
+            discord.forget(thread.id)
+
+    samples = []
+
+    async def sample():
+        while True:
+            memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            samples.append((bot.scheduler.stats()["running"], memory))
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    sampler = asyncio.create_task(sample())
+    start = loop.time()
+    tasks = []
+    for record in trace:
+        delay = start + record["at"] / args.speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(invoke(record)))
+    await asyncio.gather(*tasks)
+    wall = loop.time() - start
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+    await monitor.stop()
+    retained, peak_memory = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    tracemalloc.stop()
+    await bot.close()
+
+    outcomes = Counter(kind for _, _, kind in results)
+    completed = [(i, t) for i, t, kind in results if kind == "completed"]
+    threads = [t for _, t, _ in results if t is not None]
+    report = {
+        "config": {
+            "invocations": len(trace),
+            "trace_seconds": trace[-1]["at"] if trace else 0.0,
+            "speed": args.speed,
+            "model": os.environ["MODEL_OVERRIDE"],
+            "max_concurrent": bot.scheduler.max_concurrent,
+            "workers": bot.debate_pool.size if bot.debate_pool is not None else 0,
+            "send_latency": args.latency
+        },
+        "outcomes": dict(outcomes),
+        "wall_seconds": wall,
+        "defer_seconds": summarize([i.deferred_at - i.created_at for i, _, _ in results if i.deferred_at is not None]),
+        "end_to_end_seconds": summarize([i.followups[-1][0] - i.created_at for i, _ in completed]),
+        "first_message_seconds": summarize([
+            t.first_message_at - i.created_at for i, t in completed if t.first_message_at is not None
+        ]),
+        "messages_per_debate": summarize([float(t.messages) for _, t in completed]),
+        "throughput": {
+            "messages_per_second": discord.messages_posted / wall,
+            "edits_per_second": discord.edits / wall,
+            "chars_per_second": discord.chars_posted / wall,
+            "debates_per_hour": len(completed) / wall * 3600
+        },
+        "discord_requests": dict(discord.requests),
+        "rate_limited_requests": dict(discord.rate_limited),
+        "rate_limit_wait_seconds": {route: round(wait, 3) for route, wait in discord.rate_limit_wait.items()},
+        "request_latency_seconds": {
+            route: summarize(latencies) for route, latencies in discord.request_latency.items() if latencies
+        },
+        "event_loop_lag_seconds": summarize(monitor.samples),
+        "threads": len(threads),
+        "peak_concurrent_debates": max((running for running, _ in samples), default=0)
+    }
+    if not args.no_tracemalloc:
+        report["memory"] = {
+            "peak_bytes": peak_memory,
+            # Still allocated once every debate has finished
+            "retained_bytes": retained,
+            # Traced memory over the number of running debates, sampled every SAMPLE_INTERVAL
+            "bytes_per_concurrent_debate": slope(samples)
+        }
+    print_report("discord simulation", report, args.json)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay /thinktank invocations against simulated Discord")
+    parser.add_argument("--trace", default=None, help="JSONL trace of invocations to replay")
+    parser.add_argument("--invocations", type=int, default=200, help="invocations to generate without --trace")
+    parser.add_argument("--rate", type=float, default=5.0, help="generated invocations per second")
+    parser.add_argument("--guilds", type=int, default=20, help="guilds in the generated trace")
+    parser.add_argument("--channels", type=int, default=3, help="channels per guild in the generated trace")
+    parser.add_argument("--users", type=int, default=50, help="users per guild in the generated trace")
+    parser.add_argument("--write-trace", default=None, help="save the generated trace to this JSONL file")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay the trace this many times faster")
+    parser.add_argument("--debaters", default=None, help="comma-separated personalities for invocations without any")
+    parser.add_argument("--model", default="mock-fast", help="mock model name")
+    parser.add_argument("--latency", type=float, default=0.05, help="median Discord request latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="sigma of the log-normal latency spread")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="MAX_CONCURRENT_DEBATES for the bot")
+    parser.add_argument("--max-per-guild", type=int, default=None, help="MAX_DEBATES_PER_GUILD for the bot")
+    parser.add_argument("--max-queued", type=int, default=None, help="MAX_QUEUED_DEBATES for the bot")
+    parser.add_argument("--workers", type=int, default=None, help="DEBATE_WORKERS for the bot")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip memory tracing, which slows the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    trace_path = os.path.abspath(args.trace) if args.trace else None
+    json_path = os.path.abspath(args.json) if args.json else None
+    write_path = os.path.abspath(args.write_trace) if args.write_trace else None
+    os.chdir(project_root)
+    os.environ["MODEL_OVERRIDE"] = f"mock/{args.model}"
+    for name, value in (
+        ("MAX_CONCURRENT_DEBATES", args.max_concurrent),
+        ("MAX_DEBATES_PER_GUILD", args.max_per_guild),
+        ("MAX_QUEUED_DEBATES", args.max_queued),
+        ("DEBATE_WORKERS", args.workers)
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if trace_path:
+        trace = load_trace(trace_path)
+    else:
+        trace = generate_trace(args.invocations, args.rate, args.guilds, args.channels, args.users, args.seed)
+        if write_path:
+            with open(write_path, 'w') as f:
+                f.writelines(json.dumps(record) + "\n" for record in trace)
+    args.json = json_path
+    asyncio.run(main(args, trace))
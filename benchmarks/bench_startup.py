@@ -0,0 +1,83 @@
+"""
+Cold-start benchmark: time from a fresh interpreter to the first debate message.
+
+Each run starts a new Python process that imports the debate stack, builds a DebateOrchestrator
+and runs one debate against the mock provider, so module imports, config and personality loading
+and client setup are all measured the way a restarted bot worker pays for them:
+
+    python benchmarks/bench_startup.py --runs 10 --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import project_root, summarize, print_report
+
+# Runs inside the child process; prints one JSON line of timings relative to interpreter start
+CHILD = """
+import time
+start = time.perf_counter()
+import asyncio, json, logging, sys
+from core.debate import DebateOrchestrator, StreamingTurn
+from core.llm_service import LLMService
+from models.personality import ModelPreference
+imported = time.perf_counter()
+logging.getLogger().setLevel(logging.WARNING)
+
+async def main():
+    service = LLMService(model_override=ModelPreference(provider="mock", model_name=sys.argv[1]))
+    orchestrator = DebateOrchestrator(llm_service=service)
+    ready = time.perf_counter()
+    debate = await orchestrator.start_debate("Is free will an illusion?", orchestrator.personality_manager.list_personalities()[:2])
+    first = None
+    async for title, content, reply_to in debate.run_rounds():
+        if isinstance(content, StreamingTurn):
+            await content.result()
+        if first is None:
+            first = time.perf_counter()
+    done = time.perf_counter()
+    print(json.dumps({
+        "import": imported - start,
+        "ready": ready - start,
+        "first_message": first - start,
+        "first_debate": done - start,
+        "modules": len(sys.modules)
+    }))
+
+asyncio.run(main())
+"""
+
+def run_once(model: str) -> dict:
+    launched = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, model],
+        cwd=project_root, capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    # The whole child, including interpreter start-up
+    timings["process"] = time.perf_counter() - launched
+    return timings
+
+def main(args):
+    runs = [run_once(args.model) for _ in range(args.runs)]
+    report = {
+        "config": {"runs": args.runs, "model": f"mock/{args.model}"},
+        "import_seconds": summarize([r["import"] for r in runs]),
+        "orchestrator_ready_seconds": summarize([r["ready"] for r in runs]),
+        "first_message_seconds": summarize([r["first_message"] for r in runs]),
+        "first_debate_seconds": summarize([r["first_debate"] for r in runs]),
+        "process_seconds": summarize([r["process"] for r in runs]),
+        "modules_loaded": runs[-1]["modules"]
+    }
+    print_report("startup benchmark", report, args.json)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold start to the first debate")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh processes to time")
+    parser.add_argument("--model", default="mock-fast", help="mock model name")
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    main(parser.parse_args())
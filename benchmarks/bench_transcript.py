@@ -0,0 +1,94 @@
+"""
+Microbenchmark for the debate transcript: memory per 1,000 turns and prompt-assembly time.
+
+Compares the Turn-record transcript with the list of history dicts debates used to keep next
+to it, which was converted back into a context for every round and final summary:
+
+    python benchmarks/bench_transcript.py --turns 1000 --json transcript.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.common import summarize, print_report
+
+from core.context import ConversationContext
+
+PERSONALITIES = ["Socrates", "Nietzsche", "John Doe", "Petelgeuse Romanée-Conti"]
+ROUND_TYPES = ["opening", "rebuttal", "closing"]
+WORDS = "reason virtue truth knowledge justice power will question doubt freedom meaning argument".split()
+
+def make_turns(count: int, seed: int):
+    rng = random.Random(seed)
+    turns = []
+    for index in range(count):
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "." for _ in range(3)]
+        # Names arrive as fresh strings, as they do from personality files and format definitions
+        turns.append(("".join(PERSONALITIES[index % len(PERSONALITIES)]), " ".join(sentences), "".join(ROUND_TYPES[index % 3])))
+    return turns
+
+def measure(build) -> int:
+    """Bytes still allocated by build() once it returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def build_transcript(turns) -> ConversationContext:
+    context = ConversationContext()
+    for personality, response, round_type in turns:
+        context.append(personality, response, round_type)
+    return context
+
+def build_dict_history(turns):
+    history = [{"personality": p, "response": r, "round_type": t} for p, r, t in turns]
+    return history, ConversationContext.from_history(history)
+
+def time_calls(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return summarize(samples)
+
+def main(args):
+    turns = make_turns(args.turns, args.seed)
+    per_thousand = 1000 / args.turns
+    transcript = build_transcript(turns)
+    history, _ = build_dict_history(turns)
+    # A round's worth of the most recent turns, as passed to round and final summaries
+    round_start = max(0, args.turns - len(PERSONALITIES))
+
+    report = {
+        "config": {"turns": args.turns, "repeat": args.repeat, "token_budget": args.budget},
+        "bytes_per_1000_turns": {
+            "transcript": measure(lambda: build_transcript(turns)) * per_thousand,
+            "dict_history_and_context": measure(lambda: build_dict_history(turns)) * per_thousand
+        },
+        "append_us": time_calls(lambda: build_transcript(turns[:100]), args.repeat // 10 or 1),
+        "prompt_messages_us": time_calls(lambda: transcript.messages("openai", args.budget), args.repeat),
+        "round_history_us": {
+            "view": time_calls(lambda: transcript.since(round_start).window(args.budget), args.repeat),
+            "rebuilt_from_dicts": time_calls(
+                lambda: ConversationContext.from_history(history[round_start:]).window(args.budget), args.repeat
+            )
+        }
+    }
+    print_report("transcript benchmark", report, args.json)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcript memory and prompt assembly")
+    parser.add_argument("--turns", type=int, default=1000, help="turns in the transcript")
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per measurement")
+    parser.add_argument("--budget", type=int, default=2000, help="history token budget for prompts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Make the project importable and resolve config/ and personalities/ like the bot does
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 < q <= 1); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99/max of a list of samples."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else 0.0
+    }
+
+class LoopLagMonitor:
+    """Measures event-loop lag as the overshoot of a short periodic sleep."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+def print_report(title: str, report: Dict, json_path: Optional[str] = None):
+    """Print a report as aligned key/value lines and optionally save it as JSON."""
+    print(f"== {title} ==")
+
+    def walk(prefix: str, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, float):
+            print(f"{prefix:<40} {value:.4f}")
+        else:
+            print(f"{prefix:<40} {value}")
+
+    walk("", report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,213 @@
+"""
+In-process stand-ins for the Discord objects the /thinktank command touches.
+
+FakeInteraction, FakeChannel, FakeThread and FakeMessage implement just the calls the bot makes
+(response.defer, channel.create_thread, thread.send, message.edit/delete and followup.send).
+Every call goes through a FakeDiscord, which models send latency and Discord's rate limits:
+a global limit plus one bucket per route and channel (or per interaction for followups).
+Like discord.py, requests wait for a free slot instead of failing, and the waits are counted.
+Interactions expire as they do on Discord: defer() must come within 3 seconds and followups
+within 15 minutes.
+"""
+import random
+import asyncio
+from collections import Counter, deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+# (requests, per seconds) for each route; buckets are per channel, or per interaction for followups
+ROUTE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "interaction_callback": (1, 3.0),
+    "create_thread": (10, 10.0),
+    "post_message": (5, 5.0),
+    "edit_message": (5, 5.0),
+    "delete_message": (5, 1.0),
+    "followup": (5, 2.0)
+}
+GLOBAL_LIMIT = (50, 1.0)
+# Interaction endpoints don't count against the global limit
+GLOBAL_EXEMPT = {"interaction_callback", "followup"}
+# Seconds an interaction can go unanswered, and how long its followup token lasts
+DEFER_DEADLINE = 3.0
+FOLLOWUP_TOKEN_LIFETIME = 15 * 60.0
+
+class InteractionExpired(Exception):
+    """Raised like Discord's Unknown Interaction error for a late defer or followup."""
+
+class _Bucket:
+    __slots__ = ("limit", "per", "times")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.times: Deque[float] = deque()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a request fits in the window, 0.0 if it fits now."""
+        while self.times and now - self.times[0] >= self.per:
+            self.times.popleft()
+        if len(self.times) < self.limit:
+            return 0.0
+        return self.per - (now - self.times[0])
+
+class FakeDiscord:
+    """The simulated Discord API: latency, rate limits and per-route request counts."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.3, seed: int = 0, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.limits = {**ROUTE_LIMITS, **(limits or {})}
+        self._global = _Bucket(*GLOBAL_LIMIT)
+        self._buckets: Dict[Tuple[str, Hashable], _Bucket] = {}
+        self._next_id = 1 << 40
+        self.requests: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.rate_limit_wait: Counter = Counter()
+        self.request_latency: Dict[str, List[float]] = {route: [] for route in self.limits}
+        self.messages_posted = 0
+        self.edits = 0
+        self.chars_posted = 0
+
+    def new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def request(self, route: str, key: Hashable):
+        """Wait for the route's and the global rate limit, then for the request's latency."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        bucket = self._buckets.get((route, key))
+        if bucket is None:
+            bucket = self._buckets[(route, key)] = _Bucket(*self.limits[route])
+        buckets = [bucket] if route in GLOBAL_EXEMPT else [bucket, self._global]
+        limited = False
+        while True:
+            now = loop.time()
+            delay = max(b.wait_time(now) for b in buckets)
+            if delay <= 0:
+                break
+            limited = True
+            await asyncio.sleep(delay)
+        now = loop.time()
+        for b in buckets:
+            b.times.append(now)
+        if limited:
+            self.rate_limited[route] += 1
+            self.rate_limit_wait[route] += now - start
+        await asyncio.sleep(self.latency * self.random.lognormvariate(0.0, self.jitter))
+        self.requests[route] += 1
+        self.request_latency[route].append(loop.time() - start)
+
+    def forget(self, key: Hashable):
+        """Drop the buckets of a channel or interaction that won't be used again."""
+        for route in self.limits:
+            self._buckets.pop((route, key), None)
+
+class FakeUser:
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+class FakeMessage:
+    __slots__ = ("discord", "id", "channel_id", "content", "reference")
+
+    def __init__(self, discord: FakeDiscord, channel_id: int, content: str, reference=None):
+        self.discord = discord
+        self.id = discord.new_id()
+        self.channel_id = channel_id
+        self.content = content
+        self.reference = reference
+
+    async def edit(self, content: Optional[str] = None) -> "FakeMessage":
+        await self.discord.request("edit_message", self.channel_id)
+        self.discord.edits += 1
+        if content is not None:
+            self.content = content
+        return self
+
+    async def delete(self):
+        await self.discord.request("delete_message", self.channel_id)
+
+class FakeThread:
+    """A thread that keeps counts and timings of what was posted, not the messages themselves."""
+
+    def __init__(self, discord: FakeDiscord, name: str, parent: "FakeChannel"):
+        self.discord = discord
+        self.id = discord.new_id()
+        self.name = name
+        self.parent = parent
+        self.messages = 0
+        self.first_message_at: Optional[float] = None
+        self.last_message_at: Optional[float] = None
+
+    async def send(self, content: str, reference: Optional[FakeMessage] = None) -> FakeMessage:
+        await self.discord.request("post_message", self.id)
+        now = asyncio.get_running_loop().time()
+        if self.first_message_at is None:
+            self.first_message_at = now
+        self.last_message_at = now
+        self.messages += 1
+        self.discord.messages_posted += 1
+        self.discord.chars_posted += len(content)
+        return FakeMessage(self.discord, self.id, content, reference)
+
+class FakeChannel:
+    """A text channel as seen by one interaction; channels with the same id share rate limits."""
+
+    def __init__(self, discord: FakeDiscord, channel_id: int, guild_id: int):
+        self.discord = discord
+        self.id = channel_id
+        self.guild_id = guild_id
+        self.threads: List[FakeThread] = []
+
+    async def create_thread(self, name: str, type=None) -> FakeThread:
+        await self.discord.request("create_thread", self.id)
+        thread = FakeThread(self.discord, name, self)
+        self.threads.append(thread)
+        return thread
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, ephemeral: bool = False, thinking: bool = False):
+        interaction = self.interaction
+        loop = asyncio.get_running_loop()
+        if loop.time() - interaction.created_at > DEFER_DEADLINE:
+            raise InteractionExpired(f"Interaction {interaction.id} was not deferred within {DEFER_DEADLINE:g}s")
+        await interaction.discord.request("interaction_callback", interaction.id)
+        interaction.deferred_at = loop.time()
+        self._done = True
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content: str, ephemeral: bool = False) -> FakeMessage:
+        interaction = self.interaction
+        loop = asyncio.get_running_loop()
+        if loop.time() - interaction.created_at > FOLLOWUP_TOKEN_LIFETIME:
+            raise InteractionExpired(f"Followup token of interaction {interaction.id} expired")
+        await interaction.discord.request("followup", interaction.id)
+        interaction.followups.append((loop.time(), content))
+        return FakeMessage(interaction.discord, interaction.channel.id, content)
+
+class FakeInteraction:
+    """A /thinktank invocation; records when it was deferred and answered."""
+
+    def __init__(self, discord: FakeDiscord, channel: FakeChannel, user_id: int):
+        self.discord = discord
+        self.id = discord.new_id()
+        self.channel = channel
+        self.guild_id = channel.guild_id
+        self.user = FakeUser(user_id)
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.created_at = asyncio.get_running_loop().time()
+        self.deferred_at: Optional[float] = None
+        self.followups: List[Tuple[float, str]] = []
@@ -0,0 +1,317 @@
+"""
+Headless batch debate runner.
+
+Reads debate jobs from a JSONL file, one object per line:
+
+    {"id": "fw-1", "topic": "Is free will an illusion?", "debaters": ["socrates", "nietzsche"], "format": "classical"}
+
+"debaters" (list or comma-separated string) and "format" are optional; "id" defaults to the
+job's line content hash. Finished transcripts are appended to the output JSONL as soon as each
+debate ends, and jobs already completed in the output file are skipped, so an interrupted
+batch can be resumed by running the same command again:
+
+    python bot/batch.py jobs.jsonl transcripts.jsonl --concurrency 8 --workers 4
+"""
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import hashlib
+import argparse
+import logging
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+
+from core.debate import DebateOrchestrator, StreamingTurn
+from core.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Seconds the parent waits for a worker message before checking for workers that died
+WORKER_POLL_INTERVAL = 1.0
+
+def load_jobs(path: str) -> List[Dict[str, Any]]:
+    """Read debate jobs from a JSONL file, giving every job an id."""
+    jobs = []
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line)
+            topic = job.get("topic") or job.get("input_statement")
+            if not topic:
+                raise ValueError(f"{path}:{line_number}: job has no topic")
+            job["topic"] = topic
+            job.setdefault("id", job.get("request_id") or hashlib.sha1(line.encode("utf-8")).hexdigest()[:12])
+            jobs.append(job)
+    return jobs
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids of jobs that already finished successfully in an output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+async def run_job(orchestrator: DebateOrchestrator, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one debate to completion and return its transcript record."""
+    record = {"id": job["id"], "topic": job["topic"]}
+    start = time.perf_counter()
+    try:
+        debaters = job.get("debaters") or orchestrator.personality_manager.list_personalities()
+        if isinstance(debaters, str):
+            debaters = [d.strip() for d in debaters.split(',')]
+        debate_id = f"batch-{job['id']}"
+        store = orchestrator.store
+        if store is not None and await store.load_debate(debate_id) is not None:
+            # Pick up where an interrupted run stopped instead of regenerating its turns
+            debate = await orchestrator.resume_debate(debate_id, pipelined=True, incremental_summary=True)
+        else:
+            debate = await orchestrator.start_debate(
+                input_statement=job["topic"],
+                debators=debaters,
+                debate_format=job.get("format"),
+                pipelined=True,
+                incremental_summary=True,
+                debate_id=debate_id
+            )
+        record.update(debaters=[p.name for p in debate.personalities], format=debate.current_format.name)
+
+        messages = []
+        async for title, content, reply_to in debate.run_rounds():
+            if isinstance(content, StreamingTurn):
+                content = await content.result()
+            messages.append({"title": title, "content": content, "reply_to": reply_to})
+        record.update(
+            status="ok",
+            messages=messages,
+            summary=messages[-1]["content"] if messages else None
+        )
+    except Exception as e:
+        logger.error(f"Debate {job['id']} failed: {str(e)}")
+        record.update(status="error", error=str(e))
+    record["wall_seconds"] = time.perf_counter() - start
+    return record
+
+async def run_jobs(
+    next_job: Callable,
+    emit: Callable[[Dict[str, Any]], None],
+    concurrency: int,
+    on_start: Optional[Callable[[Dict[str, Any]], None]] = None,
+    admission_share: float = 1.0
+):
+    """Run jobs from next_job() with bounded concurrency until it returns None.
+
+    admission_share is this process's share of the rate limits in config/models.json.
+    """
+    orchestrator = DebateOrchestrator(LLMService(admission_share=admission_share))
+
+    async def runner():
+        while True:
+            job = await next_job()
+            if job is None:
+                return
+            if on_start is not None:
+                on_start(job)
+            emit(await run_job(orchestrator, job))
+
+    try:
+        await asyncio.gather(*(runner() for _ in range(concurrency)))
+    finally:
+        if orchestrator.store is not None:
+            await orchestrator.store.close()
+        await orchestrator.llm_service.close()
+
+def _worker_main(
+    index: int,
+    job_queue: multiprocessing.Queue,
+    result_queue: multiprocessing.Queue,
+    concurrency: int,
+    admission_share: float
+):
+    """Worker process: run jobs from the shared queue and send transcripts back to the parent.
+
+    Sends ("started", index, job_id) as it takes each job, ("record", index, record) as each
+    finishes and ("exit", index) when it stops, so the parent knows which jobs a worker that
+    dies without exiting was running. Each of N workers gets 1/N of the rate limits, so together
+    they stay within the providers' limits.
+    """
+    os.chdir(project_root)
+    load_dotenv()
+
+    async def next_job():
+        return await asyncio.to_thread(job_queue.get)
+
+    try:
+        asyncio.run(run_jobs(
+            next_job,
+            lambda record: result_queue.put(("record", index, record)),
+            concurrency,
+            on_start=lambda job: result_queue.put(("started", index, job["id"])),
+            admission_share=admission_share
+        ))
+    finally:
+        # Tell the parent this worker is done
+        result_queue.put(("exit", index))
+
+class TranscriptWriter:
+    """Appends transcript records to the output JSONL as they arrive."""
+
+    def __init__(self, path: str, total: int):
+        self.file = open(path, 'a')
+        self.total = total
+        self.finished = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+
+    def write(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.finished += 1
+        if record.get("status") != "ok":
+            self.failed += 1
+        elapsed = time.perf_counter() - self.start
+        print(f"[{self.finished}/{self.total}] {record['id']}: {record.get('status')} "
+              f"({record['wall_seconds']:.1f}s, {self.finished / elapsed * 3600:.0f} debates/hour)")
+
+    def close(self):
+        self.file.close()
+
+def _failed(job: Dict[str, Any], error: str, wall_seconds: float = 0.0) -> Dict[str, Any]:
+    return {"id": job["id"], "topic": job["topic"], "status": "error", "error": error, "wall_seconds": wall_seconds}
+
+def _collect(processes: List[Any], result_queue: multiprocessing.Queue, jobs: Dict[str, Dict[str, Any]], writer: "TranscriptWriter"):
+    """Write worker transcripts until every worker has exited or died.
+
+    A worker that dies without exiting, e.g. killed for running out of memory, never sends its
+    results; the jobs it was running are written as failures. Jobs no worker got to, because
+    every worker died, are too. Failed jobs are retried when the batch is run again.
+    """
+    running = set(range(len(processes)))
+    # worker -> {job id: when it started}
+    started: Dict[int, Dict[str, float]] = {index: {} for index in running}
+    finished: Set[str] = set()
+
+    def handle(message: Tuple):
+        kind, index = message[0], message[1]
+        if kind == "started":
+            started[index][message[2]] = time.perf_counter()
+        elif kind == "record":
+            started[index].pop(message[2]["id"], None)
+            finished.add(message[2]["id"])
+            writer.write(message[2])
+        else:
+            running.discard(index)
+
+    while running:
+        try:
+            handle(result_queue.get(timeout=WORKER_POLL_INTERVAL))
+            continue
+        except queue.Empty:
+            pass
+        dead = [index for index in running if not processes[index].is_alive()]
+        if not dead:
+            continue
+        # Whatever a dead worker sent before it stopped is already in the queue
+        while True:
+            try:
+                handle(result_queue.get(timeout=WORKER_POLL_INTERVAL))
+            except queue.Empty:
+                break
+        for index in dead:
+            if index not in running:
+                continue
+            running.discard(index)
+            exitcode = processes[index].exitcode
+            logger.error(f"Batch worker {index} died with exit code {exitcode}")
+            now = time.perf_counter()
+            for job_id, start in started[index].items():
+                finished.add(job_id)
+                writer.write(_failed(jobs[job_id], f"Worker process died with exit code {exitcode}", now - start))
+
+    for job_id, job in jobs.items():
+        if job_id not in finished:
+            writer.write(_failed(job, "Not run: every worker process died"))
+
+def run_batch(jobs_path: str, output_path: str, concurrency: int = 4, workers: int = 1):
+    jobs = load_jobs(jobs_path)
+    done = completed_ids(output_path)
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already completed, {len(pending)} to run")
+    if not pending:
+        return
+
+    writer = TranscriptWriter(output_path, len(pending))
+    try:
+        if workers <= 1:
+            local_queue: asyncio.Queue = asyncio.Queue()
+
+            async def main():
+                for job in pending:
+                    local_queue.put_nowait(job)
+                for _ in range(concurrency):
+                    local_queue.put_nowait(None)
+                await run_jobs(local_queue.get, writer.write, concurrency)
+
+            asyncio.run(main())
+        else:
+            job_queue = multiprocessing.Queue()
+            result_queue = multiprocessing.Queue()
+            for job in pending:
+                job_queue.put(job)
+            # One stop marker per runner coroutine in every worker
+            for _ in range(workers * concurrency):
+                job_queue.put(None)
+            processes = [
+                multiprocessing.Process(target=_worker_main, args=(index, job_queue, result_queue, concurrency, 1 / workers))
+                for index in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            _collect(processes, result_queue, {job["id"]: job for job in pending}, writer)
+            for process in processes:
+                process.join()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - writer.start
+    print(f"Finished {writer.finished} debates ({writer.failed} failed) in {elapsed:.1f}s: "
+          f"{writer.finished / elapsed * 3600:.0f} debates/hour")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run debates headlessly from a JSONL job file")
+    parser.add_argument("jobs", help="input JSONL with one debate job per line")
+    parser.add_argument("output", help="output JSONL; completed jobs in it are skipped on resume")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent debates per process")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--batch-api", action="store_true", help="send completions through the providers' batch APIs")
+    args = parser.parse_args()
+
+    jobs_path = os.path.abspath(args.jobs)
+    output_path = os.path.abspath(args.output)
+    # Config and personalities are loaded relative to the project root
+    os.chdir(project_root)
+    load_dotenv()
+    if args.batch_api:
+        # Read by LLMService in this process and inherited by the worker processes
+        os.environ['BATCH_MODE'] = '1'
+    logging.getLogger().setLevel(logging.WARNING)
+    run_batch(jobs_path, output_path, concurrency=args.concurrency, workers=args.workers)
@@ -1,32 +1,111 @@
 import os
 import sys
+import signal
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Add the project root directory to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from core.debate import DebateOrchestrator
+from core.debate import DebateOrchestrator, StreamingTurn
 from core.personality import PersonalityManager
+from core.scheduler import DebateScheduler, SchedulerFull, DebateCancelled
+from bot.sender import ThreadSender
+from bot.workers import DebateWorkerPool
 
 # Load environment variables
 load_dotenv()
 
+# Minimum seconds between in-place edits of a streaming message
+STREAM_EDIT_INTERVAL = 1.0
+
+async def send_streaming(sender: ThreadSender, title: str, turn: StreamingTurn, reference=None) -> asyncio.Future:
+    """Post a turn at its first token and edit it in place as more text streams in."""
+    loop = asyncio.get_running_loop()
+    message = None
+    last_edit = 0.0
+    async for text in turn:
+        if message is None:
+            message = sender.send(f"**{title}**: {text}", reference=reference, editable=True)
+            last_edit = loop.time()
+        elif loop.time() - last_edit >= STREAM_EDIT_INTERVAL:
+            sender.edit(message, f"**{title}**: {text}")
+            last_edit = loop.time()
+
+    final = f"**{title}**: {(await turn.result()).strip()}"
+    if message is None:
+        return sender.send(final, reference=reference)
+    sender.edit(message, final)
+    return message
+
 class ThinkTankBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
         super().__init__(command_prefix='/', intents=intents)
         self.debate_orchestrator = DebateOrchestrator()
-        self.personality_manager = PersonalityManager()
+        self.personality_manager = PersonalityManager.shared()
+        # Bounds how many debates run at once, fairly across guilds and users
+        self.scheduler = DebateScheduler(
+            max_concurrent=int(os.getenv('MAX_CONCURRENT_DEBATES', '4')),
+            max_per_guild=int(os.getenv('MAX_DEBATES_PER_GUILD', '2')),
+            max_per_user=int(os.getenv('MAX_DEBATES_PER_USER', '1')),
+            max_queue=int(os.getenv('MAX_QUEUED_DEBATES', '50'))
+        )
+        # With DEBATE_WORKERS set, debates run in worker processes and this process only talks to Discord
+        workers = int(os.getenv('DEBATE_WORKERS', '0'))
+        self.debate_pool = DebateWorkerPool(workers, metrics=self.debate_orchestrator.llm_service.metrics) if workers > 0 else None
+
+    async def run_debate(self, thread: discord.Thread, messages: AsyncIterator[Tuple[str, Any, Optional[str]]]):
+        """Post a debate's messages, from Debate.run_rounds() or a worker, to its thread as the rounds run."""
+        # Messages go out from the sender's own task, so the next turn is generated meanwhile
+        sender = ThreadSender(thread, metrics=self.debate_orchestrator.llm_service.metrics)
+        last_message = None
+        try:
+            async for title, content, reply_to in messages:
+                if isinstance(content, StreamingTurn):
+                    # Stream the turn into a single message that is edited as text arrives
+                    reference = last_message if reply_to and last_message else None
+                    last_message = await send_streaming(sender, title, content, reference=reference)
+                elif title in ["DEBATE STARTED", "ROUND", "DEBATE ENDED"]:
+                    # Send as a new message with a header
+                    last_message = sender.send(f"**{title}**\n{content}")
+                else:
+                    # Send as a reply to the last message
+                    if reply_to and last_message:
+                        last_message = sender.send(f"**{title}**: {content}", reference=last_message)
+                    else:
+                        last_message = sender.send(f"**{title}**: {content}")
+        except asyncio.CancelledError:
+            sender.cancel()
+            raise
+        finally:
+            # Stops the debate, locally or on its worker, if it didn't run to the end
+            await messages.aclose()
+            await sender.close()
 
     async def setup_hook(self):
-        # Get available personalities for the command
-        available_personalities = self.personality_manager.list_personalities()
-        
+        # Optional metrics exporters
+        metrics = self.debate_orchestrator.llm_service.metrics
+        if os.getenv('METRICS_PORT'):
+            await metrics.serve(os.getenv('METRICS_HOST', '127.0.0.1'), int(os.getenv('METRICS_PORT')))
+        if os.getenv('METRICS_JSON_PATH'):
+            metrics.start_json_dump(os.getenv('METRICS_JSON_PATH'), float(os.getenv('METRICS_DUMP_INTERVAL', '60')))
+        # Pick up edited personality files without a restart
+        self.personality_manager.start_watching(float(os.getenv('PERSONALITY_RELOAD_INTERVAL', '5')))
+        if self.debate_pool is not None:
+            await self.debate_pool.start()
+            try:
+                # SIGHUP replaces the workers, e.g. after a deploy, without dropping the gateway connection
+                asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.debate_pool.restart_workers)
+            except (NotImplementedError, AttributeError):
+                pass
+
         # Create the thinktank command with auto-populated choices
         @self.tree.command(name="thinktank", description="Start a debate between AI personalities")
         @app_commands.describe(
@@ -38,59 +117,114 @@ class ThinkTankBot(commands.Bot):
             input_statement: str,
             debators: str = None
         ):
-            # If no debators specified, use all available personalities
-            if not debators:
-                debators = ",".join(available_personalities)
-            
-            # Split the debators string into a list
-            debator_list = [d.strip() for d in debators.split(',')]
-            
-            # Start the debate
-            await interaction.response.defer()
-            
-            try:
-                # Initialize the debate
-                debate = await self.debate_orchestrator.start_debate(
-                    input_statement=input_statement,
-                    debators=debator_list
-                )
-                
-                # Create a thread for the debate
-                thread = await interaction.channel.create_thread(
-                    name=f"Debate: {input_statement[:50]}...",
-                    type=discord.ChannelType.public_thread
-                )
-                
-                # Send initial message
-                last_message = None
-                async for title, content, reply_to in debate.run_rounds():
-                    if title in ["DEBATE STARTED", "ROUND", "DEBATE ENDED"]:
-                        # Send as a new message with a header
-                        last_message = await thread.send(f"**{title}**\n{content}")
-                    else:
-                        # Send as a reply to the last message
-                        if reply_to and last_message:
-                            last_message = await thread.send(
-                                f"**{title}**: {content}",
-                                reference=last_message
-                            )
-                        else:
-                            last_message = await thread.send(f"**{title}**: {content}")
-                
-                # End the interaction after debate is complete
-                await interaction.followup.send("Debate complete! You can continue the discussion in the thread.", ephemeral=True)
-                    
-            except Exception as e:
-                await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
+            await self.handle_thinktank(interaction, input_statement, debators)
         
         # Sync the command tree
         await self.tree.sync()
 
+    async def _run_locally(self, input_statement: str, debators: List[str], guild_id: Optional[int]) -> AsyncIterator[Tuple[str, Any, Optional[str]]]:
+        """Start a debate in this process and yield its messages."""
+        debate = await self.debate_orchestrator.start_debate(
+            input_statement=input_statement,
+            debators=debators,
+            pipelined=True,
+            incremental_summary=True,
+            guild_id=guild_id
+        )
+        messages = debate.run_rounds(stream=True)
+        try:
+            async for message in messages:
+                yield message
+        finally:
+            await messages.aclose()
+
+    async def handle_thinktank(self, interaction: discord.Interaction, input_statement: str, debators: str = None):
+        """Body of the /thinktank command: run a debate in a new thread and report back to the user."""
+        # If no debators specified, use all available personalities
+        if not debators:
+            debators = ",".join(self.personality_manager.list_personalities())
+        
+        # Split the debators string into a list
+        debator_list = [d.strip() for d in debators.split(',')]
+        
+        # Start the debate
+        await interaction.response.defer()
+        
+        try:
+            # Reject early when the queue is full, before creating a thread
+            self.scheduler.check(interaction.guild_id, interaction.user.id)
+
+            # Check the names here so mistakes are reported before a thread is created
+            personalities = await self.debate_orchestrator.load_personalities(debator_list)
+            names = [p.name for p in personalities]
+
+            # The debate only starts once the scheduler runs its job, so one cancelled while queued
+            # is never started on a worker or recorded in the transcript store
+            def messages() -> AsyncIterator[Tuple[str, Any, Optional[str]]]:
+                if self.debate_pool is not None:
+                    return self.debate_pool.run_debate(input_statement, names, guild_id=interaction.guild_id)
+                return self._run_locally(input_statement, names, interaction.guild_id)
+            
+            # Create a thread for the debate
+            thread = await interaction.channel.create_thread(
+                name=f"Debate: {input_statement[:50]}...",
+                type=discord.ChannelType.public_thread
+            )
+
+            # Keep a single status message in the thread while the debate waits for a slot
+            status_message = None
+            status_lock = asyncio.Lock()
+
+            async def report_position(position: int):
+                nonlocal status_message
+                async with status_lock:
+                    if position == 0:
+                        if status_message is not None:
+                            await status_message.delete()
+                            status_message = None
+                        return
+                    text = f"Waiting for a free debate slot (position {position} in queue)..."
+                    if status_message is None:
+                        status_message = await thread.send(text)
+                    else:
+                        status_message = await status_message.edit(content=text)
+            
+            ticket = self.scheduler.submit(
+                key=thread.id,
+                job=lambda: self.run_debate(thread, messages()),
+                guild_id=interaction.guild_id,
+                user_id=interaction.user.id,
+                on_position=report_position
+            )
+            await ticket.wait()
+            
+            # End the interaction after debate is complete
+            await interaction.followup.send("Debate complete! You can continue the discussion in the thread.", ephemeral=True)
+
+        except SchedulerFull as e:
+            await interaction.followup.send(str(e), ephemeral=True)
+        except DebateCancelled:
+            await interaction.followup.send("The debate was cancelled because its thread was deleted.", ephemeral=True)
+        except Exception as e:
+            await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
+
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        # Stop debates (queued or running) whose thread is gone
+        self.scheduler.cancel(payload.thread_id)
+
+    async def close(self):
+        # Write out transcripts still buffered in memory
+        if self.debate_orchestrator.store is not None:
+            await self.debate_orchestrator.store.close()
+        await self.debate_orchestrator.llm_service.close()
+        if self.debate_pool is not None:
+            await self.debate_pool.close()
+        await super().close()
+
     async def on_ready(self):
         print(f'Logged in as {self.user} (ID: {self.user.id})')
         print('------')
 
-bot = ThinkTankBot()
-
 if __name__ == "__main__":
+    bot = ThinkTankBot()
     bot.run(os.getenv('DISCORD_TOKEN')) 
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Outbound message queue for Discord threads
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Union
+
+import discord
+
+from core.metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+# Discord's maximum message length
+MESSAGE_LIMIT = 2000
+
+class _Outbound:
+    __slots__ = ("kind", "content", "reference", "target", "editable", "future")
+
+    def __init__(self, kind: str, content: str, reference=None, target: Optional[asyncio.Future] = None, editable: bool = False):
+        self.kind = kind
+        self.content = content
+        self.reference = reference
+        self.target = target
+        self.editable = editable
+        self.future: Optional[asyncio.Future] = None
+
+class ThreadSender:
+    """Sends and edits messages in one thread from its own task.
+
+    Callers enqueue messages without waiting on Discord, so LLM generation for the next turn
+    isn't blocked by Discord I/O. Adjacent queued messages are batched into a single post up to
+    the 2000 character limit, pending edits of the same message are collapsed into one, and
+    requests are paced to stay within the per-channel rate limit instead of running into 429s.
+    """
+
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        rate: int = 5,
+        per: float = 5.0,
+        max_length: int = MESSAGE_LIMIT,
+        metrics: Optional[MetricsCollector] = None
+    ):
+        self.channel = channel
+        self.metrics = metrics
+        self.rate = rate
+        self.per = per
+        self.max_length = max_length
+
+        self._queue: Deque[_Outbound] = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._send_times: Deque[float] = deque()
+        self._edit_times: Deque[float] = deque()
+        # Latest content queued for each sent or editable message, to skip no-op edits
+        self._contents: Dict[asyncio.Future, str] = {}
+        self.stats = {"messages": 0, "posts": 0, "edits": 0, "edits_coalesced": 0, "throttled_seconds": 0.0}
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, content: str, reference: Union[discord.Message, asyncio.Future, None] = None, editable: bool = False) -> asyncio.Future:
+        """Queue a message; the returned future resolves to the posted discord.Message.
+
+        reference may be a future returned by an earlier send. Messages that will be edited
+        later must pass editable=True so they are never merged with their neighbours.
+        """
+        item = _Outbound("send", content, reference=reference, editable=editable)
+        item.future = asyncio.get_running_loop().create_future()
+        self._contents[item.future] = content
+        self._queue.append(item)
+        self.stats["messages"] += 1
+        self._wakeup.set()
+        return item.future
+
+    def edit(self, target: asyncio.Future, content: str):
+        """Queue an edit of a message returned by send(editable=True)."""
+        if self._contents.get(target) == content:
+            return
+        self._contents[target] = content
+        for item in self._queue:
+            # Not posted yet: post the new content directly, or replace an edit that hasn't run
+            if (item.kind == "send" and item.future is target) or (item.kind == "edit" and item.target is target):
+                item.content = content
+                self.stats["edits_coalesced"] += 1
+                return
+        self._queue.append(_Outbound("edit", content, target=target))
+        self._wakeup.set()
+
+    async def close(self):
+        """Flush everything queued, then stop the sender task."""
+        self._closed = True
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._contents.clear()
+
+    def cancel(self):
+        """Stop immediately, dropping queued messages."""
+        self._task.cancel()
+
+    async def _throttle(self, times: Deque[float]):
+        """Wait until another request fits in the rate limit window."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        while times and now - times[0] >= self.per:
+            times.popleft()
+        if len(times) >= self.rate:
+            delay = self.per - (now - times[0])
+            self.stats["throttled_seconds"] += delay
+            await asyncio.sleep(delay)
+            times.popleft()
+        times.append(loop.time())
+
+    async def _resolve(self, reference) -> Optional[discord.Message]:
+        if isinstance(reference, asyncio.Future):
+            try:
+                return await reference
+            except Exception:
+                return None
+        return reference
+
+    def _take_batch(self, first: _Outbound) -> list:
+        """Merge following plain messages into the first one while they fit in one post."""
+        batch = [first]
+        if first.editable:
+            return batch
+        length = len(first.content)
+        while self._queue:
+            item = self._queue[0]
+            if item.kind != "send" or item.editable or item.reference is not None:
+                break
+            if length + 1 + len(item.content) > self.max_length:
+                break
+            length += 1 + len(item.content)
+            batch.append(self._queue.popleft())
+        return batch
+
+    async def _run(self):
+        while True:
+            while not self._queue:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            item = self._queue.popleft()
+            if item.kind == "send":
+                batch = self._take_batch(item)
+                content = "\n".join(entry.content for entry in batch)
+                reference = await self._resolve(item.reference)
+                await self._throttle(self._send_times)
+                start = time.monotonic()
+                try:
+                    message = await self.channel.send(content, reference=reference)
+                except Exception as e:
+                    logger.error(f"Error sending message: {str(e)}")
+                    self._record("post", start, False, len(batch))
+                    for entry in batch:
+                        entry.future.set_exception(e)
+                        # Mark as retrieved; callers that care await the future
+                        entry.future.exception()
+                    continue
+                self.stats["posts"] += 1
+                self._record("post", start, True, len(batch))
+                for entry in batch:
+                    entry.future.set_result(message)
+            else:
+                message = await self._resolve(item.target)
+                if message is None:
+                    continue
+                await self._throttle(self._edit_times)
+                start = time.monotonic()
+                try:
+                    await message.edit(content=item.content)
+                    self.stats["edits"] += 1
+                    self._record("edit", start, True, 0)
+                except Exception as e:
+                    logger.error(f"Error editing message: {str(e)}")
+                    self._record("edit", start, False, 0)
+
+    def _record(self, kind: str, start: float, ok: bool, messages: int):
+        if self.metrics is not None:
+            self.metrics.record_send(kind, time.monotonic() - start, ok, messages)
@@ -0,0 +1,122 @@
+"""
+Headless tournament runner.
+
+Runs a bracket of pairwise debates between personalities on one topic and prints the standings:
+
+    python bot/tournament.py "Is free will an illusion?" --bracket round_robin --concurrency 8
+    python bot/tournament.py "Is free will an illusion?" --bracket elimination --personalities "socrates,nietzsche,john doe"
+
+Each personality's opening statement is generated once and reused across its matches; pass
+--no-reuse to generate it in every match instead, e.g. to compare LLM calls and wall time.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, List, Optional
+
+# Add the project root directory to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+
+from core.debate import DebateOrchestrator
+from core.tournament import BRACKETS, Tournament
+
+async def run_tournament(
+    topic: str,
+    bracket: str = "round_robin",
+    personalities: Optional[List[str]] = None,
+    debate_format: str = "classical",
+    concurrency: int = 8,
+    reuse_openings: bool = True,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Run a tournament and return its standings, matches and LLM usage."""
+    orchestrator = DebateOrchestrator()
+    tournament = Tournament(
+        orchestrator,
+        topic,
+        personalities=personalities,
+        debate_format=debate_format,
+        concurrency=concurrency,
+        reuse_openings=reuse_openings,
+        seed=seed
+    )
+    start = time.perf_counter()
+    try:
+        if bracket == "elimination":
+            standings = await tournament.run_elimination()
+        else:
+            standings = await tournament.run_round_robin()
+    finally:
+        if orchestrator.store is not None:
+            await orchestrator.store.close()
+        await orchestrator.llm_service.close()
+    models = orchestrator.llm_service.metrics.snapshot()["models"]
+    calls = sum(m["calls"] for m in models)
+    cache_hits = sum(m["cache_hits"] for m in models)
+    return {
+        "topic": topic,
+        "bracket": bracket,
+        "format": debate_format,
+        "standings": standings,
+        "matches": tournament.matches,
+        "llm_calls": calls - cache_hits,
+        "cache_hits": cache_hits,
+        "cost": round(sum(m["cost"] for m in models), 6),
+        "wall_seconds": time.perf_counter() - start
+    }
+
+def print_results(result: Dict[str, Any]):
+    print(f"{result['bracket']} tournament on: {result['topic']}")
+    for match in result["matches"]:
+        first, second = match["participants"]
+        if "error" in match:
+            outcome = f"failed ({match['error']})"
+        elif match.get("decided_by_lot"):
+            outcome = f"draw, {match['decided_by_lot']} advances by lot"
+        else:
+            outcome = f"{match['winner']} wins" if match["winner"] else "draw"
+        print(f"  [{match['stage']}] {first} vs {second}: {outcome}")
+    print("Standings:")
+    for place, row in enumerate(result["standings"], 1):
+        print(f"  {place}. {row['personality']}: {row['points']:g} pts "
+              f"({row['wins']}W {row['draws']}D {row['losses']}L)")
+    print(f"{len(result['matches'])} debates, {result['llm_calls']} LLM calls "
+          f"({result['cache_hits']} served from cache), ${result['cost']:.4f}, {result['wall_seconds']:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a tournament of pairwise debates")
+    parser.add_argument("topic", help="the topic every match debates")
+    parser.add_argument("--bracket", choices=BRACKETS, default="round_robin")
+    parser.add_argument("--personalities", default=None, help="comma-separated personalities (default: all)")
+    parser.add_argument("--format", default="classical", help="debate format for every match")
+    parser.add_argument("--concurrency", type=int, default=8, help="debates run at once")
+    parser.add_argument("--no-reuse", action="store_true", help="generate opening statements in every match")
+    parser.add_argument("--seed", type=int, default=0, help="seed for drawn elimination matches")
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    # Config and personalities are loaded relative to the project root
+    os.chdir(project_root)
+    load_dotenv()
+    logging.getLogger().setLevel(logging.WARNING)
+    result = asyncio.run(run_tournament(
+        args.topic,
+        bracket=args.bracket,
+        personalities=[p.strip() for p in args.personalities.split(',')] if args.personalities else None,
+        debate_format=args.format,
+        concurrency=args.concurrency,
+        reuse_openings=not args.no_reuse,
+        seed=args.seed
+    ))
+    print_results(result)
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
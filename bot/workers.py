@@ -0,0 +1,386 @@
+"""
+Debate worker processes for the Discord bot.
+
+With DEBATE_WORKERS set, the bot process only handles the gateway, interactions and posting;
+debates run in a pool of worker processes. The bot sends each worker the debates it should run
+and workers stream every debate's (title, content, reply_to) messages back in order, so a burst
+of debates can't delay gateway heartbeats and debate throughput scales across cores.
+
+Messages to a worker:
+    ("start", debate_id, job)   run a debate; job has topic, debaters, format and guild_id
+    ("cancel", debate_id)       stop a debate whose thread went away
+    None                        exit (sent once a draining worker has no debates left)
+
+Messages from workers, in order per debate:
+    ("message", debate_id, title, content, reply_to)
+    ("turn_start", debate_id, title, reply_to)      a streamed turn begins
+    ("turn_text", debate_id, text)                  text of the turn so far
+    ("turn_end", debate_id, text)                   final text of the turn
+    ("done", debate_id) or ("error", debate_id, message)
+    ("call", debate_id, call)                       a finished LLM call's CallMetrics
+
+Each worker gets 1/N of the rate limits in config/models.json, so N workers together stay
+within the providers' limits, and forwards its LLM call metrics so the bot's metrics endpoint
+and JSON dump cover every worker.
+
+ProcessTransport carries them over multiprocessing queues; LocalTransport runs the workers as
+tasks in the current process, as a stand-in for tests and development.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from core.debate import DebateOrchestrator, StreamingTurn
+from core.llm_service import LLMService
+from core.metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between streamed text updates a worker sends for one turn
+STREAM_UPDATE_INTERVAL = 0.25
+# Seconds between checks for worker processes that died
+WATCHDOG_INTERVAL = 1.0
+
+class WorkerError(Exception):
+    """Raised for a debate that failed in, or was lost with, its worker."""
+
+async def serve_worker(receive: Callable[[], Awaitable[Any]], send: Callable[[Any], None], orchestrator: DebateOrchestrator):
+    """Worker loop: run the debates the bot sends until told to exit."""
+    debates: Dict[str, asyncio.Task] = {}
+    # Report every finished LLM call to the bot's metrics
+    orchestrator.llm_service.metrics.listeners.append(lambda call: send(("call", call.debate_id, call)))
+
+    async def run(debate_id: str, job: Dict[str, Any]):
+        try:
+            debate = await orchestrator.start_debate(
+                input_statement=job["topic"],
+                debators=job["debaters"],
+                debate_format=job.get("format"),
+                pipelined=True,
+                incremental_summary=True,
+                debate_id=debate_id,
+                guild_id=job.get("guild_id")
+            )
+            async for title, content, reply_to in debate.run_rounds(stream=job.get("stream", True)):
+                if isinstance(content, StreamingTurn):
+                    send(("turn_start", debate_id, title, reply_to))
+                    last_update = 0.0
+                    async for text in content:
+                        if time.monotonic() - last_update >= STREAM_UPDATE_INTERVAL:
+                            send(("turn_text", debate_id, text))
+                            last_update = time.monotonic()
+                    send(("turn_end", debate_id, await content.result()))
+                else:
+                    send(("message", debate_id, title, content, reply_to))
+            send(("done", debate_id))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Debate {debate_id} failed: {str(e)}")
+            send(("error", debate_id, str(e)))
+        finally:
+            debates.pop(debate_id, None)
+
+    while True:
+        message = await receive()
+        if message is None:
+            break
+        kind, debate_id = message[0], message[1]
+        if kind == "start":
+            debates[debate_id] = asyncio.create_task(run(debate_id, message[2]))
+        elif kind == "cancel" and debate_id in debates:
+            debates[debate_id].cancel()
+    if debates:
+        await asyncio.gather(*debates.values(), return_exceptions=True)
+
+def worker_orchestrator(admission_share: float = 1.0) -> DebateOrchestrator:
+    """An orchestrator for one of several workers, with its share of the rate limits."""
+    return DebateOrchestrator(LLMService(admission_share=admission_share))
+
+def _worker_main(inbox: multiprocessing.Queue, outbox: multiprocessing.Queue, admission_share: float):
+    """Worker process entry point."""
+    async def main():
+        orchestrator = worker_orchestrator(admission_share)
+        try:
+            await serve_worker(lambda: asyncio.to_thread(inbox.get), outbox.put, orchestrator)
+        finally:
+            if orchestrator.store is not None:
+                await orchestrator.store.close()
+            await orchestrator.llm_service.close()
+
+    asyncio.run(main())
+
+class ProcessTransport:
+    """Worker processes fed through multiprocessing queues: one inbox per worker, one shared outbox."""
+
+    def __init__(self):
+        # Spawned rather than forked: the bot process has a running event loop and gateway threads
+        self.context = multiprocessing.get_context("spawn")
+        self.outbox = self.context.Queue()
+        self.processes: Dict[int, Tuple[Any, multiprocessing.Queue]] = {}
+        self._next_id = 0
+
+    def spawn(self, admission_share: float = 1.0) -> int:
+        worker_id = self._next_id
+        self._next_id += 1
+        inbox = self.context.Queue()
+        process = self.context.Process(target=_worker_main, args=(inbox, self.outbox, admission_share), daemon=True)
+        process.start()
+        self.processes[worker_id] = (process, inbox)
+        return worker_id
+
+    def send(self, worker_id: int, message: Any):
+        self.processes[worker_id][1].put(message)
+
+    async def receive(self) -> Any:
+        return await asyncio.to_thread(self.outbox.get)
+
+    def alive(self, worker_id: int) -> bool:
+        return self.processes[worker_id][0].is_alive()
+
+    def forget(self, worker_id: int):
+        process, _ = self.processes.pop(worker_id)
+        process.join(timeout=0)
+
+    async def close(self):
+        for process, inbox in self.processes.values():
+            inbox.put(None)
+        for process, _ in self.processes.values():
+            await asyncio.to_thread(process.join, 10)
+            if process.is_alive():
+                process.terminate()
+        self.processes.clear()
+        # Unblock the pool's reader
+        self.outbox.put(None)
+
+class LocalTransport:
+    """In-process stand-in for ProcessTransport: each worker is a task with its own orchestrator.
+
+    orchestrator_factory is called with the worker's share of the rate limits.
+    """
+
+    def __init__(self, orchestrator_factory: Callable[[float], DebateOrchestrator] = worker_orchestrator):
+        self.orchestrator_factory = orchestrator_factory
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.workers: Dict[int, Tuple[asyncio.Task, asyncio.Queue]] = {}
+        self._next_id = 0
+
+    def spawn(self, admission_share: float = 1.0) -> int:
+        worker_id = self._next_id
+        self._next_id += 1
+        inbox: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(serve_worker(inbox.get, self.outbox.put_nowait, self.orchestrator_factory(admission_share)))
+        self.workers[worker_id] = (task, inbox)
+        return worker_id
+
+    def send(self, worker_id: int, message: Any):
+        self.workers[worker_id][1].put_nowait(message)
+
+    async def receive(self) -> Any:
+        return await self.outbox.get()
+
+    def alive(self, worker_id: int) -> bool:
+        return not self.workers[worker_id][0].done()
+
+    def forget(self, worker_id: int):
+        self.workers.pop(worker_id)
+
+    def kill(self, worker_id: int):
+        """Stop a worker abruptly, like a crashed process."""
+        self.workers[worker_id][0].cancel()
+
+    async def close(self):
+        for task, inbox in self.workers.values():
+            inbox.put_nowait(None)
+        await asyncio.gather(*(task for task, _ in self.workers.values()), return_exceptions=True)
+        self.workers.clear()
+        self.outbox.put_nowait(None)
+
+class _RemoteDebate:
+    __slots__ = ("worker_id", "events", "turn")
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.events: asyncio.Queue = asyncio.Queue()
+        # Text updates of the turn currently streaming
+        self.turn: Optional[asyncio.Queue] = None
+
+def _remote_turn(updates: asyncio.Queue) -> StreamingTurn:
+    """A StreamingTurn fed by a worker's turn_text and turn_end messages."""
+    final = None
+
+    async def deltas() -> AsyncIterator[str]:
+        nonlocal final
+        shown = ""
+        while True:
+            kind, text = await updates.get()
+            if kind == "end":
+                final = text
+                return
+            # Updates are the text so far; pass on what's new
+            if text.startswith(shown) and len(text) > len(shown):
+                yield text[len(shown):]
+                shown = text
+
+    async def finalize(text: str) -> str:
+        return final if final is not None else text
+
+    return StreamingTurn(deltas(), finalize)
+
+class DebateWorkerPool:
+    """Runs debates in worker processes and streams their messages back to the bot.
+
+    New debates go to the live worker with the fewest running debates. A worker that dies is
+    replaced and its debates fail with WorkerError; restart_workers() replaces every worker
+    without interrupting running debates, which finish on the old workers first.
+
+    Each worker gets 1/workers of the rate limits. While old workers drain after
+    restart_workers(), old and new workers together may briefly use up to twice the limits.
+    LLM calls the workers finish are merged into metrics, if given.
+    """
+
+    def __init__(self, workers: int, transport=None, metrics: Optional[MetricsCollector] = None):
+        self.size = workers
+        self.transport = transport or ProcessTransport()
+        self.metrics = metrics
+        # worker id -> debates running on it
+        self.workers: Dict[int, Set[str]] = {}
+        # Workers finishing their debates before exiting
+        self.draining: Dict[int, Set[str]] = {}
+        self.debates: Dict[str, _RemoteDebate] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        for _ in range(self.size):
+            self.workers[self._spawn()] = set()
+        self._tasks = [asyncio.create_task(self._read()), asyncio.create_task(self._watch())]
+
+    def restart_workers(self):
+        """Replace every worker; old workers exit once their running debates finish."""
+        old = list(self.workers)
+        for worker_id in old:
+            self.draining[worker_id] = self.workers.pop(worker_id)
+            self.workers[self._spawn()] = set()
+            self._retire_if_idle(worker_id)
+        logger.info(f"Restarting {len(old)} debate workers")
+
+    def _spawn(self) -> int:
+        return self.transport.spawn(1.0 / self.size)
+
+    def _retire_if_idle(self, worker_id: int):
+        if worker_id in self.draining and not self.draining[worker_id]:
+            del self.draining[worker_id]
+            if self.transport.alive(worker_id):
+                self.transport.send(worker_id, None)
+            self.transport.forget(worker_id)
+
+    def _running_on(self, worker_id: int) -> Set[str]:
+        return self.workers.get(worker_id, self.draining.get(worker_id, set()))
+
+    async def run_debate(
+        self,
+        topic: str,
+        debaters: List[str],
+        debate_format: Optional[str] = None,
+        stream: bool = True,
+        guild_id: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Any, Optional[str]]]:
+        """Run a debate on a worker, yielding its messages like Debate.run_rounds()."""
+        worker_id = min(self.workers, key=lambda w: len(self.workers[w]))
+        debate_id = uuid.uuid4().hex
+        remote = _RemoteDebate(worker_id)
+        self.debates[debate_id] = remote
+        self.workers[worker_id].add(debate_id)
+        self.transport.send(worker_id, ("start", debate_id, {
+            "topic": topic, "debaters": debaters, "format": debate_format, "stream": stream, "guild_id": guild_id
+        }))
+        finished = False
+        try:
+            while True:
+                event = await remote.events.get()
+                kind = event[0]
+                if kind == "message":
+                    yield event[2], event[3], event[4]
+                elif kind == "turn_start":
+                    yield event[2], event[4], event[3]
+                elif kind == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise WorkerError(event[2])
+        finally:
+            if not finished and self.transport.alive(worker_id):
+                self.transport.send(worker_id, ("cancel", debate_id))
+            self._finish(debate_id)
+
+    def _finish(self, debate_id: str):
+        remote = self.debates.pop(debate_id, None)
+        if remote is None:
+            return
+        self._running_on(remote.worker_id).discard(debate_id)
+        self._retire_if_idle(remote.worker_id)
+
+    def _dispatch(self, message: Tuple):
+        if message[0] == "call":
+            # Metrics of calls from debates the bot gave up on count too
+            if self.metrics is not None:
+                self.metrics.merge(message[2])
+            return
+        remote = self.debates.get(message[1])
+        if remote is None:
+            # A debate the bot already gave up on
+            return
+        kind = message[0]
+        if kind == "turn_start":
+            remote.turn = asyncio.Queue()
+            remote.events.put_nowait((*message, _remote_turn(remote.turn)))
+        elif kind == "turn_text":
+            remote.turn.put_nowait(("text", message[2]))
+        elif kind == "turn_end":
+            remote.turn.put_nowait(("end", message[2]))
+            remote.turn = None
+        else:
+            remote.events.put_nowait(message)
+
+    async def _read(self):
+        while True:
+            message = await self.transport.receive()
+            if message is None:
+                return
+            self._dispatch(message)
+
+    def _fail_worker(self, worker_id: int):
+        for debate_id in list(self._running_on(worker_id)):
+            remote = self.debates.get(debate_id)
+            if remote is None:
+                continue
+            if remote.turn is not None:
+                remote.turn.put_nowait(("end", None))
+            remote.events.put_nowait(("error", debate_id, "The debate worker stopped unexpectedly"))
+
+    async def _watch(self):
+        """Replace workers that died, failing the debates they were running."""
+        while True:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            for worker_id in list(self.workers) + list(self.draining):
+                if self.transport.alive(worker_id):
+                    continue
+                logger.error(f"Debate worker {worker_id} died, replacing it")
+                self._fail_worker(worker_id)
+                if worker_id in self.workers:
+                    del self.workers[worker_id]
+                    self.workers[self._spawn()] = set()
+                else:
+                    del self.draining[worker_id]
+                self.transport.forget(worker_id)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.transport.close()
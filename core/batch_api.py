@@ -0,0 +1,315 @@
+import os
+import abc
+import json
+import time
+import uuid
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Requests per batch submission; both providers accept far more, but smaller batches finish sooner
+DEFAULT_MAX_BATCH_SIZE = 100
+# How long a request waits for others to join its batch before the batch is submitted
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+class BatchRequestError(Exception):
+    """Raised for a request that failed inside a batch or is missing from its results."""
+
+def _namespace(value: Any) -> Any:
+    """Turn parsed JSON into attribute-style objects, like the provider SDK response types."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+def to_batch_line(batch_format: str, custom_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap a completion request as one line of a batch submission."""
+    if batch_format == "anthropic":
+        return {"custom_id": custom_id, "params": request}
+    return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": request}
+
+def parse_result_line(batch_format: str, line: Dict[str, Any]) -> Tuple[str, Optional[str], Any, Optional[str]]:
+    """Read (custom_id, text, usage, error) from one line of batch results."""
+    custom_id = line["custom_id"]
+    if batch_format == "anthropic":
+        result = line.get("result") or {}
+        if result.get("type") != "succeeded":
+            error = result.get("error") or {}
+            return custom_id, None, None, json.dumps(error) if error else result.get("type", "unknown error")
+        message = result["message"]
+        text = "".join(block.get("text", "") for block in message.get("content", []))
+        return custom_id, text, _namespace(message.get("usage")), None
+
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or (response.get("body") or {}).get("error")
+        return custom_id, None, None, json.dumps(error) if error else f"status {response.get('status_code')}"
+    body = response["body"]
+    return custom_id, body["choices"][0]["message"]["content"], _namespace(body.get("usage")), None
+
+class BatchEndpoint(abc.ABC):
+    """A provider batch API: submit many requests at once and fetch the results when they are done."""
+
+    # Line format of submissions and results, "openai" or "anthropic"
+    batch_format = "openai"
+    # Seconds between status checks of a submitted batch
+    poll_interval = 30.0
+
+    @abc.abstractmethod
+    async def submit(self, lines: List[Dict[str, Any]]) -> str:
+        """Submit batch lines and return the batch id."""
+
+    @abc.abstractmethod
+    async def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the result lines once the batch has ended, or None while it is still processing."""
+
+class OpenAIBatchEndpoint(BatchEndpoint):
+    """OpenAI Batch API: a JSONL input file plus a batch job over /v1/chat/completions."""
+
+    batch_format = "openai"
+
+    def __init__(self, client, poll_interval: float = 30.0):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    async def submit(self, lines: List[Dict[str, Any]]) -> str:
+        data = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        batch_file = await self.client.files.create(file=("batch.jsonl", data), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return None
+        lines = []
+        # Successful requests land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                lines.extend(json.loads(line) for line in content.text.splitlines() if line.strip())
+        return lines
+
+class AnthropicBatchEndpoint(BatchEndpoint):
+    """Anthropic Message Batches API."""
+
+    batch_format = "anthropic"
+
+    def __init__(self, client, poll_interval: float = 30.0):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    async def submit(self, lines: List[Dict[str, Any]]) -> str:
+        batch = await self.client.messages.batches.create(requests=lines)
+        return batch.id
+
+    async def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+        results = await self.client.messages.batches.results(batch_id)
+        return [entry.model_dump() async for entry in results]
+
+class FileBatchEndpoint(BatchEndpoint):
+    """Local stand-in for a batch API that keeps batches as files in a directory.
+
+    Each batch is written as <id>.input.jsonl with a <id>.status.json next to it. After
+    processing_delay seconds every request is answered by the responder (the mock provider by
+    default) and the results are written to <id>.output.jsonl in the chosen provider's format.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        responder: Callable[[Dict[str, Any]], Awaitable[Tuple[str, Any]]],
+        batch_format: str = "openai",
+        processing_delay: float = 1.0,
+        poll_interval: float = 0.5
+    ):
+        self.directory = directory
+        self.responder = responder
+        self.batch_format = batch_format
+        self.processing_delay = processing_delay
+        self.poll_interval = poll_interval
+        self._tasks: set = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, batch_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{suffix}")
+
+    def _write_status(self, batch_id: str, status: str, count: int):
+        with open(self._path(batch_id, "status.json"), 'w') as f:
+            json.dump({"id": batch_id, "status": status, "request_count": count, "updated_at": time.time()}, f)
+
+    async def submit(self, lines: List[Dict[str, Any]]) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+        with open(self._path(batch_id, "input.jsonl"), 'w') as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+        self._write_status(batch_id, "in_progress", len(lines))
+        task = asyncio.create_task(self.process(batch_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return batch_id
+
+    async def process(self, batch_id: str):
+        """Answer every request of a submitted batch and write its results."""
+        await asyncio.sleep(self.processing_delay)
+        with open(self._path(batch_id, "input.jsonl"), 'r') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        results = await asyncio.gather(*(self._answer(line) for line in lines))
+        with open(self._path(batch_id, "output.jsonl"), 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        self._write_status(batch_id, "ended", len(lines))
+
+    async def _answer(self, line: Dict[str, Any]) -> Dict[str, Any]:
+        custom_id = line["custom_id"]
+        request = line["params"] if self.batch_format == "anthropic" else line["body"]
+        try:
+            text, usage = await self.responder(request)
+        except Exception as e:
+            if self.batch_format == "anthropic":
+                return {"custom_id": custom_id, "result": {"type": "errored", "error": {"type": "api_error", "message": str(e)}}}
+            status = getattr(e, "status_code", 500)
+            return {
+                "custom_id": custom_id,
+                "response": {"status_code": status, "body": {"error": {"message": str(e)}}},
+                "error": None
+            }
+        usage = vars(usage) if usage is not None else {}
+        if self.batch_format == "anthropic":
+            message = {
+                "type": "message",
+                "role": "assistant",
+                "model": request["model"],
+                "content": [{"type": "text", "text": text}],
+                "usage": {"input_tokens": usage.get("prompt_tokens", 0), "output_tokens": usage.get("completion_tokens", 0)}
+            }
+            return {"custom_id": custom_id, "result": {"type": "succeeded", "message": message}}
+        body = {
+            "object": "chat.completion",
+            "model": request["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+        }
+        return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}, "error": None}
+
+    async def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        with open(self._path(batch_id, "status.json"), 'r') as f:
+            status = json.load(f)["status"]
+        if status != "ended":
+            return None
+        with open(self._path(batch_id, "output.jsonl"), 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+class _Pending:
+    __slots__ = ("custom_id", "request", "future")
+
+    def __init__(self, request: Dict[str, Any]):
+        self.custom_id = uuid.uuid4().hex
+        self.request = request
+        self.future = asyncio.get_running_loop().create_future()
+
+class BatchExecutor:
+    """Collects concurrent completion requests into provider batch submissions.
+
+    Callers await complete() as if it were a normal completion. Requests for the same provider
+    that arrive within flush_interval of each other (e.g. the opening turns of many queued
+    debates, or their final summaries) are submitted together, and each caller is resumed once
+    the batch results come back.
+    """
+
+    def __init__(
+        self,
+        endpoints: Dict[str, BatchEndpoint],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        self.endpoints = endpoints
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[_Pending]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._tasks: set = set()
+        self.stats = {"batches": 0, "requests": 0, "failed_requests": 0, "largest_batch": 0}
+
+    def supports(self, provider: str) -> bool:
+        return provider in self.endpoints
+
+    async def complete(self, provider: str, request: Dict[str, Any]) -> Tuple[str, Any]:
+        """Queue a request for the next batch and return its (text, usage) when the batch ends."""
+        item = _Pending(request)
+        pending = self._pending.setdefault(provider, [])
+        pending.append(item)
+        if len(pending) >= self.max_batch_size:
+            self._flush(provider)
+        elif provider not in self._timers:
+            self._timers[provider] = asyncio.create_task(self._flush_later(provider))
+        return await item.future
+
+    async def _flush_later(self, provider: str):
+        await asyncio.sleep(self.flush_interval)
+        self._timers.pop(provider, None)
+        self._flush(provider)
+
+    def _flush(self, provider: str):
+        timer = self._timers.pop(provider, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        # Skip requests whose callers gave up while waiting for the batch to fill
+        items = [item for item in self._pending.pop(provider, []) if not item.future.done()]
+        if not items:
+            return
+        task = asyncio.create_task(self._run_batch(provider, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, provider: str, items: List[_Pending]):
+        endpoint = self.endpoints[provider]
+        by_id = {item.custom_id: item for item in items}
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(items)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(items))
+        try:
+            batch_id = await endpoint.submit([
+                to_batch_line(endpoint.batch_format, item.custom_id, item.request) for item in items
+            ])
+            logger.info(f"Submitted {provider} batch {batch_id} with {len(items)} requests")
+            while True:
+                await asyncio.sleep(endpoint.poll_interval)
+                lines = await endpoint.poll(batch_id)
+                if lines is not None:
+                    break
+                # Stop polling once every caller has gone away
+                if all(item.future.done() for item in items):
+                    return
+        except Exception as e:
+            logger.error(f"Error running {provider} batch: {str(e)}")
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for line in lines:
+            custom_id, text, usage, error = parse_result_line(endpoint.batch_format, line)
+            item = by_id.pop(custom_id, None)
+            if item is None or item.future.done():
+                continue
+            if error is not None:
+                self.stats["failed_requests"] += 1
+                item.future.set_exception(BatchRequestError(f"Batch request failed: {error}"))
+            else:
+                item.future.set_result((text, usage))
+        for item in by_id.values():
+            if not item.future.done():
+                self.stats["failed_requests"] += 1
+                item.future.set_exception(BatchRequestError(f"Request missing from {provider} batch {batch_id} results"))
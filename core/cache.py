@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+class CachePolicy:
+    """Per-call caching policy for LLM completions."""
+
+    def __init__(self, enabled: bool = True, ttl: Optional[float] = None):
+        self.enabled = enabled
+        self.ttl = ttl
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future whose computing caller was cancelled, so a waiter takes over."""
+
+# Creative calls (personality turns) are never cached unless asked to
+NO_CACHE = CachePolicy(enabled=False)
+# Low-creativity calls whose output is near-deterministic for the same prompt
+MODERATOR_CACHE = CachePolicy(ttl=24 * 3600)
+SUMMARY_CACHE = CachePolicy(ttl=3600)
+
+def _normalize(value: Any) -> Any:
+    """Collapse insignificant whitespace so trivially different prompts share a key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+class CompletionCache:
+    """Two-tier completion cache: an in-memory LRU and an optional on-disk SQLite tier.
+
+    Entries expire after their TTL, and the memory tier evicts least recently used entries once
+    it exceeds max_entries or max_bytes. Concurrent lookups of the same missing key are
+    coalesced so only one upstream call is made.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 4 * 1024 * 1024,
+        default_ttl: float = 3600,
+        sqlite_path: Optional[str] = None,
+        max_disk_entries: int = 100000
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sqlite_path = sqlite_path
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (value, expires_at)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+        if self.sqlite_path:
+            self._init_sqlite()
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: Optional[float], messages: List[Dict[str, Any]], system: Any = None) -> str:
+        """Build a cache key from the normalized provider, model, temperature and messages."""
+        payload = json.dumps(
+            [provider, model, temperature, _normalize(system), _normalize(messages)],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _init_sqlite(self):
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed_at)")
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute("SELECT value, expires_at FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0], row[1]
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        now = time.time()
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            # Drop expired rows, then the least recently used ones beyond the size limit
+            conn.execute("DELETE FROM completions WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM completions WHERE key IN (SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self._memory_remove(key)
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_remove(self, key: str):
+        value, _ = self._memory.pop(key)
+        self._memory_bytes -= len(value)
+
+    def _memory_set(self, key: str, value: str, expires_at: float):
+        if key in self._memory:
+            self._memory_remove(key)
+        self._memory[key] = (value, expires_at)
+        self._memory_bytes += len(value)
+        while self._memory and (len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes):
+            self._memory_remove(next(iter(self._memory)))
+            self.stats["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look a key up in memory, then on disk."""
+        value = self._memory_get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+        if self.sqlite_path:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                self.stats["disk_hits"] += 1
+                # Promote to the memory tier
+                self._memory_set(key, entry[0], entry[1])
+                return entry[0]
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Store a value in both tiers."""
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._memory_set(key, value, expires_at)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]], ttl: Optional[float] = None) -> str:
+        """Return the cached value, or compute it once for all concurrent callers.
+
+        If the caller computing the value is cancelled, its waiters aren't: one of them
+        computes the value instead and the others wait for it.
+        """
+        while True:
+            value = await self.get(key)
+            if value is not None:
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                continue
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            await self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            # Waiters see the same failure; nothing is cached
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
@@ -0,0 +1,159 @@
+import sys
+import copy
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Default prompt budget for the debate history when a model doesn't configure one
+DEFAULT_TOKEN_BUDGET = 2000
+# Share of the budget the rolling summary of older turns may use
+SUMMARY_SHARE = 0.25
+# Maximum characters kept from each compacted turn
+DIGEST_CHARS = 160
+# With prompt caching, the window start moves this many turns at a time, so the history prefix
+# (and the rolling summary before it) stays the same for several requests in a row
+CACHED_WINDOW_STEP = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) that needs no tokenizer."""
+    return max(1, (len(text) + 3) // 4)
+
+class Turn:
+    """One debate turn, rendered once when it is recorded.
+
+    The response is kept only inside the rendered line, and the personality and round names are
+    interned, so a turn costs little more than its text however many debates are running.
+    """
+
+    __slots__ = ("personality", "round_type", "rendered", "offset", "tokens", "digest", "digest_tokens")
+
+    def __init__(self, personality: str, response: str, round_type: Optional[str] = None):
+        self.personality = sys.intern(personality)
+        self.round_type = sys.intern(round_type) if round_type else None
+        round_context = f"[{round_type}] " if round_type else ""
+        prefix = f"{round_context}{personality}: "
+        self.rendered = prefix + response
+        self.offset = len(prefix)
+        self.tokens = estimate_tokens(self.rendered)
+
+        # The digest is what remains of the turn once it is compacted into the rolling summary
+        first_sentence = response.strip().split(". ")[0][:DIGEST_CHARS]
+        self.digest = f"- {round_context}{personality}: {first_sentence}"
+        self.digest_tokens = estimate_tokens(self.digest)
+
+    @property
+    def response(self) -> str:
+        return self.rendered[self.offset:]
+
+class ConversationContext:
+    """Append-only debate transcript of Turn records with running token totals.
+
+    The debate appends each turn once; prompt building, round summaries and the final summary
+    read it through views (snapshot(), since()) that share its storage instead of copying it.
+    Prompts only include the most recent turns that fit the token budget; older turns are
+    compacted into a rolling summary of one-line digests.
+    """
+
+    def __init__(self):
+        self.turns: List[Turn] = []
+        # Running token totals, so total_tokens[n] is the size of the first n turns
+        self.total_tokens: List[int] = [0]
+        self._start = 0
+        self._end: Optional[int] = None
+
+    def __len__(self) -> int:
+        return (len(self.turns) if self._end is None else self._end) - self._start
+
+    def __iter__(self) -> Iterator[Turn]:
+        for index in range(self._start, self._start + len(self)):
+            yield self.turns[index]
+
+    def append(self, personality: str, response: str, round_type: Optional[str] = None) -> str:
+        """Record a turn, rendering it once and caching its token count."""
+        if self._end is not None:
+            raise ValueError("Cannot append to a context snapshot")
+        turn = Turn(personality, response, round_type)
+        self.turns.append(turn)
+        self.total_tokens.append(self.total_tokens[-1] + turn.tokens)
+        return turn.rendered
+
+    def last(self) -> Optional[Turn]:
+        """The most recent turn in view, if any."""
+        return self.turns[self._start + len(self) - 1] if len(self) else None
+
+    def snapshot(self) -> "ConversationContext":
+        """Return a read-only view of the turns appended so far, sharing storage with this context."""
+        return self.since(0)
+
+    def since(self, start: int) -> "ConversationContext":
+        """Return a read-only view of the turns from index start onwards, sharing storage with this context."""
+        view = copy.copy(self)
+        view._start = self._start + start
+        view._end = self._start + len(self)
+        return view
+
+    def rendered(self) -> List[str]:
+        """All rendered turns in view, oldest first."""
+        return [turn.rendered for turn in self]
+
+    def window(self, token_budget: int = DEFAULT_TOKEN_BUDGET, step: int = 1) -> Tuple[str, List[str]]:
+        """Return the rolling summary of older turns and the recent turns that fit the budget.
+
+        The start of the recent turns only moves in multiples of step turns.
+        """
+        first = self._start
+        end = first + len(self)
+        summary_budget = int(token_budget * SUMMARY_SHARE)
+
+        start = first
+        if self.total_tokens[end] - self.total_tokens[first] > token_budget:
+            # Walk back from the newest turn, leaving room for the summary of the rest
+            start = end
+            used = 0
+            while start > first and used + self.turns[start - 1].tokens <= token_budget - summary_budget:
+                used += self.turns[start - 1].tokens
+                start -= 1
+            stepped = first + -(-(start - first) // step) * step
+            if stepped < end:
+                start = stepped
+
+        # Summarize the compacted turns, keeping the most recent digests that fit
+        summary_lines = []
+        summary_used = 0
+        for index in range(start - 1, first - 1, -1):
+            turn = self.turns[index]
+            if summary_used + turn.digest_tokens > summary_budget:
+                break
+            summary_used += turn.digest_tokens
+            summary_lines.append(turn.digest)
+        summary = ""
+        if start > first:
+            omitted = start - first - len(summary_lines)
+            header = f"Earlier in the debate ({start - first} turns"
+            header += f", {omitted} not shown):" if omitted else "):"
+            summary = "\n".join([header] + summary_lines[::-1])
+
+        return summary, [turn.rendered for turn in self.turns[start:end]]
+
+    def messages(self, provider: str, token_budget: int = DEFAULT_TOKEN_BUDGET, blocks: bool = False) -> List[Dict[str, Any]]:
+        """Build the provider-specific history messages trimmed to the token budget.
+
+        With blocks, Anthropic history is sent as one content block per turn, so the turns sent
+        with one request are an unchanged prefix of the next and can be read from the prompt cache.
+        """
+        summary, recent = self.window(token_budget, CACHED_WINDOW_STEP if blocks else 1)
+        lines = ([summary] if summary else []) + recent
+        if not lines:
+            return []
+        if provider == "anthropic":
+            # Anthropic merges consecutive user turns anyway, so send the history as one message
+            if blocks:
+                return [{"role": "user", "content": [{"type": "text", "text": line} for line in lines]}]
+            return [{"role": "user", "content": "\n\n".join(lines)}]
+        return [{"role": "user", "content": line} for line in lines]
+
+    @classmethod
+    def from_history(cls, debate_history: List[Dict[str, str]]) -> "ConversationContext":
+        """Build a context from a list of history dicts."""
+        context = cls()
+        for entry in debate_history:
+            context.append(entry['personality'], entry['response'], entry.get('round_type'))
+        return context
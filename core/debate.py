@@ -1,108 +1,241 @@
+import os
+import time
+import uuid
 import random
+import asyncio
 import logging
-from typing import List, AsyncGenerator, Tuple, Dict
-from models.personality import Personality
+from typing import TYPE_CHECKING, Any, List, AsyncGenerator, AsyncIterator, Awaitable, Callable, Optional, Set, Tuple, Dict, Union
+from models.personality import ModelPreference, Personality
 from core.llm_service import LLMService
+from core.context import ConversationContext
+from core.cache import MODERATOR_CACHE
 from core.personality import PersonalityManager
+from core.planner import DebateBudget, DebatePlan, DebatePlanner
+
+if TYPE_CHECKING:
+    # SQLAlchemy is only imported when a transcript database is configured
+    from core.transcript_store import TranscriptStore
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shown in place of a turn that couldn't be generated, or that the model kept refusing
+UNAVAILABLE_RESPONSE = "I'm having trouble articulating my position at the moment."
+REFUSED_RESPONSE = "I need more time to formulate my thoughts on this matter."
+
 class DebateFormat:
-    def __init__(self, name: str, description: str, structure: List[Dict[str, str]]):
+    def __init__(self, name: str, description: str, structure: List[Dict[str, Any]], independent_stages: Optional[Set[str]] = None):
         self.name = name
         self.description = description
+        # Rounds have a type and description, and may set max_chars to override the turn character budget
         self.structure = structure
+        # Stages whose statements don't depend on the other participants' statements in the same round
+        self.independent_stages = set(independent_stages or ())
+
+    def is_independent(self, round_type: str) -> bool:
+        """Whether all participants can answer this stage concurrently."""
+        return round_type in self.independent_stages
+
+# Standard debate formats, keyed by the name accepted as debate_format
+FORMATS: Dict[str, DebateFormat] = {
+    "classical": DebateFormat(
+        name="Classical Debate",
+        description="A formal debate with opening statements, rebuttals, and closing arguments",
+        structure=[
+            {"type": "opening", "description": "Each participant presents their initial position"},
+            {"type": "rebuttal", "description": "Participants address and counter each other's arguments"},
+            {"type": "closing", "description": "Final statements summarizing key points and positions", "max_chars": 300}
+        ],
+        independent_stages={"opening"}
+    ),
+    "socratic": DebateFormat(
+        name="Socratic Dialogue",
+        description="A question-based debate format focusing on critical examination",
+        structure=[
+            {"type": "question", "description": "Initial question to explore the topic"},
+            {"type": "response", "description": "Direct responses to questions"},
+            {"type": "followup", "description": "Follow-up questions and clarifications"}
+        ]
+    ),
+    "cross_examination": DebateFormat(
+        name="Cross-Examination",
+        description="Direct questioning format with focused exchanges",
+        structure=[
+            {"type": "direct", "description": "Direct questions to other participants"},
+            {"type": "response", "description": "Answers to questions"},
+            {"type": "rebuttal", "description": "Counter-arguments and clarifications"}
+        ]
+    ),
+    "lincoln_douglas": DebateFormat(
+        name="Lincoln-Douglas Debate",
+        description="A value-based debate format focusing on moral and philosophical issues",
+        structure=[
+            {"type": "constructive", "description": "Present core arguments and value framework"},
+            {"type": "crossfire", "description": "Direct questioning and defense of positions"},
+            {"type": "final_focus", "description": "Final appeal to core values and principles", "max_chars": 300}
+        ],
+        independent_stages={"constructive"}
+    ),
+    "policy": DebateFormat(
+        name="Policy Debate",
+        description="A structured debate format focusing on policy proposals and their implications",
+        structure=[
+            {"type": "proposal", "description": "Present policy proposal and its benefits"},
+            {"type": "analysis", "description": "Analyze impacts and potential consequences"},
+            {"type": "evaluation", "description": "Evaluate effectiveness and feasibility"}
+        ],
+        independent_stages={"proposal"}
+    ),
+    "parliamentary": DebateFormat(
+        name="Parliamentary Debate",
+        description="A dynamic debate format with impromptu topics and rapid responses",
+        structure=[
+            {"type": "motion", "description": "Present and defend the motion"},
+            {"type": "opposition", "description": "Challenge and counter the motion"},
+            {"type": "rebuttal", "description": "Final defense and summary"}
+        ],
+        independent_stages={"motion"}
+    )
+}
+
+class StreamingTurn:
+    """A personality turn whose text arrives incrementally from an LLM stream."""
+
+    def __init__(self, deltas: AsyncIterator[str], finalize: Callable[[str], Awaitable[str]]):
+        self.text = ""
+        self._updated = asyncio.Event()
+        self._task = asyncio.create_task(self._consume(deltas, finalize))
+
+    async def _consume(self, deltas: AsyncIterator[str], finalize: Callable[[str], Awaitable[str]]) -> str:
+        try:
+            async for delta in deltas:
+                self.text += delta
+                self._updated.set()
+            self.text = await finalize(self.text)
+            return self.text
+        finally:
+            self._updated.set()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._snapshots()
+
+    async def _snapshots(self) -> AsyncIterator[str]:
+        """Yield the accumulated text whenever it grows, ending with the final text."""
+        while True:
+            await self._updated.wait()
+            self._updated.clear()
+            done = self._task.done()
+            if self.text:
+                yield self.text
+            if done:
+                return
+
+    async def result(self) -> str:
+        """Wait for the stream to finish and return the final text."""
+        return await asyncio.shield(self._task)
+
+    def cancel(self):
+        self._task.cancel()
 
 class Debate:
-    def __init__(self, input_statement: str, personalities: List[Personality], llm_service: LLMService):
+    def __init__(
+        self,
+        input_statement: str,
+        personalities: List[Personality],
+        llm_service: LLMService,
+        pipelined: bool = False,
+        debate_format: Optional[str] = None,
+        incremental_summary: bool = False,
+        debate_id: Optional[str] = None,
+        store: Optional["TranscriptStore"] = None,
+        openings: Optional[Dict[str, str]] = None,
+        budget: Optional[DebateBudget] = None,
+        planner: Optional[DebatePlanner] = None
+    ):
+        self.debate_id = debate_id or uuid.uuid4().hex
         self.input_statement = input_statement
         self.personalities = personalities
         self.llm_service = llm_service
-        self.history = []
+        # Append-only transcript of the personality turns, read by prompt building and the summaries
+        self.context = ConversationContext()
         self.current_round = 0
         self.max_rounds = 3  # Fixed number of rounds for structured debate
         self.active_personalities = personalities.copy()
+        # When pipelined, moderator calls that don't depend on the in-flight turn run as background tasks
+        self.pipelined = pipelined
+        self._pending: Set[asyncio.Task] = set()
+        # When incremental, each finished round is summarized in the background and the final
+        # summary only reduces those round summaries plus the last round's turns
+        self.incremental_summary = incremental_summary
+        self._round_summaries: List[asyncio.Task] = []
+        # Generated messages are persisted to the store; messages already stored by an
+        # interrupted run are replayed from here instead of being generated again
+        self.store = store
+        self.replay: Dict[Tuple[str, Optional[int], str], str] = {}
+        # First-round statements generated once for this topic and format, by personality name
+        self.openings = openings or {}
         
-        # Standard debate formats
-        self.formats = {
-            "classical": DebateFormat(
-                name="Classical Debate",
-                description="A formal debate with opening statements, rebuttals, and closing arguments",
-                structure=[
-                    {"type": "opening", "description": "Each participant presents their initial position"},
-                    {"type": "rebuttal", "description": "Participants address and counter each other's arguments"},
-                    {"type": "closing", "description": "Final statements summarizing key points and positions"}
-                ]
-            ),
-            "socratic": DebateFormat(
-                name="Socratic Dialogue",
-                description="A question-based debate format focusing on critical examination",
-                structure=[
-                    {"type": "question", "description": "Initial question to explore the topic"},
-                    {"type": "response", "description": "Direct responses to questions"},
-                    {"type": "followup", "description": "Follow-up questions and clarifications"}
-                ]
-            ),
-            "cross_examination": DebateFormat(
-                name="Cross-Examination",
-                description="Direct questioning format with focused exchanges",
-                structure=[
-                    {"type": "direct", "description": "Direct questions to other participants"},
-                    {"type": "response", "description": "Answers to questions"},
-                    {"type": "rebuttal", "description": "Counter-arguments and clarifications"}
-                ]
-            ),
-            "lincoln_douglas": DebateFormat(
-                name="Lincoln-Douglas Debate",
-                description="A value-based debate format focusing on moral and philosophical issues",
-                structure=[
-                    {"type": "constructive", "description": "Present core arguments and value framework"},
-                    {"type": "crossfire", "description": "Direct questioning and defense of positions"},
-                    {"type": "final_focus", "description": "Final appeal to core values and principles"}
-                ]
-            ),
-            "policy": DebateFormat(
-                name="Policy Debate",
-                description="A structured debate format focusing on policy proposals and their implications",
-                structure=[
-                    {"type": "proposal", "description": "Present policy proposal and its benefits"},
-                    {"type": "analysis", "description": "Analyze impacts and potential consequences"},
-                    {"type": "evaluation", "description": "Evaluate effectiveness and feasibility"}
-                ]
-            ),
-            "parliamentary": DebateFormat(
-                name="Parliamentary Debate",
-                description="A dynamic debate format with impromptu topics and rapid responses",
-                structure=[
-                    {"type": "motion", "description": "Present and defend the motion"},
-                    {"type": "opposition", "description": "Challenge and counter the motion"},
-                    {"type": "rebuttal", "description": "Final defense and summary"}
-                ]
-            )
-        }
+        self.formats = FORMATS
         
-        # Select a random debate format
-        self.current_format = random.choice(list(self.formats.values()))
+        # Use the requested debate format, or select a random one
+        if debate_format is not None and debate_format not in self.formats:
+            raise ValueError(f"Unknown debate format '{debate_format}'. Available formats: {', '.join(self.formats)}")
+        # With a budget, the planner picks the format, rounds, concurrent stages and model tiers
+        self.budget = budget
+        self.planner = planner if budget is not None else None
+        self.plan = None
+        self.started_at = time.monotonic()
+        if self.planner is not None:
+            candidates = {debate_format: self.formats[debate_format]} if debate_format else self.formats
+            self.plan = self.planner.plan(personalities, budget, candidates, pipelined, incremental_summary)
+            debate_format = self.plan.format_key
+        elif debate_format is None:
+            debate_format = random.choice(list(self.formats))
+        self.format_key = debate_format
+        self.current_format = self.formats[debate_format]
+        if self.plan is not None:
+            self._apply_plan(self.plan)
         logger.info(f"Selected debate format: {self.current_format.name}")
 
-    async def _get_moderator_message(self, round_type: str) -> str:
-        """Generate a moderator message for the current round."""
+    def _apply_plan(self, plan: DebatePlan):
+        """Run the plan's rounds, concurrently if it says so, with its model tiers."""
+        base = self.formats[self.format_key]
+        independent = {stage["type"] for stage in plan.stages} if plan.concurrent else base.independent_stages
+        self.current_format = DebateFormat(base.name, base.description, plan.stages, independent)
+        self.max_rounds = len(plan.stages)
+        self.plan = plan
+
+    def _model(self, personality: Personality) -> Optional[ModelPreference]:
+        """The model the plan picked for a personality's turns, if any."""
+        return self.plan.models.get(personality.name) if self.plan is not None else None
+
+    async def _get_moderator_message(self, round_type: str, round_index: Optional[int] = None, history: Optional[ConversationContext] = None) -> str:
+        """Generate a moderator message for the given round (defaults to the current round).
+
+        Introductions are generated without the debate history so they depend only on the topic,
+        format and round, which makes them cacheable across debates; conclusions pass the history.
+        """
+        if round_index is None:
+            round_index = self.current_round
+        if history is None:
+            history = ConversationContext()
+        budget = self.llm_service.length.budget("moderator")
+
         system_prompt = f"""You are a debate moderator for a {self.current_format.name} debate. Your role is to:
 1. Guide the debate structure according to {self.current_format.name} format
 2. Ensure participants stay on topic
 3. Maintain order and fairness
 4. Provide context for each round
 
-Keep your messages under 100 characters and be direct."""
+Keep your messages under {budget} characters and be direct."""
 
         current_prompt = f"""The debate topic is: {self.input_statement}
 Current round type: {round_type}
 Format: {self.current_format.name}
-Round description: {self.current_format.structure[self.current_round]['description']}
+Round description: {self.current_format.structure[round_index]['description']}
 
-Provide a brief moderator message to introduce this round. Keep it under 100 characters."""
+Provide a brief moderator message to introduce this round. Keep it under {budget} characters."""
 
         try:
             response = await self.llm_service.generate_response(
@@ -112,13 +245,20 @@ Provide a brief moderator message to introduce this round. Keep it under 100 cha
                     system_prompt=system_prompt
                 ),
                 input_statement=current_prompt,
-                debate_history=self.history
+                debate_history=history,
+                cache_policy=MODERATOR_CACHE,
+                debate_id=self.debate_id,
+                max_chars=budget
             )
             return response
         except Exception as e:
             logger.error(f"Error generating moderator message: {str(e)}")
             return f"Round {round_type}: Present your arguments."
 
+    def _turn_budget(self) -> int:
+        """Character budget for turns in the current round: the round's max_chars, else the configured default."""
+        return self.llm_service.length.budget("turn", self.current_format.structure[self.current_round].get("max_chars"))
+
     async def _get_response(self, personality: Personality, round_type: str, retry_count: int = 0) -> str:
         try:
             logger.info(f"Getting response from {personality.name}")
@@ -131,8 +271,11 @@ Round description: {self.current_format.structure[self.current_round]['descripti
             response = await self.llm_service.generate_response(
                 personality=personality,
                 input_statement=self.input_statement,
-                debate_history=self.history,
-                additional_context=round_context
+                debate_history=self.context,
+                additional_context=round_context,
+                debate_id=self.debate_id,
+                max_chars=self._turn_budget(),
+                model=self._model(personality)
             )
             
             logger.info(f"Got response from {personality.name}: {response[:50]}...")
@@ -143,69 +286,315 @@ Round description: {self.current_format.structure[self.current_round]['descripti
                     return await self._get_response(personality, round_type, retry_count + 1)
                 else:
                     logger.error(f"Personality {personality.name} failed to generate response after retries")
-                    return f"I need more time to formulate my thoughts on this matter."
+                    return REFUSED_RESPONSE
             
             return response
         except Exception as e:
             logger.error(f"Error generating response for {personality.name}: {str(e)}")
-            return f"I'm having trouble articulating my position at the moment."
+            return UNAVAILABLE_RESPONSE
+
+    async def opening_statement(self, personality: Personality) -> Optional[str]:
+        """A personality's first-round statement before anyone has spoken, or None if it failed.
+
+        It depends only on the topic, format and personality, so it can be passed as openings to
+        other debates with the same topic and format. A failed statement is None rather than the
+        stand-in text, so it isn't shared.
+        """
+        response = await self._get_response(personality, self.current_format.structure[0]["type"])
+        if response in (UNAVAILABLE_RESPONSE, REFUSED_RESPONSE):
+            return None
+        return response
+
+    def _prepared(self, personality: Personality) -> Optional[str]:
+        """A stored or shared statement to use for this turn instead of generating one."""
+        stored = self.replay.get(("turn", self.current_round, personality.name))
+        if stored is not None:
+            return stored
+        # Shared openings are only valid while the turn can't see anyone else's statement
+        if self.current_round == 0 and (len(self.context) == 0 or self.current_format.is_independent(self.current_format.structure[0]["type"])):
+            return self.openings.get(personality.name)
+        return None
+
+    async def _respond(self, personality: Personality, round_type: str) -> str:
+        """Get a personality's response for the current round, unless it is replayed or shared."""
+        prepared = self._prepared(personality)
+        if prepared is not None:
+            return prepared
+        return await self._get_response(personality, round_type)
+
+    def _stream_response(self, personality: Personality, round_type: str, history: Optional[ConversationContext] = None) -> StreamingTurn:
+        """Start streaming a personality's response for the current round."""
+        stored = self._prepared(personality)
+        if stored is not None:
+            async def replayed() -> AsyncIterator[str]:
+                yield stored
+
+            async def keep(text: str) -> str:
+                return text
+
+            return StreamingTurn(replayed(), keep)
+
+        logger.info(f"Streaming response from {personality.name}")
+        round_context = f"""\nCurrent round: {round_type}
+Format: {self.current_format.name}
+Round description: {self.current_format.structure[self.current_round]['description']}"""
+        budget = self._turn_budget()
+
+        async def deltas() -> AsyncIterator[str]:
+            try:
+                async for delta in self.llm_service.stream_response(
+                    personality=personality,
+                    input_statement=self.input_statement,
+                    debate_history=history if history is not None else self.context,
+                    additional_context=round_context,
+                    debate_id=self.debate_id,
+                    max_chars=budget,
+                    model=self._model(personality)
+                ):
+                    yield delta
+            except Exception as e:
+                logger.error(f"Error streaming response for {personality.name}: {str(e)}")
+
+        async def finalize(text: str) -> str:
+            # A stream stopped at its limit ends mid-sentence; cut it back to the last full one
+            text, _ = self.llm_service.length.enforce(text, budget)
+            if not text.strip():
+                return UNAVAILABLE_RESPONSE
+            if "sorry" in text.lower() and "can't fulfill" in text.lower():
+                # Replace the refusal that was shown while streaming with a single non-streamed retry
+                logger.warning(f"Personality {personality.name} failed to generate response. Retrying...")
+                return await self._get_response(personality, round_type, retry_count=1)
+            return text
+
+        turn = StreamingTurn(deltas(), finalize)
+        self._track(turn._task)
+        return turn
 
-    async def run_rounds(self) -> AsyncGenerator[Tuple[str, str, str], None]:
+    def _schedule_moderator(self, round_type: str, round_index: int, with_history: bool = False, kind: str = "intro") -> Awaitable[str]:
+        """Return an awaitable moderator message, started right away when pipelining."""
+        stored = self.replay.get((kind, round_index, "Moderator"))
+        if stored is not None:
+            return self._done(stored)
+        if not self.pipelined:
+            return self._get_moderator_message(round_type, round_index, history=self.context if with_history else None)
+        return self._track(asyncio.create_task(
+            self._get_moderator_message(round_type, round_index, history=self.context.snapshot() if with_history else None)
+        ))
+
+    def _done(self, text: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(text)
+        return future
+
+    def _record(self, kind: str, round_index: Optional[int], round_type: Optional[str], speaker: str, content: str):
+        """Persist a generated message, unless it was replayed from the store."""
+        if self.store is None or (kind, round_index, speaker) in self.replay:
+            return
+        self.store.record_turn(self.debate_id, kind, round_index, round_type, speaker, content)
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    def _schedule_round_summary(self, round_index: int, start: int):
+        """Summarize the turns of a finished round in the background."""
+        round_type = self.current_format.structure[round_index]["type"]
+        stored = self.replay.get(("round_summary", round_index, "Summary"))
+        if stored is not None:
+            self._round_summaries.append(self._done(stored))
+            return
+        label = f"Round {round_index + 1} ({round_type})"
+        task = self._track(asyncio.create_task(self.llm_service.summarize_round(
+            input_statement=self.input_statement,
+            round_label=label,
+            round_history=self.context.since(start),
+            debate_id=self.debate_id
+        )))
+        task.add_done_callback(
+            lambda t: self._record("round_summary", round_index, round_type, "Summary", t.result())
+            if not t.cancelled() and t.exception() is None else None
+        )
+        self._round_summaries.append(task)
+
+    async def _final_summary(self, last_round_start: int) -> str:
+        """Generate the final summary, reducing the round summaries when running incrementally."""
+        stored = self.replay.get(("summary", None, "Summary"))
+        if stored is not None:
+            return stored
+        if self.incremental_summary and self._round_summaries:
+            round_summaries = await asyncio.gather(*self._round_summaries, return_exceptions=True)
+            if not any(isinstance(summary, BaseException) for summary in round_summaries):
+                return await self.llm_service.generate_summary(
+                    input_statement=self.input_statement,
+                    debate_history=self.context.since(last_round_start),
+                    personalities=self.personalities,
+                    debate_id=self.debate_id,
+                    round_summaries=round_summaries
+                )
+            logger.warning("Round summary failed, summarizing the full debate history instead")
+        return await self.llm_service.generate_summary(
+            input_statement=self.input_statement,
+            debate_history=self.context,
+            personalities=self.personalities,
+            debate_id=self.debate_id
+        )
+
+    def _cancel_pending(self):
+        """Cancel background calls (prefetches and streams) that will not be consumed."""
+        for task in list(self._pending):
+            task.cancel()
+        self._pending.clear()
+
+    async def run_rounds(self, stream: bool = False) -> AsyncGenerator[Tuple[str, Union[str, StreamingTurn], str], None]:
+        """Run the debate, yielding (title, content, reply_to) items in display order.
+
+        With stream=True, personality turns are yielded as StreamingTurn objects as soon as
+        generation starts; iterate them for partial text or await result() for the final text.
+        """
+        # The budget's wall time counts from here
+        self.started_at = time.monotonic()
         # Send debate start message
         yield "DEBATE STARTED", f"Topic: {self.input_statement}\nFormat: {self.current_format.name}", None
 
-        # Get moderator's opening message
-        moderator_message = await self._get_moderator_message("opening")
-        yield "MODERATOR", moderator_message, None
+        final_summary = None
+        round_start = 0
+        try:
+            # Get moderator's opening message (and prefetch the first round intro alongside it)
+            opening_message = self._schedule_moderator("opening", self.current_round, kind="opening")
+            next_intro = None
+            if self.pipelined and self.current_round < self.max_rounds:
+                next_intro = self._schedule_moderator(
+                    self.current_format.structure[self.current_round]["type"], self.current_round
+                )
+            moderator_message = await opening_message
+            self._record("opening", self.current_round, "opening", "Moderator", moderator_message)
+            yield "MODERATOR", moderator_message, None
 
-        while self.current_round < self.max_rounds:
-            round_type = self.current_format.structure[self.current_round]["type"]
-            
-            # Get moderator's round introduction
-            round_intro = await self._get_moderator_message(round_type)
-            yield f"ROUND {self.current_round + 1}", round_intro, None
-            
-            for personality in self.active_personalities:
-                # Get response with retry mechanism
-                response = await self._get_response(personality, round_type)
+            while self.current_round < self.max_rounds:
+                if self.planner is not None and self.current_round > 0:
+                    plan = self.planner.replan(self, self.budget)
+                    if plan is not None:
+                        planned_stage = self.current_format.structure[self.current_round]
+                        self._apply_plan(plan)
+                        if self.current_round >= self.max_rounds:
+                            break
+                        # The prefetched introduction may be for a round that was dropped
+                        if self.current_format.structure[self.current_round] is not planned_stage:
+                            if isinstance(next_intro, asyncio.Task):
+                                next_intro.cancel()
+                            next_intro = None
+                round_type = self.current_format.structure[self.current_round]["type"]
                 
-                # Get the last message to respond to
-                last_message = self.history[-1] if self.history else None
+                # Get moderator's round introduction
+                round_intro = next_intro or self._schedule_moderator(round_type, self.current_round)
+                next_intro = None
+                # The next round's introduction doesn't depend on this round's turns
+                if self.pipelined and self.current_round + 1 < self.max_rounds:
+                    next_intro = self._schedule_moderator(
+                        self.current_format.structure[self.current_round + 1]["type"], self.current_round + 1
+                    )
+                intro = await round_intro
+                self._record("intro", self.current_round, round_type, "Moderator", intro)
+                yield f"ROUND {self.current_round + 1}", intro, None
                 
-                # Store the response in history
-                self.history.append({
-                    'personality': personality.name,
-                    'response': response,
-                    'round_type': round_type
-                })
+                # Independent stages generate every statement at once; they are still committed in speaking order
+                responses = None
+                turns = None
+                if self.current_format.is_independent(round_type):
+                    if stream:
+                        turns = [
+                            self._stream_response(personality, round_type, history=self.context.snapshot())
+                            for personality in self.active_personalities
+                        ]
+                    else:
+                        responses = await asyncio.gather(
+                            *(self._respond(personality, round_type) for personality in self.active_personalities)
+                        )
+
+                round_conclusion = None
+                round_start = len(self.context)
+                last_round = self.current_round == self.max_rounds - 1
+                for index, personality in enumerate(self.active_personalities):
+                    if turns is None and responses is None and index > 0 and self.planner is not None \
+                            and self.planner.out_of_budget(self, self.budget):
+                        # Keep enough of the budget for the conclusion and the final summary
+                        logger.warning(f"Debate {self.debate_id} is out of budget, ending after round {self.current_round + 1}")
+                        self.max_rounds = self.current_round + 1
+                        break
+                    # Get the last message to respond to
+                    last_turn = self.context.last()
+                    reply_to = last_turn.response if last_turn else None
+
+                    if stream:
+                        # Hand the live stream to the caller, then wait for its final text
+                        turn = turns[index] if turns is not None else self._stream_response(personality, round_type)
+                        yield personality.name, turn, reply_to
+                        response = await turn.result()
+                    elif responses is not None:
+                        response = responses[index]
+                    else:
+                        # Get response with retry mechanism
+                        response = await self._respond(personality, round_type)
+                    
+                    # Store the response in the transcript
+                    self.context.append(personality.name, response, round_type)
+                    self._record("turn", self.current_round, round_type, personality.name, response)
+
+                    if index == len(self.active_personalities) - 1:
+                        # Once the last speaker is known, the conclusion can run while this turn is delivered
+                        if self.pipelined:
+                            round_conclusion = self._schedule_moderator(
+                                f"{round_type}_conclusion", self.current_round, with_history=True, kind="conclusion"
+                            )
+                        if self.incremental_summary and not last_round:
+                            self._schedule_round_summary(self.current_round, round_start)
+                        elif self.incremental_summary and self.pipelined:
+                            # Only one short reduce call stands between the last turn and the verdict
+                            final_summary = self._track(asyncio.create_task(self._final_summary(round_start)))
+                    
+                    # Yield the response
+                    if not stream:
+                        yield personality.name, response.strip(), reply_to
                 
-                # Yield the response
-                yield personality.name, response.strip(), last_message['response'] if last_message else None
-            
-            self.current_round += 1
-            
-            # Get moderator's round conclusion
-            round_conclusion = await self._get_moderator_message(f"{round_type}_conclusion")
-            yield "MODERATOR", round_conclusion, None
-        
-        # Generate final summary and determine winner
-        summary = await self.llm_service.generate_summary(
-            input_statement=self.input_statement,
-            debate_history=self.history,
-            personalities=self.personalities
-        )
+                # Get moderator's round conclusion
+                if round_conclusion is None:
+                    round_conclusion = self._schedule_moderator(
+                        f"{round_type}_conclusion", self.current_round, with_history=True, kind="conclusion"
+                    )
+                conclusion = await round_conclusion
+                self._record("conclusion", self.current_round, round_type, "Moderator", conclusion)
+                self.current_round += 1
+                yield "MODERATOR", conclusion, None
+
+            # Generate final summary and determine winner
+            summary = await (final_summary or self._final_summary(round_start))
+            self._record("summary", None, None, "Summary", summary)
+            if self.store is not None:
+                self.store.finish_debate(self.debate_id, summary)
+        finally:
+            self._cancel_pending()
         
         # Send debate end and summary
         yield "DEBATE ENDED", "", None
         yield "FINAL SUMMARY", summary, None
 
 class DebateOrchestrator:
-    def __init__(self):
-        self.llm_service = LLMService()
-        self.personality_manager = PersonalityManager()
+    def __init__(self, llm_service: Optional[LLMService] = None, store: Optional["TranscriptStore"] = None):
+        self.llm_service = llm_service or LLMService()
+        self.personality_manager = PersonalityManager.shared()
+        # Persist transcripts and LLM calls when a database is configured
+        if store is None and os.getenv('TRANSCRIPT_DB_URL'):
+            from core.transcript_store import TranscriptStore
+            store = TranscriptStore(os.getenv('TRANSCRIPT_DB_URL'))
+        self.store = store
+        if store is not None:
+            self.llm_service.metrics.listeners.append(store.record_call)
+        # Fits debates into the wall-time and cost budgets under "budgets" in config/models.json
+        self.planner = DebatePlanner(self.llm_service)
 
-    async def start_debate(self, input_statement: str, debators: List[str]) -> Debate:
-        # Load personalities for the specified debators
+    async def load_personalities(self, debators: List[str]) -> List[Personality]:
+        """Look up personalities by name, raising ValueError for unknown names."""
         personalities = []
         for debator_name in debators:
             personality = await self.personality_manager.get_personality(debator_name)
@@ -216,5 +605,59 @@ class DebateOrchestrator:
         
         if not personalities:
             raise ValueError("No valid personalities found for the debate")
-        
-        return Debate(input_statement, personalities, self.llm_service) 
\ No newline at end of file
+        return personalities
+
+    async def start_debate(
+        self,
+        input_statement: str,
+        debators: List[str],
+        pipelined: bool = False,
+        debate_format: Optional[str] = None,
+        incremental_summary: bool = False,
+        debate_id: Optional[str] = None,
+        openings: Optional[Dict[str, str]] = None,
+        guild_id: Optional[int] = None,
+        budget: Optional[DebateBudget] = None
+    ) -> Debate:
+        """Start a debate, planned to fit budget or else the guild's configured budget, if any."""
+        # Load personalities for the specified debators
+        personalities = await self.load_personalities(debators)
+        if budget is None:
+            budget = self.planner.budget_for(guild_id)
+        debate = Debate(
+            input_statement,
+            personalities,
+            self.llm_service,
+            pipelined=pipelined,
+            debate_format=debate_format,
+            incremental_summary=incremental_summary,
+            debate_id=debate_id,
+            store=self.store,
+            openings=openings,
+            budget=budget,
+            planner=self.planner
+        )
+        if self.store is not None:
+            self.store.record_debate(debate.debate_id, input_statement, debate.format_key, [p.name for p in personalities])
+        return debate
+
+    async def resume_debate(self, debate_id: str, pipelined: bool = False, incremental_summary: bool = False) -> Debate:
+        """Rebuild a stored debate; messages it already generated are replayed instead of regenerated."""
+        if self.store is None:
+            raise ValueError("Resuming a debate needs a transcript store (set TRANSCRIPT_DB_URL)")
+        record = await self.store.load_debate(debate_id)
+        if record is None:
+            raise ValueError(f"Debate '{debate_id}' not found")
+        debate = Debate(
+            record["topic"],
+            await self.load_personalities(record["personalities"]),
+            self.llm_service,
+            pipelined=pipelined,
+            debate_format=record["debate_format"],
+            incremental_summary=incremental_summary,
+            debate_id=debate_id,
+            store=self.store
+        )
+        for turn in await self.store.load_turns(debate_id):
+            debate.replay[(turn["kind"], turn["round_index"], turn["speaker"])] = turn["content"]
+        return debate
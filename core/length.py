@@ -0,0 +1,112 @@
+import math
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from models.personality import ModelPreference
+
+# Matches estimate_tokens in core/context.py
+CHARS_PER_TOKEN = 4
+# Discord message length limit, slightly lower than 2000 for safety
+DISCORD_LIMIT = 1900
+# Character budgets per kind of message, and how far past its budget a reply may run before it
+# is cut; override under "length" in config/models.json
+DEFAULT_LENGTH_SETTINGS = {
+    "turn_chars": 200,
+    "moderator_chars": 100,
+    "round_summary_chars": 300,
+    "summary_chars": 200,
+    "overrun": 2.0,
+    "min_tokens": 32
+}
+# A cut at a sentence boundary must keep at least this share of the limit; otherwise it cuts at a word
+MIN_SENTENCE_KEEP = 0.4
+
+# End of a sentence: terminal punctuation, optional closing quotes or brackets, then whitespace or the end
+_SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*(?=\s|$)")
+
+def last_sentence_end(text: str) -> int:
+    """Index just past the last complete sentence in text, or 0 if there is none."""
+    end = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+    return end
+
+def cut_at_sentence(text: str, limit: int) -> str:
+    """Shorten text to at most limit characters, ending on a sentence boundary where possible."""
+    if len(text) <= limit:
+        return text
+    window = text[:limit]
+    end = last_sentence_end(window)
+    if end >= limit * MIN_SENTENCE_KEEP:
+        return window[:end]
+    # No usable sentence boundary: cut at the last word that fits, leaving room for the ellipsis
+    space = window.rfind(" ", 0, limit - 3)
+    return (window[:space] if space > 0 else window[:limit - 3]).rstrip() + "..."
+
+class StreamLimiter:
+    """Passes streamed text through as it arrives and stops the stream once it runs past its limit.
+
+    feed() returns the text that may be shown now and whether the limit was reached, in which
+    case the rest of the generation should be cancelled. A stopped stream has been shown one
+    character past its limit, so LengthPolicy.enforce() cuts the final text back to its last
+    full sentence.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.length = 0
+        self.truncated = False
+
+    def feed(self, delta: str) -> Tuple[str, bool]:
+        if self.length + len(delta) <= self.limit:
+            self.length += len(delta)
+            return delta, False
+        self.truncated = True
+        out = delta[:self.limit + 1 - self.length]
+        self.length += len(out)
+        return out, True
+
+class LengthPolicy:
+    """Turns a character budget into a request's max_tokens and a hard limit on the reply.
+
+    The budget is what the prompt asks for; models overshoot it, so replies are only cut past
+    budget * overrun (and never past the Discord limit). max_tokens is sized to that limit and
+    capped by the personality's and the model's own max_tokens, so generation stops about where
+    the reply would be cut instead of producing tokens that are thrown away.
+    """
+
+    def __init__(self, model_configs: Dict[str, Any]):
+        self.model_configs = model_configs
+        self.settings = {**DEFAULT_LENGTH_SETTINGS, **model_configs.get("length", {})}
+
+    def budget(self, kind: str, chars: Optional[int] = None) -> int:
+        """Character budget for a turn, moderator, round_summary or summary message."""
+        return chars or self.settings[f"{kind}_chars"]
+
+    def limit(self, budget: int) -> int:
+        """Hard character limit for a reply with the given budget."""
+        return min(DISCORD_LIMIT, int(budget * self.settings["overrun"]))
+
+    def max_tokens(self, model_config: ModelPreference, budget: int) -> int:
+        tokens = max(self.settings["min_tokens"], math.ceil(self.limit(budget) / CHARS_PER_TOKEN))
+        provider_config = self.model_configs.get(model_config.provider, {})
+        for cap in (model_config.max_tokens, provider_config.get(model_config.model_name, {}).get("max_tokens")):
+            if cap:
+                tokens = min(tokens, cap)
+        return tokens
+
+    def enforce(self, text: str, budget: int, stopped_at_max_tokens: bool = False) -> Tuple[str, bool]:
+        """Cut a reply to its limit at a sentence boundary; returns (text, truncated).
+
+        A reply the provider stopped at max_tokens ends mid-sentence, so it is cut back to its
+        last full sentence even when it is within the limit.
+        """
+        limit = self.limit(budget)
+        if stopped_at_max_tokens and len(text) <= limit:
+            end = last_sentence_end(text)
+            if end >= len(text) * MIN_SENTENCE_KEEP:
+                return text[:end], True
+            return text, True
+        if len(text) > limit:
+            return cut_at_sentence(text, limit), True
+        return text, False
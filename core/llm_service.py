@@ -1,21 +1,66 @@
 import os
+import re
 import json
-from typing import List, Dict, Any
-import openai
-from anthropic import AsyncAnthropic
+import time
+import asyncio
+import importlib.util
+from typing import List, Dict, Any, AsyncGenerator, Awaitable, Callable, Optional, Tuple, Union
 from models.personality import Personality, ModelPreference
+from core.context import ConversationContext, DEFAULT_TOKEN_BUDGET, estimate_tokens
+from core.cache import CompletionCache, CachePolicy, SUMMARY_CACHE
+from core.rate_limit import AdmissionController
+from core.stats import RollingStats
+from core.mock_provider import MockLLMClient
+from core.metrics import CallMetrics, MetricsCollector
+from core.routing import ModelRouter
+from core.length import LengthPolicy, StreamLimiter
+from core.batch_api import AnthropicBatchEndpoint, BatchExecutor, FileBatchEndpoint, OpenAIBatchEndpoint
+
+# Per-attempt timeout for models that don't configure timeout_seconds
+DEFAULT_TIMEOUT = 30.0
+# Hedge delay until a model has enough latency samples for a p90
+DEFAULT_HEDGE_DELAY = 8.0
+HEDGE_MIN_SAMPLES = 20
+# Connection pool shared by the provider clients; override under "http" in config/models.json
+DEFAULT_HTTP_SETTINGS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 40,
+    "keepalive_expiry": 60.0,
+    "timeout_seconds": 120.0,
+    "connect_timeout_seconds": 5.0,
+    "http2": True
+}
+# The final summary names the winner on a line of its own, e.g. "Winner: Socrates" or "Winner: Draw".
+# The model writes it first, so a reply stopped at max_tokens still has it; it is shown last.
+VERDICT_PREFIX = "Winner:"
+# A verdict line, allowing the markdown emphasis models like to add: "**Winner:** Socrates"
+_VERDICT_LINE = re.compile(r"^[ \t>#*_]*winner[ \t*_]*:[ \t*_]*(.*?)[ \t*_]*$", re.IGNORECASE | re.MULTILINE)
+
+def split_verdict(summary: str) -> Tuple[str, Optional[str]]:
+    """Split a final summary into its text and the value of its last verdict line, if it has one."""
+    matches = list(_VERDICT_LINE.finditer(summary))
+    if not matches or not matches[-1].group(1):
+        return summary, None
+    last = matches[-1]
+    return (summary[:last.start()] + summary[last.end():]).strip(), last.group(1)
 
 class LLMService:
-    def __init__(self):
-        # Initialize OpenAI client for OpenAI
-        self.openai_client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        # Initialize OpenAI client for Grok
-        self.grok_client = openai.AsyncOpenAI(
-            api_key=os.getenv('GROK_API_KEY'),
-            base_url="https://api.x.ai/v1"
-        )
-        # Initialize Anthropic client
-        self.anthropic_client = AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+    def __init__(
+        self,
+        prompt_caching: Optional[bool] = None,
+        response_cache: Optional[CompletionCache] = None,
+        hedging: Optional[bool] = None,
+        model_override: Optional[ModelPreference] = None,
+        batch: Optional[BatchExecutor] = None,
+        routing_objective: Optional[str] = None,
+        admission_share: float = 1.0
+    ):
+        # Provider clients and their connection pool are created on first use, so providers that
+        # no personality uses cost nothing at startup
+        self._http = None
+        self._openai_client = None
+        self._grok_client = None
+        self._anthropic_client = None
         
         # Load model configurations
         self.model_configs = self._load_model_configs()
@@ -28,8 +73,130 @@ class LLMService:
             max_tokens=300
         )
         
-        # Discord message length limit
-        self.discord_limit = 1900  # Setting slightly lower than 2000 for safety
+        # Route every call to one model, e.g. the offline "mock" provider for benchmarks
+        if model_override is None and os.getenv('MODEL_OVERRIDE'):
+            provider, _, model_name = os.getenv('MODEL_OVERRIDE').partition('/')
+            model_override = ModelPreference(provider=provider, model_name=model_name)
+        self.model_override = model_override
+        if model_override is not None:
+            self.default_model = model_override
+        # Offline stand-in provider configured under "mock" in config/models.json
+        self.mock_client = MockLLMClient(self.model_configs.get("mock", {}))
+        
+        # Character budgets per message kind, the max_tokens derived from them and sentence-boundary cuts
+        self.length = LengthPolicy(self.model_configs)
+
+        # Opt-in provider prompt caching of the stable system prompt and history prefix
+        if prompt_caching is None:
+            prompt_caching = os.getenv('PROMPT_CACHING', '').lower() in ('1', 'true', 'yes')
+        self.prompt_caching = prompt_caching
+        # Input token usage per provider, split into cache reads, cache writes and uncached tokens
+        self.prompt_cache_stats: Dict[str, Dict[str, int]] = {}
+
+        # Per-provider and per-model concurrency and rate limits from config/models.json; a
+        # debate worker process gets its share of them
+        self.admission = AdmissionController(self.model_configs, admission_share)
+        # Latency, token, cost and cache metrics per model, personality and debate
+        self.metrics = MetricsCollector(self.model_configs)
+        # How many times a request rejected with 429 is retried after its Retry-After delay
+        self.rate_limit_retries = 2
+
+        # Local completion cache for calls whose cache policy allows it (moderator, summary)
+        if response_cache is None:
+            response_cache = CompletionCache(sqlite_path=os.getenv('RESPONSE_CACHE_PATH'))
+        self.response_cache = response_cache
+        # Queue waits, response cache and prompt cache counters are exported with the call metrics
+        self.metrics.add_source("admission", self.admission.metrics, label="limiter")
+        self.metrics.add_source("response_cache", lambda: self.response_cache.stats)
+        self.metrics.add_source("prompt_cache", lambda: self.prompt_cache_stats, label="provider")
+
+        # Rolling latency and error statistics per (provider, model)
+        self.model_stats: Dict[Tuple[str, str], RollingStats] = {}
+        # Orders each personality's acceptable models by the routing objective, with circuit breakers
+        self.router = ModelRouter(self.model_configs, self._get_stats, routing_objective or os.getenv('ROUTING_OBJECTIVE'))
+        # Opt-in hedging: fire the next model when the current one is slower than its p90
+        if hedging is None:
+            hedging = os.getenv('HEDGED_REQUESTS', '').lower() in ('1', 'true', 'yes')
+        self.hedging = hedging
+
+        # Opt-in batch API mode for offline runs: non-streaming completions are collected into
+        # provider batch submissions, which cost less but can take minutes to hours to return
+        if batch is None and os.getenv('BATCH_MODE', '').lower() in ('1', 'true', 'yes'):
+            batch = self._build_batch_executor(os.getenv('BATCH_ENDPOINT_DIR'))
+        self.batch = batch
+
+    def _http_client(self):
+        """Keep-alive connection pool shared by all provider clients, using HTTP/2 when h2 is installed."""
+        if self._http is None:
+            import httpx
+            settings = {**DEFAULT_HTTP_SETTINGS, **self.model_configs.get("http", {})}
+            self._http = httpx.AsyncClient(
+                http2=bool(settings["http2"]) and importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(
+                    max_connections=settings["max_connections"],
+                    max_keepalive_connections=settings["max_keepalive_connections"],
+                    keepalive_expiry=settings["keepalive_expiry"]
+                ),
+                timeout=httpx.Timeout(settings["timeout_seconds"], connect=settings["connect_timeout_seconds"]),
+                follow_redirects=True
+            )
+        return self._http
+
+    @property
+    def openai_client(self):
+        if self._openai_client is None:
+            import openai
+            self._openai_client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=self._http_client())
+        return self._openai_client
+
+    @property
+    def grok_client(self):
+        if self._grok_client is None:
+            import openai
+            # Grok uses the OpenAI client with the Grok endpoint
+            self._grok_client = openai.AsyncOpenAI(
+                api_key=os.getenv('GROK_API_KEY'),
+                base_url="https://api.x.ai/v1",
+                http_client=self._http_client()
+            )
+        return self._grok_client
+
+    @property
+    def anthropic_client(self):
+        if self._anthropic_client is None:
+            from anthropic import AsyncAnthropic
+            self._anthropic_client = AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), http_client=self._http_client())
+        return self._anthropic_client
+
+    async def close(self):
+        """Close the provider connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._openai_client = self._grok_client = self._anthropic_client = None
+
+    def _build_batch_executor(self, stand_in_dir: Optional[str] = None) -> BatchExecutor:
+        """Create a batch executor for the providers with a batch API.
+
+        With stand_in_dir set, every provider uses the local file-backed stand-in, answered by the
+        mock provider, instead of the real batch endpoints.
+        """
+        if stand_in_dir:
+            return BatchExecutor({
+                provider: FileBatchEndpoint(
+                    os.path.join(stand_in_dir, provider),
+                    self.mock_client.complete,
+                    batch_format="anthropic" if provider == "anthropic" else "openai"
+                )
+                for provider in ("openai", "anthropic", "mock")
+            })
+        return BatchExecutor({
+            "openai": OpenAIBatchEndpoint(self.openai_client),
+            "anthropic": AnthropicBatchEndpoint(self.anthropic_client)
+        })
+
+    def _batched(self, model_config: ModelPreference) -> bool:
+        return self.batch is not None and self.batch.supports(model_config.provider)
 
     def _load_model_configs(self) -> Dict:
         """Load model configurations from config file."""
@@ -40,43 +207,95 @@ class LLMService:
             print(f"Error loading model configs: {str(e)}")
             return {}
 
+    def _get_model_chain(self, personality: Personality, first: Optional[ModelPreference] = None) -> List[ModelPreference]:
+        """Get every configured model a personality accepts, in routing order, ending with the default.
+
+        first, e.g. a model tier picked by the debate planner, is tried before the others.
+        """
+        if self.model_override is not None:
+            return [self.model_override]
+        if first is not None:
+            return [first] + [
+                m for m in self._get_model_chain(personality)
+                if (m.provider, m.model_name) != (first.provider, first.model_name)
+            ]
+        chain = []
+        for pref in personality.model_preferences or []:
+            provider_config = self.model_configs.get(pref.provider, {})
+            if pref.model_name in provider_config and not any(
+                (c.provider, c.model_name) == (pref.provider, pref.model_name) for c in chain
+            ):
+                chain.append(pref)
+        if any((c.provider, c.model_name) == (self.default_model.provider, self.default_model.model_name) for c in chain):
+            return self.router.order(chain)
+        return self.router.order(chain, fallback=self.default_model)
+
+    def models_for(self, personality: Personality) -> List[ModelPreference]:
+        """The models a personality's turns may be answered by, in the order they are tried."""
+        return self._get_model_chain(personality)
+
     def _get_model_config(self, personality: Personality) -> ModelPreference:
         """Get the appropriate model configuration for a personality."""
-        if personality.model_preferences:
-            # Try each preferred model in order
-            for pref in personality.model_preferences:
-                provider_config = self.model_configs.get(pref.provider, {})
-                if pref.model_name in provider_config:
-                    return pref
-        return self.default_model
-
-    def _truncate_response(self, response: str) -> str:
-        """Truncate response to fit within Discord's character limit."""
-        if len(response) > self.discord_limit:
-            # Find the last complete sentence before the limit
-            truncated = response[:self.discord_limit]
-            last_period = truncated.rfind('.')
-            if last_period > 0:
-                return truncated[:last_period + 1]
-            return truncated + "..."
-        return response
+        return self._get_model_chain(personality)[0]
 
-    async def generate_response(
+    def _get_model_setting(self, model_config: ModelPreference, key: str, default: Any) -> Any:
+        """Read a per-model setting from config/models.json."""
+        provider_config = self.model_configs.get(model_config.provider, {})
+        return provider_config.get(model_config.model_name, {}).get(key, default)
+
+    def _get_token_budget(self, model_config: ModelPreference) -> int:
+        """Get the history token budget configured for a model."""
+        return self._get_model_setting(model_config, "context_token_budget", DEFAULT_TOKEN_BUDGET)
+
+    def _get_stats(self, model_config: ModelPreference) -> RollingStats:
+        key = (model_config.provider, model_config.model_name)
+        if key not in self.model_stats:
+            self.model_stats[key] = RollingStats()
+        return self.model_stats[key]
+
+    def _record_outcome(self, model_config: ModelPreference, latency: Optional[float], ok: bool = True):
+        """Record a model attempt in its rolling stats and circuit breaker."""
+        self._get_stats(model_config).record(latency, ok=ok)
+        self.router.record(model_config, ok)
+
+    def _record_timing(self, call: Optional[CallMetrics], queued: float, sent: Optional[float]) -> Optional[float]:
+        """Add a request's admission wait and provider time to its call; returns the provider time."""
+        now = time.monotonic()
+        admitted = sent if sent is not None else now
+        provider_latency = now - sent if sent is not None else None
+        if call is not None:
+            call.queue_wait += admitted - queued
+            call.provider_latency += provider_latency or 0.0
+        return provider_latency
+
+    def _as_context(self, debate_history: Union[ConversationContext, List[Dict[str, str]]]) -> ConversationContext:
+        """Accept either a debate's ConversationContext or a plain list of history dicts."""
+        if isinstance(debate_history, ConversationContext):
+            return debate_history
+        return ConversationContext.from_history(debate_history)
+
+    def _enforce_length(self, response: str, budget: int, call: CallMetrics) -> str:
+        """Cut a reply to its budget's limit at a sentence boundary, counting truncations per model."""
+        text, call.truncated = self.length.enforce(response, budget, call.truncated)
+        return text
+
+    def _build_prompts(
         self,
+        model_config: ModelPreference,
         personality: Personality,
         input_statement: str,
-        debate_history: List[Dict[str, str]],
-        additional_context: str = ""
-    ) -> str:
-        # Get model configuration
-        model_config = self._get_model_config(personality)
-        
+        debate_history: Union[ConversationContext, List[Dict[str, str]]],
+        additional_context: str = "",
+        budget: Optional[int] = None
+    ) -> Tuple[str, List[Dict[str, str]], str]:
+        """Build the system prompt, history messages and current prompt for a personality."""
         # Get the system prompt
         system_prompt = personality.get_full_system_prompt()
+        budget = budget or self.length.budget("turn")
         
         # Add length limit instruction to system prompt
         system_prompt += f"""\n\nIMPORTANT: 
-1. Keep your response under 200 characters
+1. Keep your response under {budget} characters
 2. Focus on ONE key point or argument
 3. Be direct and concise
 4. Use clear, simple language
@@ -85,16 +304,10 @@ class LLMService:
 
 {additional_context}"""
         
-        # Construct the conversation history
-        messages = []
-        
-        # Add debate history with round context
-        for entry in debate_history:
-            round_context = f"[{entry.get('round_type', 'general')}] " if 'round_type' in entry else ""
-            messages.append({
-                "role": "user",
-                "content": f"{round_context}{entry['personality']}: {entry['response']}"
-            })
+        # Pre-rendered debate history, trimmed to the model's token budget
+        messages = self._as_context(debate_history).messages(
+            model_config.provider, self._get_token_budget(model_config), blocks=self.prompt_caching
+        )
         
         # Add the current prompt with context
         current_prompt = f"""This is a philosophical debate about: {input_statement}
@@ -102,86 +315,578 @@ class LLMService:
 As {personality.name}, provide a focused response that:
 1. Addresses ONE key point relevant to the current round
 2. Uses clear, concise language
-3. Stays under 200 characters
+3. Stays under {budget} characters
 4. Maintains your philosophical perspective
 
 Remember: This is a philosophical debate for educational purposes. All content is hypothetical and for intellectual discussion only."""
 
-        try:
-            if model_config.provider == "openai":
-                # OpenAI format
+        return system_prompt, messages, current_prompt
+
+    def _get_client(self, provider: str):
+        """Get the async client for an OpenAI-compatible provider."""
+        if provider == "openai":
+            return self.openai_client
+        if provider == "grok":
+            # Grok uses the OpenAI client with the Grok endpoint
+            return self.grok_client
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def _build_request(
+        self,
+        model_config: ModelPreference,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        current_prompt: str,
+        budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Build the provider-specific request arguments, with max_tokens sized to the reply's character budget."""
+        max_tokens = self.length.max_tokens(model_config, budget or self.length.budget("turn"))
+        if model_config.provider == "anthropic":
+            # Anthropic format
+            system: Union[str, List[Dict[str, Any]]] = system_prompt
+            anthropic_messages = []
+            if messages:
+                anthropic_messages.extend(messages)
+            if self.prompt_caching:
+                # Cache breakpoints after the stable system prompt and after the newest history turn:
+                # the next request sends the same turn blocks followed by new ones, so it reads them
+                # from the cache until the rolling summary moves the start of the window
+                system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+                if anthropic_messages:
+                    last = anthropic_messages[-1]
+                    content = last["content"]
+                    if isinstance(content, str):
+                        content = [{"type": "text", "text": content}]
+                    anthropic_messages[-1] = {
+                        "role": last["role"],
+                        "content": content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+                    }
+            anthropic_messages.append({"role": "user", "content": current_prompt})
+            return {
+                "model": model_config.model_name,
+                "system": system,
+                "messages": anthropic_messages,
+                "max_tokens": max_tokens,
+                "temperature": model_config.temperature
+            }
+        if model_config.provider in ("openai", "grok", "mock"):
+            # OpenAI format (also used by Grok and the mock provider)
+            if self.prompt_caching:
+                # Automatic prefix caching needs the static prefix first, so the current prompt goes last
+                openai_messages = [{"role": "system", "content": system_prompt}]
+                openai_messages.extend(messages)
+                openai_messages.append({"role": "user", "content": current_prompt})
+            else:
                 openai_messages = [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": current_prompt}
                 ]
                 if messages:
                     openai_messages.extend(messages)
-                
-                response = await self.openai_client.chat.completions.create(
-                    model=model_config.model_name,
-                    messages=openai_messages,
-                    temperature=model_config.temperature,
-                    max_tokens=150  # Reduced max tokens for shorter responses
-                )
-                return self._truncate_response(response.choices[0].message.content)
-                
-            elif model_config.provider == "anthropic":
-                # Anthropic format
-                anthropic_messages = []
-                if messages:
-                    anthropic_messages.extend(messages)
-                anthropic_messages.append({"role": "user", "content": current_prompt})
-                
-                response = await self.anthropic_client.messages.create(
-                    model=model_config.model_name,
-                    system=system_prompt,
-                    messages=anthropic_messages,
-                    max_tokens=150,  # Reduced max tokens for shorter responses
-                    temperature=model_config.temperature
-                )
-                return self._truncate_response(response.content[0].text)
+            return {
+                "model": model_config.model_name,
+                "messages": openai_messages,
+                "temperature": model_config.temperature,
+                "max_tokens": max_tokens
+            }
+        raise ValueError(f"Unknown provider: {model_config.provider}")
 
-            elif model_config.provider == "grok":
-                # Grok format (using OpenAI client with Grok endpoint)
-                grok_messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": current_prompt}
-                ]
-                if messages:
-                    grok_messages.extend(messages)
-                
-                response = await self.grok_client.chat.completions.create(
-                    model=model_config.model_name,
-                    messages=grok_messages,
-                    temperature=model_config.temperature,
-                    max_tokens=150  # Reduced max tokens for shorter responses
-                )
-                return self._truncate_response(response.choices[0].message.content)
-            else:
-                raise ValueError(f"Unknown provider: {model_config.provider}")
-                
-        except Exception as e:
-            # If the preferred model fails, try the default model
-            if model_config != self.default_model:
-                print(f"Error with preferred model, falling back to default: {str(e)}")
-                return await self.generate_response(
-                    personality=personality,
-                    input_statement=input_statement,
-                    debate_history=debate_history,
-                    additional_context=additional_context
-                )
-            raise Exception(f"LLM service failed: {str(e)}")
+    def _record_usage(self, model_config: ModelPreference, usage: Any, call: Optional[CallMetrics] = None):
+        """Record token usage and prompt cache hits and misses from a provider usage object."""
+        if usage is None:
+            return
+        provider = model_config.provider
+        stats = self.prompt_cache_stats.setdefault(
+            provider, {"requests": 0, "cache_read_tokens": 0, "cache_write_tokens": 0, "uncached_tokens": 0}
+        )
+        stats["requests"] += 1
+        if provider == "anthropic":
+            # Anthropic reports cached reads and writes separately from the uncached input tokens
+            cached = getattr(usage, "cache_read_input_tokens", None) or 0
+            written = getattr(usage, "cache_creation_input_tokens", None) or 0
+            uncached = getattr(usage, "input_tokens", None) or 0
+            stats["cache_read_tokens"] += cached
+            stats["cache_write_tokens"] += written
+            stats["uncached_tokens"] += uncached
+            prompt_tokens = cached + written + uncached
+            completion_tokens = getattr(usage, "output_tokens", None) or 0
+        else:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+            prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+            stats["cache_read_tokens"] += cached
+            stats["uncached_tokens"] += prompt_tokens - cached
+            completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        self.metrics.record_usage(call, provider, model_config.model_name, prompt_tokens, completion_tokens, cached)
+
+    def _estimate_request_tokens(self, request: Dict[str, Any]) -> int:
+        """Estimate the tokens a request counts against tokens-per-minute limits."""
+        tokens = estimate_tokens(str(request.get("system", "")))
+        for message in request["messages"]:
+            tokens += estimate_tokens(str(message["content"]))
+        return tokens + request.get("max_tokens", 0)
+
+    async def _send(self, model_config: ModelPreference, request: Dict[str, Any], call: Optional[CallMetrics] = None) -> str:
+        """Send a single non-streaming completion request to the provider."""
+        if model_config.provider == "mock":
+            text, usage = await self.mock_client.complete(request)
+            self._record_usage(model_config, usage, call)
+            return text
+        if model_config.provider == "anthropic":
+            response = await self.anthropic_client.messages.create(**request)
+            self._record_usage(model_config, response.usage, call)
+            if call is not None and response.stop_reason == "max_tokens":
+                call.truncated = True
+            return response.content[0].text
+        response = await self._get_client(model_config.provider).chat.completions.create(**request)
+        self._record_usage(model_config, response.usage, call)
+        if call is not None and response.choices[0].finish_reason == "length":
+            call.truncated = True
+        return response.choices[0].message.content
+
+    async def _complete(
+        self,
+        model_config: ModelPreference,
+        request: Dict[str, Any],
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Run a completion once admitted by the rate limiter, honouring Retry-After on 429s.
+
+        timeout applies to each provider request, not to the time spent waiting for admission.
+        The model's stats and circuit breaker record the outcome, timing only the provider
+        request: admission and Retry-After waits say nothing about how fast the model is.
+        """
+        if self._batched(model_config):
+            # Batch APIs have their own queue and limits, separate from the synchronous endpoints
+            start = time.monotonic()
+            try:
+                text, usage = await self.batch.complete(model_config.provider, request)
+            except Exception:
+                self._record_outcome(model_config, None, ok=False)
+                raise
+            self._record_outcome(model_config, time.monotonic() - start)
+            self._record_usage(model_config, usage, call)
+            return text
+        tokens = self._estimate_request_tokens(request)
+        for attempt in range(self.rate_limit_retries + 1):
+            queued = time.monotonic()
+            sent = None
+            try:
+                async with self.admission.admit(model_config.provider, model_config.model_name, tokens, debate_id):
+                    sent = time.monotonic()
+                    text = await asyncio.wait_for(self._send(model_config, request, call), timeout)
+            except Exception as e:
+                self._record_timing(call, queued, sent)
+                # The next admission waits until the Retry-After delay has passed
+                delay = self.admission.record_rate_limit(model_config.provider, model_config.model_name, e)
+                if delay is None or attempt == self.rate_limit_retries:
+                    self._record_outcome(model_config, None, ok=False)
+                    raise
+                if call is not None:
+                    call.retries += 1
+                continue
+            self._record_outcome(model_config, self._record_timing(call, queued, sent))
+            return text
+
+    async def _cached_complete(
+        self,
+        model_config: ModelPreference,
+        request: Dict[str, Any],
+        cache_policy: Optional[CachePolicy] = None,
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Run a completion through the response cache when the call's policy allows it."""
+        if cache_policy is None or not cache_policy.enabled:
+            return await self._complete(model_config, request, debate_id, call, timeout)
+        key = CompletionCache.make_key(
+            model_config.provider,
+            model_config.model_name,
+            model_config.temperature,
+            request["messages"],
+            request.get("system")
+        )
+        computed = False
+
+        def compute() -> Awaitable[str]:
+            nonlocal computed
+            computed = True
+            return self._complete(model_config, request, debate_id, call, timeout)
+
+        text = await self.response_cache.get_or_compute(key, compute, ttl=cache_policy.ttl)
+        if call is not None and not computed:
+            call.cache_hit = True
+        return text
+
+    async def _send_stream(
+        self,
+        model_config: ModelPreference,
+        request: Dict[str, Any],
+        call: Optional[CallMetrics] = None
+    ) -> AsyncGenerator[str, None]:
+        """Yield text deltas from a streaming completion request to the provider."""
+        if model_config.provider == "mock":
+            received = []
+            try:
+                async for text in self.mock_client.stream(request):
+                    received.append(text)
+                    yield text
+            finally:
+                self._record_usage(model_config, self.mock_client.usage(request, "".join(received)), call)
+            return
+        if model_config.provider == "anthropic":
+            async with self.anthropic_client.messages.stream(**request) as stream:
+                try:
+                    async for text in stream.text_stream:
+                        if text:
+                            yield text
+                finally:
+                    # Input usage arrives with the first event, so it is known even if we stop early
+                    try:
+                        self._record_usage(model_config, stream.current_message_snapshot.usage, call)
+                    except Exception:
+                        pass
+            return
+        # Usage arrives in a final chunk, for prompt cache and cost accounting
+        request = {**request, "stream_options": {"include_usage": True}}
+        stream = await self._get_client(model_config.provider).chat.completions.create(stream=True, **request)
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    self._record_usage(model_config, chunk.usage, call)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the stream early stops generation of the remaining tokens
+            await stream.close()
+
+    async def _stream(
+        self,
+        model_config: ModelPreference,
+        request: Dict[str, Any],
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream a completion once admitted by the rate limiter, holding the slot until it ends.
+
+        timeout applies to the wait for the first delta once admitted, not to the time spent
+        waiting for admission.
+        """
+        tokens = self._estimate_request_tokens(request)
+        for attempt in range(self.rate_limit_retries + 1):
+            received = False
+            queued = time.monotonic()
+            admitted = None
+            try:
+                async with self.admission.admit(model_config.provider, model_config.model_name, tokens, debate_id):
+                    admitted = time.monotonic()
+                    sent = self._send_stream(model_config, request, call)
+                    try:
+                        try:
+                            first = await asyncio.wait_for(sent.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            return
+                        received = True
+                        yield first
+                        async for delta in sent:
+                            yield delta
+                    finally:
+                        await sent.aclose()
+                        self._record_timing(call, queued, admitted)
+                return
+            except Exception as e:
+                if admitted is None:
+                    self._record_timing(call, queued, None)
+                # Only a stream that was rejected before producing text can be retried
+                delay = None if received else self.admission.record_rate_limit(model_config.provider, model_config.model_name, e)
+                if delay is None or attempt == self.rate_limit_retries:
+                    raise
+                if call is not None:
+                    call.retries += 1
+
+    async def _attempt(
+        self,
+        model_config: ModelPreference,
+        build_request: Callable[[ModelPreference], Dict[str, Any]],
+        cache_policy: Optional[CachePolicy] = None,
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None
+    ) -> str:
+        """Run one model attempt under that model's own timeout.
+
+        The timeout covers each provider request, so time queued for admission, token-bucket
+        waits and Retry-After delays don't count against it. Answers from the response cache,
+        or shared with an identical call in flight, aren't recorded in the model's stats.
+        """
+        if call is not None:
+            call.provider, call.model = model_config.provider, model_config.model_name
+        request = build_request(model_config)
+        # Batches return whenever the provider gets to them, so they aren't timed out
+        timeout = None if self._batched(model_config) else self._get_model_setting(model_config, "timeout_seconds", DEFAULT_TIMEOUT)
+        return await self._cached_complete(model_config, request, cache_policy, debate_id, call, timeout)
+
+    def _describe_error(self, model_config: ModelPreference, error: Exception) -> str:
+        return f"{model_config.provider}/{model_config.model_name}: {str(error) or type(error).__name__}"
+
+    async def _run_chain(
+        self,
+        chain: List[ModelPreference],
+        build_request: Callable[[ModelPreference], Dict[str, Any]],
+        cache_policy: Optional[CachePolicy] = None,
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None
+    ) -> str:
+        """Try each model in the chain in turn until one answers."""
+        if self.hedging and self.batch is None and len(chain) > 1:
+            return await self._run_hedged(chain, build_request, cache_policy, debate_id, call)
+        errors = []
+        remaining = list(chain)
+        while remaining:
+            model_config = self.router.next_model(remaining)
+            try:
+                return await self._attempt(model_config, build_request, cache_policy, debate_id, call)
+            except Exception as e:
+                if call is not None:
+                    call.fallbacks += 1
+                errors.append(self._describe_error(model_config, e))
+                print(f"Error with {model_config.provider}/{model_config.model_name}, trying next model: {errors[-1]}")
+        raise Exception(f"LLM service failed: {'; '.join(errors)}")
+
+    def _hedge_delay(self, model_config: ModelPreference) -> float:
+        """How long to wait on a model before hedging: its p90 latency once known."""
+        stats = self._get_stats(model_config)
+        if stats.count >= HEDGE_MIN_SAMPLES:
+            return stats.percentile(0.9)
+        return self._get_model_setting(model_config, "hedge_after_seconds", DEFAULT_HEDGE_DELAY)
+
+    async def _run_hedged(
+        self,
+        chain: List[ModelPreference],
+        build_request: Callable[[ModelPreference], Dict[str, Any]],
+        cache_policy: Optional[CachePolicy] = None,
+        debate_id: Optional[str] = None,
+        call: Optional[CallMetrics] = None
+    ) -> str:
+        """Start the next model when the latest one is slower than its p90 or fails; the first answer wins."""
+        remaining = list(chain)
+        running: Dict[asyncio.Task, ModelPreference] = {}
+        errors = []
+
+        def launch() -> ModelPreference:
+            model_config = self.router.next_model(remaining)
+            if call is not None and len(remaining) < len(chain) - 1:
+                call.fallbacks += 1
+            task = asyncio.create_task(self._attempt(model_config, build_request, cache_policy, debate_id, call))
+            running[task] = model_config
+            return model_config
+
+        latest = launch()
+        try:
+            while running:
+                timeout = self._hedge_delay(latest) if remaining else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model_config = running.pop(task)
+                    if task.exception() is None:
+                        if call is not None:
+                            call.provider, call.model = model_config.provider, model_config.model_name
+                        return task.result()
+                    errors.append(self._describe_error(model_config, task.exception()))
+                # Hedge when the latest attempt is slow, fall back when nothing is left running
+                if remaining and (not done or not running):
+                    latest = launch()
+        finally:
+            # Cancel the losers
+            for task in running:
+                task.cancel()
+        raise Exception(f"LLM service failed: {'; '.join(errors)}")
+
+    async def generate_response(
+        self,
+        personality: Personality,
+        input_statement: str,
+        debate_history: Union[ConversationContext, List[Dict[str, str]]],
+        additional_context: str = "",
+        cache_policy: Optional[CachePolicy] = None,
+        debate_id: Optional[str] = None,
+        max_chars: Optional[int] = None,
+        model: Optional[ModelPreference] = None
+    ) -> str:
+        """Generate a personality's reply, asked for in max_chars characters (the turn budget by default).
+
+        model, if given, is tried before the personality's other models.
+        """
+        budget = self.length.budget("turn", max_chars)
+
+        def build_request(model_config: ModelPreference) -> Dict[str, Any]:
+            system_prompt, messages, current_prompt = self._build_prompts(
+                model_config, personality, input_statement, debate_history, additional_context, budget
+            )
+            return self._build_request(model_config, system_prompt, messages, current_prompt, budget)
+
+        # Fall back through every acceptable model, each with its own timeout
+        call = CallMetrics(personality.name, debate_id)
+        try:
+            response = await self._run_chain(self._get_model_chain(personality, model), build_request, cache_policy, debate_id, call)
+        except BaseException:
+            self.metrics.finish(call, ok=False)
+            raise
+        response = self._enforce_length(response, budget, call)
+        self.metrics.finish(call, ok=True)
+        return response
+
+    async def stream_response(
+        self,
+        personality: Personality,
+        input_statement: str,
+        debate_history: Union[ConversationContext, List[Dict[str, str]]],
+        additional_context: str = "",
+        max_chars: Optional[int] = None,
+        debate_id: Optional[str] = None,
+        model: Optional[ModelPreference] = None
+    ) -> AsyncGenerator[str, None]:
+        """Yield response text as it arrives, stopping once it runs past the limit of the max_chars budget.
+
+        A stopped reply ends mid-sentence; LengthPolicy.enforce() cuts the final text back to
+        its last full sentence.
+        """
+        call = CallMetrics(personality.name, debate_id)
+        deltas = self._stream_chain(personality, input_statement, debate_history, additional_context, max_chars, debate_id, call, model)
+        ok = False
+        try:
+            async for delta in deltas:
+                if call.ttft is None:
+                    call.ttft = time.monotonic() - call.start
+                yield delta
+            ok = True
+        except GeneratorExit:
+            # The consumer stopped reading early, which isn't a failed call
+            ok = True
+            raise
+        finally:
+            await deltas.aclose()
+            self.metrics.finish(call, ok)
+
+    async def _stream_chain(
+        self,
+        personality: Personality,
+        input_statement: str,
+        debate_history: Union[ConversationContext, List[Dict[str, str]]],
+        additional_context: str,
+        max_chars: Optional[int],
+        debate_id: Optional[str],
+        call: CallMetrics,
+        model: Optional[ModelPreference] = None
+    ) -> AsyncGenerator[str, None]:
+        """Stream from the first model in the chain that starts answering within its timeout."""
+        budget = self.length.budget("turn", max_chars)
+        errors = []
+
+        remaining = self._get_model_chain(personality, model)
+        while remaining:
+            model_config = self.router.next_model(remaining)
+            system_prompt, messages, current_prompt = self._build_prompts(
+                model_config, personality, input_statement, debate_history, additional_context, budget
+            )
+            request = self._build_request(model_config, system_prompt, messages, current_prompt, budget)
+            call.provider, call.model = model_config.provider, model_config.model_name
+            # The attempt timeout covers the wait for the first delta once admitted; text that was
+            # already shown can't be taken back, so later models are only tried before that point
+            timeout = self._get_model_setting(model_config, "timeout_seconds", DEFAULT_TIMEOUT)
+            deltas = self._stream(model_config, request, debate_id, call, timeout)
+            start = time.monotonic()
+            waited = call.queue_wait
+            try:
+                first = await deltas.__anext__()
+            except StopAsyncIteration:
+                first = ""
+            except Exception as e:
+                await deltas.aclose()
+                self._record_outcome(model_config, None, ok=False)
+                call.fallbacks += 1
+                errors.append(self._describe_error(model_config, e))
+                print(f"Error streaming from {model_config.provider}/{model_config.model_name}, trying next model: {errors[-1]}")
+                continue
+
+            limiter = StreamLimiter(self.length.limit(budget))
+            try:
+                delta = first
+                while True:
+                    text, stop = limiter.feed(delta)
+                    if text:
+                        yield text
+                    if stop:
+                        # Past the limit: cancel the rest of the generation instead of paying for discarded tokens
+                        break
+                    try:
+                        delta = await deltas.__anext__()
+                    except StopAsyncIteration:
+                        break
+            except Exception as e:
+                self._record_outcome(model_config, None, ok=False)
+                raise Exception(f"LLM service failed: {self._describe_error(model_config, e)}")
+            finally:
+                call.truncated = limiter.truncated
+                await deltas.aclose()
+            # Whole-stream latency once admitted, comparable with the non-streaming calls routing also learns from
+            self._record_outcome(model_config, time.monotonic() - start - (call.queue_wait - waited))
+            return
+
+        raise Exception(f"LLM service failed: {'; '.join(errors)}")
+
+    async def summarize_round(
+        self,
+        input_statement: str,
+        round_label: str,
+        round_history: Union[ConversationContext, List[Dict[str, str]]],
+        debate_id: Optional[str] = None
+    ) -> str:
+        """Condense one finished round into a short partial summary for the final summary to reduce."""
+        model_config = self.default_model
+        budget = self.length.budget("round_summary")
+        system_prompt = f"""You are an impartial debate moderator taking notes. Condense one round of a debate into its key arguments, who made them, and where the participants clashed. Keep it under {budget} characters."""
+
+        def build_request(model_config: ModelPreference) -> Dict[str, Any]:
+            summary, recent = self._as_context(round_history).window(self._get_token_budget(model_config))
+            current_prompt = f"""Debate topic: {input_statement}
+
+{round_label}:
+{chr(10).join(([summary] if summary else []) + recent)}"""
+            return self._build_request(model_config, system_prompt, [], current_prompt, budget)
+
+        call = CallMetrics("Round summary", debate_id)
+        try:
+            response = await self._run_chain([model_config], build_request, None, debate_id, call)
+        except BaseException:
+            self.metrics.finish(call, ok=False)
+            raise
+        response = self._enforce_length(response.strip(), budget, call)
+        self.metrics.finish(call, ok=True)
+        return f"{round_label}: {response}"
 
     async def generate_summary(
         self,
         input_statement: str,
-        debate_history: List[Dict[str, str]],
-        personalities: List[Personality]
+        debate_history: Union[ConversationContext, List[Dict[str, str]]],
+        personalities: List[Personality],
+        cache_policy: Optional[CachePolicy] = SUMMARY_CACHE,
+        debate_id: Optional[str] = None,
+        round_summaries: Optional[List[str]] = None
     ) -> str:
+        """Summarize the debate and pick a winner.
+
+        With round_summaries, debate_history only needs the turns they don't cover (the last
+        round), so the prompt stays short however long the debate ran.
+        """
         # Use default model for summary
         model_config = self.default_model
+        budget = self.length.budget("summary")
         
-        system_prompt = """You are an impartial debate moderator. Your task is to:
+        system_prompt = f"""You are an impartial debate moderator. Start your reply with a line of exactly "{VERDICT_PREFIX} <name>", naming the winner as written in the participant list, or "{VERDICT_PREFIX} Draw". Then:
 1. Summarize the key points of the debate
 2. Identify areas of agreement and disagreement
 3. Evaluate each participant's performance based on:
@@ -192,23 +897,39 @@ Remember: This is a philosophical debate for educational purposes. All content i
 4. Determine a winner based on who presented the most compelling and well-supported arguments
 5. Provide a brief justification for the winner selection
 
-Keep your summary under 200 characters and maintain a professional, objective tone."""
+Keep your summary under {budget} characters and maintain a professional, objective tone."""
 
-        # Create a structured debate history with round context
-        formatted_history = []
-        for entry in debate_history:
-            round_context = f"[{entry.get('round_type', 'general')}] " if 'round_type' in entry else ""
-            formatted_history.append(f"{round_context}{entry['personality']}: {entry['response']}")
-        
-        current_prompt = f"""Debate topic: {input_statement}
+        def build_request(model_config: ModelPreference) -> Dict[str, Any]:
+            # Reuse the pre-rendered turns, compacting the oldest ones if the debate outgrew the budget
+            summary, recent = self._as_context(debate_history).window(self._get_token_budget(model_config))
+            formatted_history = ([summary] if summary else []) + recent
+            if round_summaries:
+                formatted_history = ["Summaries of earlier rounds:"] + round_summaries + ["Final round:"] + formatted_history
+
+            current_prompt = f"""Debate topic: {input_statement}
 
 Participants: {', '.join(p.name for p in personalities)}
 
 Debate History:
 {chr(10).join(formatted_history)}
 
-Please provide a concise summary (under 200 characters) that includes:
-1. Main arguments
-2. Key points of agreement/disagreement
-3. Winner determination
-4. Brief justification""" 
\ No newline at end of file
+Please provide a concise summary (under {budget} characters) that includes:
+1. A first line: {VERDICT_PREFIX} <name> (or {VERDICT_PREFIX} Draw)
+2. Main arguments
+3. Key points of agreement/disagreement
+4. Brief justification"""
+            return self._build_request(model_config, system_prompt, [], current_prompt, budget)
+
+        call = CallMetrics("Summary", debate_id)
+        try:
+            response = await self._run_chain([model_config], build_request, cache_policy, debate_id, call)
+        except BaseException:
+            self.metrics.finish(call, ok=False)
+            raise
+        # The verdict line is kept whole however much of the summary is cut
+        body, verdict = split_verdict(response)
+        response = self._enforce_length(body, budget, call)
+        if verdict is not None:
+            response = f"{response}\n\n{VERDICT_PREFIX} {verdict}"
+        self.metrics.finish(call, ok=True)
+        return response
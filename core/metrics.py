@@ -0,0 +1,369 @@
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.stats import RollingStats
+
+logger = logging.getLogger(__name__)
+
+# Per-debate aggregates kept for the JSON dump; older debates are dropped first
+MAX_TRACKED_DEBATES = 500
+
+class CallMetrics:
+    """Measurements for one generate_response, stream_response or generate_summary call."""
+
+    __slots__ = (
+        "personality", "debate_id", "provider", "model", "start", "ttft", "latency",
+        "prompt_tokens", "completion_tokens", "cache_read_tokens", "cost", "retries", "fallbacks",
+        "cache_hit", "truncated", "ok", "provider_latency", "queue_wait"
+    )
+
+    def __init__(self, personality: str, debate_id: Optional[str] = None):
+        self.personality = personality
+        self.debate_id = debate_id
+        # The model that answered, or the last one tried if every model failed
+        self.provider: Optional[str] = None
+        self.model: Optional[str] = None
+        self.start = time.monotonic()
+        self.ttft: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_read_tokens = 0
+        self.cost = 0.0
+        # 429 retries, and models given up on (or hedged past) before the answer
+        self.retries = 0
+        self.fallbacks = 0
+        self.cache_hit = False
+        # The reply was cut to its length limit, or the provider stopped it at max_tokens
+        self.truncated = False
+        self.ok = False
+        # Seconds spent in provider requests, and waiting for rate-limit admission before them
+        self.provider_latency = 0.0
+        self.queue_wait = 0.0
+
+class _Aggregate:
+    """Running totals for a group of calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = RollingStats()
+        self.latency_sum = 0.0
+        self.ttft = RollingStats()
+        self.ttft_sum = 0.0
+        self.ttft_count = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_read_tokens = 0
+        self.cost = 0.0
+        self.retries = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self.truncated = 0
+        self.provider_latency_sum = 0.0
+        self.queue_wait_sum = 0.0
+        # Successful calls that weren't answered from the response cache, for planning estimates
+        self.fresh_calls = 0
+        self.fresh_latency_sum = 0.0
+        self.fresh_cost = 0.0
+
+    def add(self, call: CallMetrics):
+        self.calls += 1
+        if not call.ok:
+            self.errors += 1
+        if call.latency is not None:
+            self.latency.record(call.latency, ok=call.ok)
+            self.latency_sum += call.latency
+        if call.ttft is not None:
+            self.ttft.record(call.ttft)
+            self.ttft_sum += call.ttft
+            self.ttft_count += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.cache_read_tokens += call.cache_read_tokens
+        self.cost += call.cost
+        self.retries += call.retries
+        self.fallbacks += call.fallbacks
+        if call.cache_hit:
+            self.cache_hits += 1
+        if call.truncated:
+            self.truncated += 1
+        self.provider_latency_sum += call.provider_latency
+        self.queue_wait_sum += call.queue_wait
+        if call.ok and not call.cache_hit:
+            self.fresh_calls += 1
+            self.fresh_latency_sum += call.latency or 0.0
+            self.fresh_cost += call.cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_p50": self.latency.percentile(0.5),
+            "latency_p90": self.latency.percentile(0.9),
+            "latency_mean": self.latency_sum / self.calls if self.calls else None,
+            "ttft_p50": self.ttft.percentile(0.5),
+            "ttft_p90": self.ttft.percentile(0.9),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cost": round(self.cost, 6),
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "cache_hits": self.cache_hits,
+            "truncated": self.truncated,
+            "provider_seconds": round(self.provider_latency_sum, 6),
+            "queue_wait_seconds": round(self.queue_wait_sum, 6),
+            "truncation_rate": self.truncated / (self.calls - self.errors) if self.calls > self.errors else 0.0
+        }
+
+def _labels(**labels: Any) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+class MetricsCollector:
+    """Aggregates LLM call and Discord send metrics per model, personality and debate.
+
+    Exposed as Prometheus text (serve() or prometheus_text()) and as a JSON snapshot
+    (start_json_dump() or snapshot()). Per-debate totals only appear in the JSON snapshot, to keep
+    the Prometheus label cardinality bounded.
+    """
+
+    def __init__(self, model_configs: Optional[Dict[str, Any]] = None):
+        self.model_configs = model_configs or {}
+        # Keyed by (provider, model, personality)
+        self.by_model: Dict[Tuple[str, str, str], _Aggregate] = {}
+        self.by_personality: Dict[str, _Aggregate] = {}
+        self.by_debate: "OrderedDict[str, _Aggregate]" = OrderedDict()
+        # Keyed by (kind, status) for Discord posts and edits
+        self.discord: Dict[Tuple[str, str], RollingStats] = {}
+        self.discord_latency_sum: Dict[Tuple[str, str], float] = {}
+        self.discord_count: Dict[Tuple[str, str], int] = {}
+        self.discord_messages = 0
+        self._dump_task: Optional[asyncio.Task] = None
+        # Called with every finished CallMetrics, e.g. to persist it
+        self.listeners: List[Callable[[CallMetrics], None]] = []
+        # Stats kept elsewhere and read at export time: name -> (label, read)
+        self.sources: Dict[str, Tuple[Optional[str], Callable[[], Dict[str, Any]]]] = {}
+
+    def add_source(self, name: str, read: Callable[[], Dict[str, Any]], label: Optional[str] = None):
+        """Include stats kept elsewhere, e.g. rate limiter queue waits, in both exports.
+
+        read() returns {stat: number}, or with label set, {label value: {stat: number}}.
+        """
+        self.sources[name] = (label, read)
+
+    def _read_sources(self) -> Dict[str, Dict[str, Any]]:
+        values = {}
+        for name, (_, read) in self.sources.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                logger.warning(f"Error reading {name} metrics: {str(e)}")
+        return values
+
+    def cost_per_1k(self, provider: str, model: str) -> float:
+        return self.model_configs.get(provider, {}).get(model, {}).get("cost_per_1k_tokens", 0.0)
+
+    def record_usage(self, call: Optional[CallMetrics], provider: str, model: str, prompt_tokens: int, completion_tokens: int, cache_read_tokens: int = 0):
+        """Add one provider response's token usage, and its cost, to a call."""
+        if call is None:
+            return
+        call.prompt_tokens += prompt_tokens
+        call.completion_tokens += completion_tokens
+        call.cache_read_tokens += cache_read_tokens
+        call.cost += (prompt_tokens + completion_tokens) / 1000 * self.cost_per_1k(provider, model)
+
+    def finish(self, call: CallMetrics, ok: bool):
+        """Record a finished call in every aggregate it belongs to."""
+        call.ok = ok
+        call.latency = time.monotonic() - call.start
+        self._add(call)
+        for listener in self.listeners:
+            listener(call)
+
+    def merge(self, call: CallMetrics):
+        """Add a call another process finished, e.g. a debate worker; listeners aren't called."""
+        self._add(call)
+
+    def _add(self, call: CallMetrics):
+        key = (call.provider or "none", call.model or "none", call.personality)
+        self.by_model.setdefault(key, _Aggregate()).add(call)
+        self.by_personality.setdefault(call.personality, _Aggregate()).add(call)
+        if call.debate_id is not None:
+            if call.debate_id not in self.by_debate:
+                self.by_debate[call.debate_id] = _Aggregate()
+                while len(self.by_debate) > MAX_TRACKED_DEBATES:
+                    self.by_debate.popitem(last=False)
+            self.by_debate[call.debate_id].add(call)
+
+    def record_send(self, kind: str, latency: float, ok: bool, messages: int = 1):
+        """Record one Discord request (a post or an edit) and how many queued messages it carried."""
+        key = (kind, "ok" if ok else "error")
+        self.discord.setdefault(key, RollingStats()).record(latency)
+        self.discord_count[key] = self.discord_count.get(key, 0) + 1
+        self.discord_latency_sum[key] = self.discord_latency_sum.get(key, 0.0) + latency
+        self.discord_messages += messages
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": time.time(),
+            **self._read_sources(),
+            "models": [
+                {"provider": provider, "model": model, "personality": personality, **aggregate.to_dict()}
+                for (provider, model, personality), aggregate in self.by_model.items()
+            ],
+            "truncation_rates": self.truncation_rates(),
+            "personalities": {name: aggregate.to_dict() for name, aggregate in self.by_personality.items()},
+            "debates": {debate_id: aggregate.to_dict() for debate_id, aggregate in self.by_debate.items()},
+            "discord": {
+                "messages": self.discord_messages,
+                "requests": [
+                    {
+                        "kind": kind,
+                        "status": status,
+                        "count": self.discord_count[(kind, status)],
+                        "latency_p50": stats.percentile(0.5),
+                        "latency_p90": stats.percentile(0.9)
+                    }
+                    for (kind, status), stats in self.discord.items()
+                ]
+            }
+        }
+
+    def truncation_rates(self) -> Dict[str, float]:
+        """Share of successful calls per provider/model whose reply was cut to its length limit."""
+        counts: Dict[str, List[int]] = {}
+        for (provider, model, _), aggregate in self.by_model.items():
+            totals = counts.setdefault(f"{provider}/{model}", [0, 0])
+            totals[0] += aggregate.truncated
+            totals[1] += aggregate.calls - aggregate.errors
+        return {model: truncated / ok if ok else 0.0 for model, (truncated, ok) in counts.items()}
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("thinktank_llm_calls_total", "counter", "LLM calls by answering model, personality and status.")
+        for (provider, model, personality), aggregate in self.by_model.items():
+            labels = dict(provider=provider, model=model, personality=personality)
+            lines.append(f"thinktank_llm_calls_total{_labels(**labels, status='ok')} {aggregate.calls - aggregate.errors}")
+            lines.append(f"thinktank_llm_calls_total{_labels(**labels, status='error')} {aggregate.errors}")
+
+        # Quantiles cover the recent successful calls, sum and count every call
+        for name, attribute, stats_attribute, count_attribute, help_text in (
+            ("thinktank_llm_latency_seconds", "latency_sum", "latency", "calls", "Total LLM call latency including fallbacks."),
+            ("thinktank_llm_ttft_seconds", "ttft_sum", "ttft", "ttft_count", "Time to first token of streamed LLM calls.")
+        ):
+            family(name, "summary", help_text)
+            for (provider, model, personality), aggregate in self.by_model.items():
+                labels = dict(provider=provider, model=model, personality=personality)
+                stats = getattr(aggregate, stats_attribute)
+                if not getattr(aggregate, count_attribute):
+                    continue
+                for quantile in (0.5, 0.9, 0.99):
+                    if stats.count:
+                        lines.append(f"{name}{_labels(**labels, quantile=quantile)} {stats.percentile(quantile):.6f}")
+                lines.append(f"{name}_sum{_labels(**labels)} {getattr(aggregate, attribute):.6f}")
+                lines.append(f"{name}_count{_labels(**labels)} {getattr(aggregate, count_attribute)}")
+
+        for name, attribute, help_text in (
+            ("thinktank_llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent."),
+            ("thinktank_llm_completion_tokens_total", "completion_tokens", "Completion tokens received."),
+            ("thinktank_llm_cache_read_tokens_total", "cache_read_tokens", "Prompt tokens served from the provider prompt cache."),
+            ("thinktank_llm_cost_dollars_total", "cost", "Estimated spend from cost_per_1k_tokens."),
+            ("thinktank_llm_retries_total", "retries", "Requests retried after a 429."),
+            ("thinktank_llm_fallbacks_total", "fallbacks", "Models given up on or hedged past before the answer."),
+            ("thinktank_llm_cache_hits_total", "cache_hits", "Calls answered from the local response cache."),
+            ("thinktank_llm_truncated_total", "truncated", "Replies cut to their length limit or stopped at max_tokens."),
+            ("thinktank_llm_provider_seconds_total", "provider_latency_sum", "Time spent in provider requests once admitted."),
+            ("thinktank_llm_queue_wait_seconds_total", "queue_wait_sum", "Time spent waiting for rate-limit admission and Retry-After delays.")
+        ):
+            family(name, "counter", help_text)
+            for (provider, model, personality), aggregate in self.by_model.items():
+                labels = _labels(provider=provider, model=model, personality=personality)
+                value = getattr(aggregate, attribute)
+                lines.append(f"{name}{labels} {value:.6f}" if isinstance(value, float) else f"{name}{labels} {value}")
+
+        family("thinktank_discord_requests_total", "counter", "Discord posts and edits by status.")
+        for (kind, status), stats in self.discord.items():
+            lines.append(f"thinktank_discord_requests_total{_labels(kind=kind, status=status)} {self.discord_count[(kind, status)]}")
+        family("thinktank_discord_latency_seconds", "summary", "Discord request latency.")
+        for (kind, status), stats in self.discord.items():
+            labels = dict(kind=kind, status=status)
+            for quantile in (0.5, 0.9, 0.99):
+                lines.append(f"thinktank_discord_latency_seconds{_labels(**labels, quantile=quantile)} {stats.percentile(quantile):.6f}")
+            lines.append(f"thinktank_discord_latency_seconds_sum{_labels(**labels)} {self.discord_latency_sum[(kind, status)]:.6f}")
+            lines.append(f"thinktank_discord_latency_seconds_count{_labels(**labels)} {self.discord_count[(kind, status)]}")
+        family("thinktank_discord_messages_total", "counter", "Messages queued for Discord, before batching.")
+        lines.append(f"thinktank_discord_messages_total {self.discord_messages}")
+
+        for name, values in self._read_sources().items():
+            label = self.sources[name][0]
+            rows = [({label: key}, stats) for key, stats in values.items()] if label else [({}, values)]
+            stats_names = sorted({stat for _, stats in rows for stat, value in stats.items() if isinstance(value, (int, float))})
+            for stat in stats_names:
+                metric = f"thinktank_{name}_{stat}"
+                family(metric, "gauge", f"{stat.replace('_', ' ').capitalize()} ({name.replace('_', ' ')}).")
+                for labels, stats in rows:
+                    value = stats.get(stat)
+                    if not isinstance(value, (int, float)):
+                        continue
+                    rendered = f"{value:.6f}" if isinstance(value, float) else str(int(value))
+                    lines.append(f"{metric}{_labels(**labels) if labels else ''} {rendered}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def start_json_dump(self, path: str, interval: float = 60.0):
+        """Write the JSON snapshot to path every interval seconds."""
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await asyncio.to_thread(self.dump_json, path)
+                except Exception as e:
+                    logger.warning(f"Error writing metrics to {path}: {str(e)}")
+
+        self._dump_task = asyncio.create_task(run())
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9108) -> asyncio.AbstractServer:
+        """Serve /metrics (Prometheus text) and /metrics.json over HTTP."""
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request_line = (await reader.readline()).decode("latin-1").split()
+                # Drain the request headers
+                while (await reader.readline()).strip():
+                    pass
+                path = request_line[1] if len(request_line) > 1 else "/"
+                if path == "/metrics.json":
+                    status, content_type, body = "200 OK", "application/json", json.dumps(self.snapshot())
+                elif path in ("/", "/metrics"):
+                    status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.prometheus_text()
+                else:
+                    status, content_type, body = "404 Not Found", "text/plain", "not found\n"
+                data = body.encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+            except Exception as e:
+                logger.warning(f"Error serving metrics: {str(e)}")
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,110 @@
+import asyncio
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from core.context import estimate_tokens
+
+# Used for models under "mock" in config/models.json that leave settings out
+DEFAULT_MOCK_SETTINGS = {
+    "ttft_mean": 0.4,
+    "ttft_stddev": 0.15,
+    "tokens_per_second": 50.0,
+    "response_tokens": 40,
+    "error_rate": 0.0,
+    "refusal_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 1.0
+}
+
+_WORDS = (
+    "reason virtue truth knowledge justice power will question doubt freedom meaning "
+    "argument evidence value nature society duty belief wisdom inquiry courage"
+).split()
+
+REFUSAL_TEXT = "I'm sorry, but I can't fulfill this request."
+
+class MockAPIError(Exception):
+    """Error raised by the mock provider, shaped like the provider SDK errors."""
+
+    def __init__(self, message: str, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+class MockLLMClient:
+    """Offline stand-in for an LLM provider with configurable latency and failure behaviour.
+
+    Time to first token is drawn from a lognormal distribution with the configured mean and
+    standard deviation, then tokens arrive at tokens_per_second. error_rate, refusal_rate and
+    rate_limit_rate inject server errors, refusals and 429 responses with a Retry-After header.
+    """
+
+    def __init__(self, model_configs: Dict[str, Any], seed: Optional[int] = None):
+        self.model_configs = model_configs
+        self.random = random.Random(seed)
+        # (model, started_at, latency) for every completed call
+        self.calls: List[Tuple[str, float, float]] = []
+
+    def _settings(self, model: str) -> Dict[str, Any]:
+        return {**DEFAULT_MOCK_SETTINGS, **self.model_configs.get(model, {}).get("mock", {})}
+
+    def _lognormal(self, mean: float, stddev: float) -> float:
+        if mean <= 0:
+            return 0.0
+        if stddev <= 0:
+            return mean
+        sigma2 = math.log(1 + (stddev / mean) ** 2)
+        return self.random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+    def _text(self, settings: Dict[str, Any], max_tokens: int) -> str:
+        count = max(1, min(max_tokens, int(self.random.gauss(settings["response_tokens"], settings["response_tokens"] / 4))))
+        words = [self.random.choice(_WORDS) for _ in range(count)]
+        return " ".join(words).capitalize() + "."
+
+    def usage(self, request: Dict[str, Any], text: str) -> SimpleNamespace:
+        """Usage object, shaped like OpenAI's, for a request and the text generated for it."""
+        prompt = str(request.get("system", "")) + "".join(str(m["content"]) for m in request["messages"])
+        return SimpleNamespace(prompt_tokens=estimate_tokens(prompt), completion_tokens=estimate_tokens(text), prompt_tokens_details=None)
+
+    async def _first_token(self, settings: Dict[str, Any]):
+        """Wait out the time to first token, then inject any configured failure."""
+        await asyncio.sleep(self._lognormal(settings["ttft_mean"], settings["ttft_stddev"]))
+        roll = self.random.random()
+        if roll < settings["rate_limit_rate"]:
+            raise MockAPIError("Rate limit exceeded", 429, {"retry-after": str(settings["retry_after"])})
+        if roll < settings["rate_limit_rate"] + settings["error_rate"]:
+            raise MockAPIError("Internal server error", 500)
+
+    def _response_text(self, settings: Dict[str, Any], request: Dict[str, Any]) -> str:
+        if self.random.random() < settings["refusal_rate"]:
+            return REFUSAL_TEXT
+        return self._text(settings, request.get("max_tokens") or 150)
+
+    async def complete(self, request: Dict[str, Any]) -> Tuple[str, SimpleNamespace]:
+        """Return the full response text and a usage object."""
+        model = request["model"]
+        settings = self._settings(model)
+        start = time.monotonic()
+        await self._first_token(settings)
+        text = self._response_text(settings, request)
+        await asyncio.sleep(estimate_tokens(text) / settings["tokens_per_second"])
+        self.calls.append((model, start, time.monotonic() - start))
+        return text, self.usage(request, text)
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncGenerator[str, None]:
+        """Yield the response word by word at the configured token rate."""
+        model = request["model"]
+        settings = self._settings(model)
+        start = time.monotonic()
+        await self._first_token(settings)
+        words = self._response_text(settings, request).split(" ")
+        try:
+            for index, word in enumerate(words):
+                if index:
+                    await asyncio.sleep(estimate_tokens(word) / settings["tokens_per_second"])
+                yield word if index == 0 else " " + word
+        finally:
+            self.calls.append((model, start, time.monotonic() - start))
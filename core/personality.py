@@ -1,37 +1,174 @@
 import json
 import os
-from typing import Dict, Optional
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 from models.personality import Personality
 
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the personalities directory for changed files
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+class _Entry:
+    """One personality file: its raw JSON until first use, then the validated model."""
+
+    __slots__ = ("filename", "mtime", "name", "data", "personality")
+
+    def __init__(self, filename: str, mtime: float, name: str, data: Optional[Dict[str, Any]]):
+        self.filename = filename
+        self.mtime = mtime
+        self.name = name
+        self.data = data
+        self.personality: Optional[Personality] = None
+
 class PersonalityManager:
-    def __init__(self):
-        self.personalities: Dict[str, Personality] = {}
-        self.personalities_dir = "personalities"
+    """Registry of the personalities in the personalities directory.
+
+    Files are indexed by modification time; a Personality is only validated the first time it is
+    used. start_watching() picks up added, edited and deleted files in the background, reading
+    them off the event loop. Use PersonalityManager.shared() so the bot and the orchestrator see
+    the same personalities.
+    """
+
+    _shared: Optional["PersonalityManager"] = None
+
+    def __init__(self, personalities_dir: str = "personalities"):
+        self.personalities_dir = personalities_dir
+        # filename -> entry, and lowercase personality name -> filename
+        self._entries: Dict[str, _Entry] = {}
+        self._names: Dict[str, str] = {}
+        # filename -> mtime of files that failed to load, so they aren't retried until edited
+        self._failed: Dict[str, float] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
         self._load_personalities()
 
+    @classmethod
+    def shared(cls) -> "PersonalityManager":
+        """The process-wide registry."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
     def _load_personalities(self):
-        """Load all personality JSON files from the personalities directory."""
+        """Index all personality JSON files in the personalities directory."""
         if not os.path.exists(self.personalities_dir):
             os.makedirs(self.personalities_dir)
             return
+        self._apply(*self._scan(*self._snapshot()))
+
+    def _snapshot(self) -> Tuple[Dict[str, float], Dict[str, Optional[float]]]:
+        """Copies of the indexed and failed files' mtimes, for _scan to compare against."""
+        return {filename: entry.mtime for filename, entry in self._entries.items()}, dict(self._failed)
+
+    def _scan(
+        self,
+        indexed: Dict[str, float],
+        failed: Dict[str, Optional[float]]
+    ) -> Tuple[List[_Entry], Dict[str, Optional[float]], List[str]]:
+        """Read files that are new or changed since the last scan.
+
+        Returns (changed entries, files that failed to load, removed filenames). Only reads the
+        mtimes it is given and never the index itself, so it can run in a worker thread while the
+        event loop serves lookups; _apply() then updates the index on the loop.
+        """
+        changed = []
+        still_failed: Dict[str, Optional[float]] = {}
+        seen = set()
+        try:
+            files = [f for f in os.scandir(self.personalities_dir) if f.name.endswith('.json') and f.is_file()]
+        except FileNotFoundError:
+            files = []
+        for file in files:
+            seen.add(file.name)
+            mtime = None
+            try:
+                mtime = file.stat().st_mtime
+                if indexed.get(file.name) == mtime:
+                    continue
+                if file.name in failed and failed[file.name] == mtime:
+                    still_failed[file.name] = mtime
+                    continue
+                with open(file.path, 'r') as f:
+                    data = json.load(f)
+                changed.append(_Entry(file.name, mtime, str(data["name"]), data))
+            except Exception as e:
+                still_failed[file.name] = mtime
+                print(f"Error loading personality {file.name}: {str(e)}")
+        removed = [filename for filename in indexed if filename not in seen]
+        return changed, still_failed, removed
+
+    def _apply(self, changed: List[_Entry], failed: Dict[str, Optional[float]], removed: List[str]):
+        """Update the index with a scan's results; runs on the event loop."""
+        self._failed = failed
+        for filename in removed:
+            entry = self._entries.pop(filename, None)
+            if entry is None:
+                continue
+            if self._names.get(entry.name.lower()) == filename:
+                del self._names[entry.name.lower()]
+            logger.info(f"Removed personality {entry.name}")
+        for entry in changed:
+            previous = self._entries.get(entry.filename)
+            if previous is not None and self._names.get(previous.name.lower()) == entry.filename:
+                del self._names[previous.name.lower()]
+            self._entries[entry.filename] = entry
+            self._names[entry.name.lower()] = entry.filename
+            if previous is not None:
+                logger.info(f"Reloaded personality {entry.name}")
+
+    async def refresh(self):
+        """Pick up personality files added, changed or deleted since the last scan."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            self._apply(*await asyncio.to_thread(self._scan, *self._snapshot()))
+
+    def start_watching(self, interval: float = DEFAULT_RELOAD_INTERVAL):
+        """Reload changed personality files every interval seconds until stop_watching()."""
+        if self._watch_task is not None and not self._watch_task.done():
+            return
 
-        for filename in os.listdir(self.personalities_dir):
-            if filename.endswith('.json'):
+        async def watch():
+            while True:
+                await asyncio.sleep(interval)
                 try:
-                    with open(os.path.join(self.personalities_dir, filename), 'r') as f:
-                        personality_data = json.load(f)
-                        personality = Personality(**personality_data)
-                        self.personalities[personality.name.lower()] = personality
+                    await self.refresh()
                 except Exception as e:
-                    print(f"Error loading personality {filename}: {str(e)}")
+                    logger.error(f"Error reloading personalities: {str(e)}")
+
+        self._watch_task = asyncio.create_task(watch())
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    def _resolve(self, entry: _Entry) -> Optional[Personality]:
+        if entry.personality is None:
+            try:
+                entry.personality = Personality(**entry.data)
+            except Exception as e:
+                print(f"Error loading personality {entry.filename}: {str(e)}")
+                return None
+            entry.data = None
+        return entry.personality
 
     async def get_personality(self, name: str) -> Optional[Personality]:
         """Get a personality by name (case-insensitive)."""
-        return self.personalities.get(name.lower())
+        filename = self._names.get(name.lower())
+        if filename is None:
+            # The file may have been added since the last scan
+            await self.refresh()
+            filename = self._names.get(name.lower())
+            if filename is None:
+                return None
+        return self._resolve(self._entries[filename])
 
     def list_personalities(self) -> list[str]:
         """Get a list of all available personality names."""
-        return list(self.personalities.keys())
+        return list(self._names.keys())
 
     def add_personality(self, personality: Personality) -> bool:
         """Add a new personality and save it to a JSON file."""
@@ -39,13 +176,15 @@ class PersonalityManager:
             # Save to JSON file
             filename = f"{personality.name.lower()}.json"
             filepath = os.path.join(self.personalities_dir, filename)
-            
+
             with open(filepath, 'w') as f:
                 json.dump(personality.model_dump(), f, indent=4)
-            
-            # Add to in-memory dictionary
-            self.personalities[personality.name.lower()] = personality
+
+            # Index it with its new mtime, so the watcher doesn't read it back
+            entry = _Entry(filename, os.stat(filepath).st_mtime, personality.name, None)
+            entry.personality = personality
+            self._apply([entry], self._failed, [])
             return True
         except Exception as e:
             print(f"Error adding personality {personality.name}: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
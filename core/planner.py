@@ -0,0 +1,335 @@
+import time
+import random
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.personality import ModelPreference, Personality
+from core.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Calls a model needs in the metrics before its observed latency and cost replace the estimates
+MIN_PLANNING_SAMPLES = 5
+# Seconds per call assumed for a model with no observations and no expected_latency_seconds setting
+DEFAULT_CALL_SECONDS = 6.0
+# Prompt tokens assumed per call (system prompt, round context and history) before any are observed
+PROMPT_TOKENS_ESTIMATE = 800
+# Share of a budget kept free to absorb estimation error
+DEFAULT_HEADROOM = 0.1
+# Model tiers tried for the personalities' turns, best first
+TIERS = ("preferred", "fast", "economy")
+# Speakers whose calls are planned as moderator or summary calls rather than turns
+_ROLES = {"Moderator": "moderator", "Summary": "summary", "Round summary": "round_summary"}
+
+class DebateBudget:
+    """Wall-time and cost limits for one debate; either may be None for no limit."""
+
+    __slots__ = ("wall_seconds", "cost")
+
+    def __init__(self, wall_seconds: Optional[float] = None, cost: Optional[float] = None):
+        self.wall_seconds = wall_seconds
+        self.cost = cost
+
+    def __repr__(self) -> str:
+        return f"DebateBudget(wall_seconds={self.wall_seconds}, cost={self.cost})"
+
+class DebatePlan:
+    """What a debate will run: its format, the rounds kept from it, model tiers and estimates.
+
+    stages are the rounds of the format that will run, in order; with concurrent set, every
+    participant answers each of them at once instead of in turn. models pins each
+    personality's first model. seconds and cost are the estimates for the whole debate.
+    """
+
+    __slots__ = ("format_key", "stages", "concurrent", "tier", "models", "seconds", "cost", "fits")
+
+    def __init__(
+        self,
+        format_key: str,
+        stages: List[Dict[str, Any]],
+        concurrent: bool,
+        tier: str,
+        models: Dict[str, ModelPreference],
+        seconds: float,
+        cost: float,
+        fits: bool
+    ):
+        self.format_key = format_key
+        self.stages = stages
+        self.concurrent = concurrent
+        self.tier = tier
+        self.models = models
+        self.seconds = seconds
+        self.cost = cost
+        self.fits = fits
+
+    def describe(self) -> str:
+        stages = ", ".join(stage["type"] for stage in self.stages) or "no further rounds"
+        return (f"{self.format_key} ({stages}), {self.tier} models{', concurrent stages' if self.concurrent else ''}: "
+                f"~{self.seconds:.1f}s, ~${self.cost:.4f}")
+
+def _trim(stages: List[Dict[str, Any]], count: int, keep_first: bool) -> List[Dict[str, Any]]:
+    """Keep count rounds, always including the last and, when shortening to one, the first or the last."""
+    if count >= len(stages):
+        return list(stages)
+    if count <= 0:
+        return []
+    if count == 1:
+        return [stages[0] if keep_first else stages[-1]]
+    return stages[:count - 1] + [stages[-1]]
+
+class DebatePlanner:
+    """Fits debates into wall-time and cost budgets.
+
+    Before a debate starts, the planner picks the format (unless one was requested), how many
+    of its rounds to run, whether every stage runs concurrently, and a model tier for the
+    personalities' turns: the most rounds that fit, then the best tier, then turns taken in
+    order. Estimates come from each model's observed latency and cost per call in the metrics,
+    or from cost_per_1k_tokens and the length budgets in config/models.json until there are
+    enough observations.
+
+    At every round boundary the debate asks for a new plan for its remaining rounds with what
+    is left of the budget, dropping middle rounds or switching tiers if it is overrunning, and
+    before every turn it checks that the conclusion and final summary still fit; if not, the
+    round ends there and the debate goes to its summary. Calls already running aren't
+    interrupted, so a single slow call can still overrun the budget by its own latency.
+
+    Budgets are set under "budgets" in config/models.json: "default" for every debate and
+    "guilds" for per-guild overrides, each with wall_seconds and cost, plus "headroom".
+    """
+
+    def __init__(self, llm_service: LLMService, seed: Optional[int] = None):
+        self.llm_service = llm_service
+        self.settings = llm_service.model_configs.get("budgets", {})
+        self.headroom = self.settings.get("headroom", DEFAULT_HEADROOM)
+        self.random = random.Random(seed)
+
+    def budget_for(self, guild_id: Optional[int] = None) -> Optional[DebateBudget]:
+        """The budget for a guild's debates, the default budget, or None if neither is configured."""
+        settings = dict(self.settings.get("default", {}))
+        if guild_id is not None:
+            settings.update(self.settings.get("guilds", {}).get(str(guild_id), {}))
+        if settings.get("wall_seconds") is None and settings.get("cost") is None:
+            return None
+        return DebateBudget(settings.get("wall_seconds"), settings.get("cost"))
+
+    def _observed(self, role: str, model: ModelPreference) -> Optional[Tuple[float, float]]:
+        """Mean (seconds, cost) per call of a model in a role, from successful calls that weren't cache hits."""
+        calls = 0
+        seconds = cost = 0.0
+        for (provider, model_name, speaker), aggregate in self.llm_service.metrics.by_model.items():
+            if (provider, model_name) != (model.provider, model.model_name) or _ROLES.get(speaker, "turn") != role:
+                continue
+            calls += aggregate.fresh_calls
+            seconds += aggregate.fresh_latency_sum
+            cost += aggregate.fresh_cost
+        if calls < MIN_PLANNING_SAMPLES:
+            return None
+        return seconds / calls, cost / calls
+
+    def call_estimate(self, role: str, model: ModelPreference, max_chars: Optional[int] = None) -> Tuple[float, float]:
+        """Expected (seconds, cost) of one turn, moderator or summary call on a model."""
+        observed = self._observed(role, model)
+        if observed is not None:
+            return observed
+        service = self.llm_service
+        provider_config = service.model_configs.get(model.provider, {}).get(model.model_name, {})
+        seconds = provider_config.get("expected_latency_seconds")
+        if seconds is None and "mock" in provider_config:
+            mock = provider_config["mock"]
+            seconds = mock.get("ttft_mean", 0.0) + mock.get("response_tokens", 0) / max(mock.get("tokens_per_second", 1), 1)
+        if seconds is None:
+            seconds = DEFAULT_CALL_SECONDS
+        completion_tokens = service.length.max_tokens(model, service.length.budget(role, max_chars))
+        cost = (PROMPT_TOKENS_ESTIMATE + completion_tokens) / 1000 * provider_config.get("cost_per_1k_tokens", 0.0)
+        return seconds, cost
+
+    def estimate(
+        self,
+        stages: List[Dict[str, Any]],
+        independent_stages,
+        personalities: List[Personality],
+        models: Dict[str, ModelPreference],
+        concurrent: bool,
+        pipelined: bool = True,
+        incremental_summary: bool = True,
+        opening: bool = True
+    ) -> Tuple[float, float]:
+        """Expected (seconds, cost) to run the given rounds and the final summary.
+
+        Pipelined debates prefetch round introductions and start the final summary alongside
+        the last conclusion, so only turns, conclusions and the tail of the summary count
+        towards the wall time.
+        """
+        default = self.llm_service.default_model
+        moderator_seconds, moderator_cost = self.call_estimate("moderator", default)
+        summary_seconds, summary_cost = self.call_estimate("summary", default)
+        round_summary_cost = self.call_estimate("round_summary", default)[1]
+        seconds = moderator_seconds if opening else 0.0
+        cost = moderator_cost if opening else 0.0
+        if not opening and stages and pipelined:
+            # Mid-debate, the next introduction may not have been prefetched for the re-planned rounds
+            seconds += moderator_seconds
+        for index, stage in enumerate(stages):
+            turns = [self.call_estimate("turn", models[p.name], stage.get("max_chars")) for p in personalities]
+            if concurrent or stage["type"] in independent_stages:
+                seconds += max(turn_seconds for turn_seconds, _ in turns)
+            else:
+                seconds += sum(turn_seconds for turn_seconds, _ in turns)
+            # Introduction and conclusion; a pipelined introduction was fetched during the previous round
+            seconds += moderator_seconds if pipelined else 2 * moderator_seconds
+            cost += sum(turn_cost for _, turn_cost in turns) + 2 * moderator_cost
+            if incremental_summary and index < len(stages) - 1:
+                # Runs in the background during the next round
+                cost += round_summary_cost
+        if pipelined and stages:
+            seconds += max(0.0, summary_seconds - moderator_seconds)
+        else:
+            seconds += summary_seconds
+        return seconds, cost + summary_cost
+
+    def _fits(self, budget: DebateBudget, seconds: float, cost: float) -> bool:
+        share = 1.0 - self.headroom
+        if budget.wall_seconds is not None and seconds > budget.wall_seconds * share:
+            return False
+        if budget.cost is not None and cost > budget.cost * share:
+            return False
+        return True
+
+    def _tiers(self, personalities: List[Personality]) -> List[Tuple[str, Dict[str, ModelPreference]]]:
+        """Model choices per tier for the personalities' turns, without duplicate tiers."""
+        chains = {p.name: self.llm_service.models_for(p) for p in personalities}
+        tiers = []
+        for tier in TIERS:
+            if tier == "preferred":
+                models = {name: chain[0] for name, chain in chains.items()}
+            elif tier == "fast":
+                models = {name: min(chain, key=lambda m: self.call_estimate("turn", m)[0]) for name, chain in chains.items()}
+            else:
+                models = {name: min(chain, key=lambda m: self.call_estimate("turn", m)[1]) for name, chain in chains.items()}
+            if not any(models == existing for _, existing in tiers):
+                tiers.append((tier, models))
+        return tiers
+
+    def _search(
+        self,
+        personalities: List[Personality],
+        budget: DebateBudget,
+        candidates: Dict[str, Tuple[Any, List[List[Dict[str, Any]]]]],
+        done: List[Dict[str, Any]],
+        elapsed: float,
+        spent: float,
+        pipelined: bool,
+        incremental_summary: bool
+    ) -> DebatePlan:
+        """The best plan over the candidate formats and round choices that fits the rest of the budget.
+
+        candidates maps format keys to (format, [stage lists for the remaining rounds]). Without
+        any plan that fits, the one with the lowest estimate relative to the budget is returned.
+        """
+        tiers = self._tiers(personalities)
+        best: List[Tuple[Tuple, DebatePlan]] = []
+        fallback: Optional[Tuple[float, DebatePlan]] = None
+        for format_key, (debate_format, options) in candidates.items():
+            for stages in options:
+                for rank, (tier, models) in enumerate(tiers):
+                    for concurrent in (False, True):
+                        if concurrent and all(stage["type"] in debate_format.independent_stages for stage in stages):
+                            # Nothing left to parallelize
+                            continue
+                        seconds, cost = self.estimate(
+                            stages, debate_format.independent_stages, personalities, models, concurrent,
+                            pipelined, incremental_summary, opening=not done
+                        )
+                        total_seconds, total_cost = elapsed + seconds, spent + cost
+                        fits = self._fits(budget, total_seconds, total_cost)
+                        plan = DebatePlan(format_key, done + stages, concurrent, tier, models, total_seconds, total_cost, fits)
+                        if fits:
+                            score = (len(stages), -rank, not concurrent)
+                            if not best or score > best[0][0]:
+                                best = [(score, plan)]
+                            elif score == best[0][0]:
+                                best.append((score, plan))
+                        else:
+                            overrun = max(
+                                total_seconds / budget.wall_seconds if budget.wall_seconds else 0.0,
+                                total_cost / budget.cost if budget.cost else 0.0
+                            )
+                            if fallback is None or overrun < fallback[0]:
+                                fallback = (overrun, plan)
+        if best:
+            # Formats that tie are picked at random, as unplanned debates are
+            return self.random.choice(best)[1]
+        return fallback[1]
+
+    def plan(
+        self,
+        personalities: List[Personality],
+        budget: DebateBudget,
+        formats: Dict[str, Any],
+        pipelined: bool = True,
+        incremental_summary: bool = True
+    ) -> DebatePlan:
+        """Plan a debate among the given formats (key -> DebateFormat) within the budget."""
+        candidates = {
+            key: (debate_format, [
+                _trim(debate_format.structure, count, keep_first=True)
+                for count in range(len(debate_format.structure), 0, -1)
+            ])
+            for key, debate_format in formats.items()
+        }
+        plan = self._search(personalities, budget, candidates, [], 0.0, 0.0, pipelined, incremental_summary)
+        if plan.fits:
+            logger.info(f"Planned debate within {budget}: {plan.describe()}")
+        else:
+            logger.warning(f"No plan fits {budget}, running the cheapest: {plan.describe()}")
+        return plan
+
+    def replan(self, debate, budget: DebateBudget) -> Optional[DebatePlan]:
+        """A new plan for a debate's remaining rounds if its current plan no longer fits, else None.
+
+        Called between rounds; rounds already run are kept and the final round is kept while
+        any round fits, so the debate still closes properly.
+        """
+        elapsed = time.monotonic() - debate.started_at
+        spent = self.spent(debate)
+        done = debate.current_format.structure[:debate.current_round]
+        remaining = debate.current_format.structure[debate.current_round:]
+        plan = debate.plan
+        seconds, cost = self.estimate(
+            remaining, debate.current_format.independent_stages, debate.active_personalities, plan.models,
+            plan.concurrent, debate.pipelined, debate.incremental_summary, opening=False
+        )
+        if self._fits(budget, elapsed + seconds, spent + cost):
+            return None
+        base = debate.formats[debate.format_key]
+        candidates = {debate.format_key: (base, [
+            _trim(remaining, count, keep_first=False) for count in range(len(remaining), -1, -1)
+        ])}
+        new_plan = self._search(
+            debate.active_personalities, budget, candidates, done, elapsed, spent,
+            debate.pipelined, debate.incremental_summary
+        )
+        logger.warning(f"Debate {debate.debate_id} is overrunning {budget} after {elapsed:.1f}s and ${spent:.4f}, re-planned: {new_plan.describe()}")
+        return new_plan
+
+    def spent(self, debate) -> float:
+        aggregate = self.llm_service.metrics.by_debate.get(debate.debate_id)
+        return aggregate.cost if aggregate is not None else 0.0
+
+    def out_of_budget(self, debate, budget: DebateBudget) -> bool:
+        """Whether the next turn would leave too little budget for the round's conclusion and the final summary."""
+        elapsed = time.monotonic() - debate.started_at
+        default = self.llm_service.default_model
+        moderator_seconds, moderator_cost = self.call_estimate("moderator", default)
+        summary_seconds, summary_cost = self.call_estimate("summary", default)
+        models = debate.plan.models
+        turn_seconds, turn_cost = max(
+            (self.call_estimate("turn", models[p.name]) for p in debate.active_personalities),
+            key=lambda estimate: estimate[0]
+        )
+        return not self._fits(
+            budget,
+            elapsed + turn_seconds + moderator_seconds + summary_seconds,
+            self.spent(debate) + turn_cost + moderator_cost + summary_cost
+        )
@@ -0,0 +1,230 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+# Requests from calls that don't belong to a debate share one fair-queue slot
+DEFAULT_QUEUE = "default"
+# Number of recent queue waits kept per limiter for percentiles
+WAIT_WINDOW = 1000
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; callers may go into debt and wait it off."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Reserve amount tokens and return how long to wait before using them."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A single request larger than the whole bucket only has to wait for a full bucket
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+class FairLimiter:
+    """Bounded in-flight slots granted round-robin across debates."""
+
+    def __init__(self, max_in_flight: Optional[int] = None):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._order: Deque[str] = deque()
+
+    def _has_capacity(self) -> bool:
+        return self.max_in_flight is None or self.in_flight < self.max_in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, queue: str):
+        if self._has_capacity() and not self._order:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        if queue not in self._waiters:
+            self._waiters[queue] = deque()
+            self._order.append(queue)
+        self._waiters[queue].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled; hand it on
+                self.release()
+            else:
+                self._discard(queue, future)
+            raise
+
+    def _discard(self, queue: str, future: asyncio.Future):
+        waiters = self._waiters.get(queue)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._waiters[queue]
+                self._order.remove(queue)
+
+    def release(self):
+        self.in_flight -= 1
+        # Grant the slot to the next debate in rotation, so one busy debate can't starve the others
+        while self._order and self._has_capacity():
+            queue = self._order.popleft()
+            waiters = self._waiters[queue]
+            future = waiters.popleft()
+            if waiters:
+                self._order.append(queue)
+            else:
+                del self._waiters[queue]
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+class RateLimiter:
+    """Admission state for one provider or one provider model."""
+
+    def __init__(self, limits: Dict[str, Any]):
+        self.slots = FairLimiter(limits.get("max_in_flight"))
+        rpm = limits.get("requests_per_minute")
+        tpm = limits.get("tokens_per_minute")
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        # Set from Retry-After when the provider answers 429
+        self.blocked_until = 0.0
+        self.waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        self.total_wait = 0.0
+        self.admitted = 0
+        self.rate_limited = 0
+
+    def reserve(self, tokens: int) -> float:
+        delay = max(0.0, self.blocked_until - time.monotonic())
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def record_wait(self, seconds: float):
+        self.waits.append(seconds)
+        self.total_wait += seconds
+        self.admitted += 1
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Return the Retry-After delay in seconds if the error is a provider 429, else None."""
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return 1.0
+
+class AdmissionController:
+    """Per-provider and per-model concurrency and rate limits for outgoing LLM requests.
+
+    Limits come from config/models.json: "rate_limits" on a model entry limits that model, and
+    the top-level "provider_limits" section limits a provider across all its models. When
+    several processes call the same providers, each gets share of every limit, so together
+    they stay within it.
+    """
+
+    def __init__(self, model_configs: Dict[str, Any], share: float = 1.0):
+        self.model_configs = model_configs
+        self.share = share
+        self._limiters: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+
+    def _scaled(self, limits: Dict[str, Any]) -> Dict[str, Any]:
+        """This process's share of a set of limits; at least one request may be in flight."""
+        if self.share >= 1.0:
+            return limits
+        scaled = dict(limits)
+        if limits.get("max_in_flight"):
+            scaled["max_in_flight"] = max(1, int(limits["max_in_flight"] * self.share))
+        for name in ("requests_per_minute", "tokens_per_minute"):
+            if limits.get(name):
+                scaled[name] = limits[name] * self.share
+        return scaled
+
+    def _limiter(self, provider: str, model: Optional[str]) -> RateLimiter:
+        key = (provider, model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            if model is None:
+                limits = self.model_configs.get("provider_limits", {}).get(provider, {})
+            else:
+                limits = self.model_configs.get(provider, {}).get(model, {}).get("rate_limits", {})
+            limiter = self._limiters[key] = RateLimiter(self._scaled(limits))
+        return limiter
+
+    @asynccontextmanager
+    async def admit(self, provider: str, model: str, tokens: int = 0, queue: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a provider slot and a model slot for the duration of one request."""
+        queue = queue or DEFAULT_QUEUE
+        # Take the narrower model slot first so requests queued on a busy model don't hold provider slots
+        limiters = [self._limiter(provider, model), self._limiter(provider, None)]
+        start = time.monotonic()
+        acquired = []
+        try:
+            for limiter in limiters:
+                await limiter.slots.acquire(queue)
+                acquired.append(limiter)
+            delay = max(limiter.reserve(tokens) for limiter in limiters)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            waited = time.monotonic() - start
+            for limiter in limiters:
+                limiter.record_wait(waited)
+            yield
+        finally:
+            for limiter in reversed(acquired):
+                limiter.slots.release()
+
+    def record_rate_limit(self, provider: str, model: str, error: Exception) -> Optional[float]:
+        """Block the model until its Retry-After has passed; returns the delay for 429s."""
+        delay = parse_retry_after(error)
+        if delay is not None:
+            limiter = self._limiter(provider, model)
+            limiter.rate_limited += 1
+            limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Queue wait statistics per limiter, for sizing the configured limits."""
+        result = {}
+        for (provider, model), limiter in self._limiters.items():
+            waits = sorted(limiter.waits)
+            name = f"{provider}/{model}" if model else provider
+            result[name] = {
+                "admitted": limiter.admitted,
+                "in_flight": limiter.slots.in_flight,
+                "queued": limiter.slots.queued,
+                "rate_limited": limiter.rate_limited,
+                "wait_seconds_total": limiter.total_wait,
+                "wait_seconds_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_seconds_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "wait_seconds_max": waits[-1] if waits else 0.0
+            }
+        return result
@@ -0,0 +1,161 @@
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.personality import ModelPreference
+from core.stats import RollingStats
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ("preference", "min_latency", "min_cost", "weighted")
+# Latency samples a model needs before its percentiles are trusted; until then it is tried as if fast
+MIN_ROUTING_SAMPLES = 10
+DEFAULT_LATENCY_SLO = 10.0
+DEFAULT_WEIGHTS = {"latency": 1.0, "cost": 1.0, "errors": 2.0}
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+class CircuitBreaker:
+    """Ejects a model after consecutive failures and lets one probe through every reset_seconds.
+
+    A successful call closes the breaker again; a failed probe keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_seconds: float = DEFAULT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether the model would be tried now, without taking a half-open breaker's probe."""
+        return self.state != "open"
+
+    def allow(self) -> bool:
+        """Whether the model may be tried now; a half-open breaker lets one probe through per period."""
+        state = self.state
+        if state == "half_open":
+            # Restart the period so concurrent calls don't all probe at once
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record(self, ok: bool):
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class ModelRouter:
+    """Orders a personality's acceptable models by a routing objective.
+
+    Objectives, set under "routing" in config/models.json or with ROUTING_OBJECTIVE:
+      preference   the personality's model_preferences order (the default)
+      min_latency  lowest p95 latency first
+      min_cost     cheapest cost_per_1k_tokens among models meeting the p95 latency SLO, then the rest by p95
+      weighted     lowest weighted sum of normalised p95 latency, cost and error rate
+
+    Models whose circuit breaker is open are moved behind the others, so they are only used
+    when nothing else is left. Ordering has no side effects; next_model() picks the model an
+    attempt is actually made on.
+    """
+
+    def __init__(
+        self,
+        model_configs: Dict[str, Any],
+        get_stats: Callable[[ModelPreference], RollingStats],
+        objective: Optional[str] = None
+    ):
+        settings = model_configs.get("routing", {})
+        self.model_configs = model_configs
+        self.get_stats = get_stats
+        self.objective = objective or settings.get("objective", "preference")
+        if self.objective not in OBJECTIVES:
+            raise ValueError(f"Unknown routing objective '{self.objective}'. Available objectives: {', '.join(OBJECTIVES)}")
+        self.latency_slo = settings.get("latency_slo_seconds", DEFAULT_LATENCY_SLO)
+        self.weights = {**DEFAULT_WEIGHTS, **settings.get("weights", {})}
+        breaker_settings = settings.get("circuit_breaker", {})
+        self.failure_threshold = breaker_settings.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD)
+        self.reset_seconds = breaker_settings.get("reset_seconds", DEFAULT_RESET_SECONDS)
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def breaker(self, model_config: ModelPreference) -> CircuitBreaker:
+        key = (model_config.provider, model_config.model_name)
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self.breakers[key]
+
+    def record(self, model_config: ModelPreference, ok: bool):
+        """Feed a call outcome into the model's circuit breaker."""
+        breaker = self.breaker(model_config)
+        was_open = breaker.opened_at is not None
+        breaker.record(ok)
+        if breaker.opened_at is not None and not was_open:
+            logger.warning(f"Circuit opened for {model_config.provider}/{model_config.model_name} after {breaker.failures} failures")
+        elif was_open and ok:
+            logger.info(f"Circuit closed for {model_config.provider}/{model_config.model_name}")
+
+    def _cost(self, model_config: ModelPreference) -> float:
+        provider_config = self.model_configs.get(model_config.provider, {})
+        return provider_config.get(model_config.model_name, {}).get("cost_per_1k_tokens", 0.0)
+
+    def _p95(self, model_config: ModelPreference) -> Optional[float]:
+        stats = self.get_stats(model_config)
+        if stats.count < MIN_ROUTING_SAMPLES:
+            return None
+        return stats.percentile(0.95)
+
+    def _rank(self, candidates: List[ModelPreference]) -> List[ModelPreference]:
+        if self.objective == "preference" or len(candidates) < 2:
+            return candidates
+        # Models without enough samples count as fast, so they get explored; sorts are stable,
+        # so ties keep the preference order
+        latencies = {id(m): self._p95(m) or 0.0 for m in candidates}
+        if self.objective == "min_latency":
+            return sorted(candidates, key=lambda m: latencies[id(m)])
+        if self.objective == "min_cost":
+            within_slo = [m for m in candidates if latencies[id(m)] <= self.latency_slo]
+            others = [m for m in candidates if latencies[id(m)] > self.latency_slo]
+            return sorted(within_slo, key=self._cost) + sorted(others, key=lambda m: latencies[id(m)])
+
+        max_latency = max(latencies.values()) or 1.0
+        max_cost = max(self._cost(m) for m in candidates) or 1.0
+
+        def score(model_config: ModelPreference) -> float:
+            return (
+                self.weights["latency"] * latencies[id(model_config)] / max_latency
+                + self.weights["cost"] * self._cost(model_config) / max_cost
+                + self.weights["errors"] * self.get_stats(model_config).error_rate()
+            )
+
+        return sorted(candidates, key=score)
+
+    def order(self, candidates: List[ModelPreference], fallback: Optional[ModelPreference] = None) -> List[ModelPreference]:
+        """Order acceptable models for one call; fallback, if given, always goes last among the available models."""
+        ranked = self._rank(candidates)
+        if fallback is not None:
+            ranked = ranked + [fallback]
+        available = [self.breaker(m).available() for m in ranked]
+        return [m for m, ok in zip(ranked, available) if ok] + [m for m, ok in zip(ranked, available) if not ok]
+
+    def next_model(self, remaining: List[ModelPreference]) -> ModelPreference:
+        """Take the next model to attempt from an ordered chain, using up a half-open breaker's probe.
+
+        Ordering doesn't touch the breakers, so this is where a call claims a probe. A model
+        whose breaker won't let the call through is passed over while other models are left.
+        """
+        for index, model_config in enumerate(remaining):
+            if self.breaker(model_config).allow():
+                return remaining.pop(index)
+        return remaining.pop(0)
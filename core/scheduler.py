@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SchedulerFull(Exception):
+    """Raised when a debate can't be queued because a queue limit was reached."""
+
+class DebateCancelled(Exception):
+    """Raised by DebateTicket.wait() when the debate was cancelled before finishing."""
+
+class DebateTicket:
+    """A debate submitted to the scheduler, either queued or running."""
+
+    def __init__(
+        self,
+        key: Hashable,
+        job: Callable[[], Awaitable[Any]],
+        guild_id: Optional[int],
+        user_id: Optional[int],
+        on_position: Optional[Callable[[int], Awaitable[None]]]
+    ):
+        self.key = key
+        self.job = job
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.on_position = on_position
+        # 1-based place in the wait queue; 0 once running
+        self.position: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+        self._done = asyncio.get_running_loop().create_future()
+
+    async def wait(self) -> Any:
+        """Wait for the debate to finish and return the job's result."""
+        try:
+            return await asyncio.shield(self._done)
+        except asyncio.CancelledError:
+            if self.cancelled:
+                raise DebateCancelled(f"Debate {self.key} was cancelled")
+            raise
+
+class DebateScheduler:
+    """Admission control for debates: bounded global concurrency with per-guild and per-user fairness.
+
+    Debates beyond the concurrency limits wait in a bounded queue. When a slot frees up, the next
+    debate comes from the guild with the fewest running debates, so one busy server can't take
+    every slot. Queued debates are told their position as it changes.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_per_guild: int = 2,
+        max_per_user: int = 1,
+        max_queue: int = 50,
+        max_queued_per_user: int = 3
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_guild = max_per_guild
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.max_queued_per_user = max_queued_per_user
+
+        self.waiting: List[DebateTicket] = []
+        self.running: Dict[Hashable, DebateTicket] = {}
+        self._running_per_guild: Dict[Optional[int], int] = {}
+        self._running_per_user: Dict[Optional[int], int] = {}
+        self._notifications: set = set()
+
+    def check(self, guild_id: Optional[int] = None, user_id: Optional[int] = None):
+        """Raise SchedulerFull if a new debate from this user would be rejected."""
+        if len(self.waiting) >= self.max_queue:
+            raise SchedulerFull("Too many debates are waiting. Please try again later.")
+        if user_id is not None:
+            queued = sum(1 for ticket in self.waiting if ticket.user_id == user_id)
+            if queued >= self.max_queued_per_user:
+                raise SchedulerFull("You already have debates waiting. Please wait for them to start.")
+
+    def submit(
+        self,
+        key: Hashable,
+        job: Callable[[], Awaitable[Any]],
+        guild_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        on_position: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> DebateTicket:
+        """Queue a debate job; it starts as soon as the limits allow."""
+        self.check(guild_id, user_id)
+        ticket = DebateTicket(key, job, guild_id, user_id, on_position)
+        self.waiting.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a queued or running debate, e.g. because its thread was deleted."""
+        for ticket in self.waiting:
+            if ticket.key == key:
+                ticket.cancelled = True
+                self.waiting.remove(ticket)
+                ticket._done.cancel()
+                self._report_positions()
+                return True
+        ticket = self.running.get(key)
+        if ticket is not None:
+            ticket.cancelled = True
+            ticket.task.cancel()
+            return True
+        return False
+
+    def _eligible(self, ticket: DebateTicket, per_guild: Dict[Optional[int], int], per_user: Dict[Optional[int], int]) -> bool:
+        return (
+            per_guild.get(ticket.guild_id, 0) < self.max_per_guild
+            and per_user.get(ticket.user_id, 0) < self.max_per_user
+        )
+
+    def _pick(
+        self,
+        waiting: List[DebateTicket],
+        per_guild: Dict[Optional[int], int],
+        per_user: Dict[Optional[int], int]
+    ) -> Optional[DebateTicket]:
+        """The next debate to start given the running counts, or None if every one is at a limit."""
+        candidates = [ticket for ticket in waiting if self._eligible(ticket, per_guild, per_user)]
+        if not candidates:
+            return None
+        # Fewest running debates in the guild first, then first come first served
+        return min(candidates, key=lambda t: per_guild.get(t.guild_id, 0))
+
+    def _dispatch(self):
+        """Start queued debates while there is capacity."""
+        while len(self.running) < self.max_concurrent:
+            ticket = self._pick(self.waiting, self._running_per_guild, self._running_per_user)
+            if ticket is None:
+                break
+            self.waiting.remove(ticket)
+            self._start(ticket)
+        self._report_positions()
+
+    def _queue_order(self) -> List[DebateTicket]:
+        """Waiting debates in the order _dispatch would start them as slots free up.
+
+        Debates held back by their guild or user limit come after those that could start.
+        """
+        waiting = list(self.waiting)
+        per_guild = dict(self._running_per_guild)
+        per_user = dict(self._running_per_user)
+        order = []
+        while waiting:
+            ticket = self._pick(waiting, per_guild, per_user)
+            if ticket is None:
+                ticket = min(waiting, key=lambda t: per_guild.get(t.guild_id, 0))
+            waiting.remove(ticket)
+            order.append(ticket)
+            per_guild[ticket.guild_id] = per_guild.get(ticket.guild_id, 0) + 1
+            per_user[ticket.user_id] = per_user.get(ticket.user_id, 0) + 1
+        return order
+
+    def _start(self, ticket: DebateTicket):
+        self.running[ticket.key] = ticket
+        self._running_per_guild[ticket.guild_id] = self._running_per_guild.get(ticket.guild_id, 0) + 1
+        self._running_per_user[ticket.user_id] = self._running_per_user.get(ticket.user_id, 0) + 1
+        ticket.task = asyncio.create_task(ticket.job())
+        ticket.task.add_done_callback(lambda task: self._finish(ticket, task))
+        logger.info(f"Started debate {ticket.key} ({len(self.running)} running, {len(self.waiting)} waiting)")
+
+    def _finish(self, ticket: DebateTicket, task: asyncio.Task):
+        del self.running[ticket.key]
+        self._running_per_guild[ticket.guild_id] -= 1
+        self._running_per_user[ticket.user_id] -= 1
+        if task.cancelled():
+            ticket._done.cancel()
+        elif task.exception() is not None:
+            ticket._done.set_exception(task.exception())
+        else:
+            ticket._done.set_result(task.result())
+        self._dispatch()
+
+    def _report_positions(self):
+        """Tell tickets whose position changed (0 means the debate started)."""
+        positions = {ticket.key: index + 1 for index, ticket in enumerate(self._queue_order())}
+        for ticket in list(self.running.values()) + self.waiting:
+            position = positions.get(ticket.key, 0)
+            if position == ticket.position:
+                continue
+            ticket.position = position
+            if ticket.on_position is not None:
+                task = asyncio.create_task(self._notify(ticket, position))
+                self._notifications.add(task)
+                task.add_done_callback(self._notifications.discard)
+
+    async def _notify(self, ticket: DebateTicket, position: int):
+        try:
+            await ticket.on_position(position)
+        except Exception as e:
+            logger.warning(f"Error reporting queue position for debate {ticket.key}: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": len(self.running), "waiting": len(self.waiting)}
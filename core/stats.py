@@ -0,0 +1,36 @@
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+# Number of recent calls kept per model
+STATS_WINDOW = 200
+
+class RollingStats:
+    """Latency and error statistics over a model's most recent calls."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        # (timestamp, succeeded) for each recent call
+        self.outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: Optional[float], ok: bool = True):
+        """Record one call; latency is only kept for successful calls."""
+        if ok and latency is not None:
+            self.latencies.append(latency)
+        self.outcomes.append((time.monotonic(), ok))
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0 < q <= 1) over the window, or None without samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
@@ -0,0 +1,161 @@
+import re
+import random
+import asyncio
+import logging
+from itertools import combinations
+from typing import Any, Dict, List, Optional
+
+from models.personality import Personality
+from core.debate import Debate, DebateOrchestrator
+from core.llm_service import split_verdict
+
+logger = logging.getLogger(__name__)
+
+BRACKETS = ("round_robin", "elimination")
+# Points for a match result
+WIN_POINTS = 1.0
+DRAW_POINTS = 0.5
+
+def find_winner(summary: str, names: List[str]) -> Optional[str]:
+    """The participant named on the summary's "Winner:" line, or None for a draw or no verdict line.
+
+    Only the verdict line counts, and only the name it starts with, so "Winner: Socrates, who
+    out-argued Nietzsche." is a win for Socrates.
+    """
+    _, verdict = split_verdict(summary)
+    if verdict is None:
+        return None
+    verdict = verdict.strip(" \t*_\"'“”").lower()
+    # Longest names first, so a name isn't mistaken for another that starts it
+    for name in sorted(names, key=len, reverse=True):
+        if re.match(re.escape(name.lower()) + r"\b", verdict):
+            return name
+    return None
+
+class Tournament:
+    """Pairwise debates between personalities on one topic and format, aggregated into standings.
+
+    Matches run concurrently, at most concurrency at a time. Every match shares the topic and
+    format, so each personality's opening statement is generated once and reused in all of its
+    matches, and moderator messages that don't depend on the debate come from the response cache.
+    Each match's winner is read from the verdict line its final summary ends with; a draw or
+    a missing verdict counts as a draw.
+    """
+
+    def __init__(
+        self,
+        orchestrator: DebateOrchestrator,
+        topic: str,
+        personalities: Optional[List[str]] = None,
+        debate_format: str = "classical",
+        concurrency: int = 8,
+        reuse_openings: bool = True,
+        seed: int = 0
+    ):
+        self.orchestrator = orchestrator
+        self.topic = topic
+        self.names = personalities or orchestrator.personality_manager.list_personalities()
+        self.debate_format = debate_format
+        self.reuse_openings = reuse_openings
+        self.random = random.Random(seed)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._openings: Dict[str, asyncio.Future] = {}
+        self.participants: List[Personality] = []
+        self.matches: List[Dict[str, Any]] = []
+
+    async def _opening(self, personality: Personality) -> Optional[str]:
+        future = self._openings.get(personality.name)
+        if future is None:
+            probe = Debate(self.topic, [personality], self.orchestrator.llm_service, debate_format=self.debate_format)
+            future = self._openings[personality.name] = asyncio.ensure_future(probe.opening_statement(personality))
+        text = await asyncio.shield(future)
+        if text is None and self._openings.get(personality.name) is future:
+            # Not shared: matches waiting on it generate their own, and the next match tries again
+            del self._openings[personality.name]
+        return text
+
+    async def _match(self, stage: str, first: Personality, second: Personality) -> Dict[str, Any]:
+        async with self._slots:
+            openings = None
+            if self.reuse_openings:
+                texts = await asyncio.gather(self._opening(first), self._opening(second))
+                openings = {p.name: text for p, text in zip((first, second), texts) if text is not None}
+            record = {"stage": stage, "participants": [first.name, second.name], "winner": None, "summary": None}
+            try:
+                debate = await self.orchestrator.start_debate(
+                    self.topic,
+                    [first.name, second.name],
+                    debate_format=self.debate_format,
+                    pipelined=True,
+                    incremental_summary=True,
+                    openings=openings
+                )
+                summary = None
+                async for title, content, reply_to in debate.run_rounds():
+                    if title == "FINAL SUMMARY":
+                        summary = content
+                record.update(summary=summary, winner=find_winner(summary or "", [first.name, second.name]))
+            except Exception as e:
+                logger.error(f"Match {first.name} vs {second.name} failed: {str(e)}")
+                record["error"] = str(e)
+            self.matches.append(record)
+            return record
+
+    async def _load(self):
+        self.participants = await self.orchestrator.load_personalities(self.names)
+        if len(self.participants) < 2:
+            raise ValueError("A tournament needs at least two personalities")
+
+    async def run_round_robin(self) -> List[Dict[str, Any]]:
+        """Every personality debates every other once; returns the standings."""
+        await self._load()
+        await asyncio.gather(*(
+            self._match("round_robin", first, second) for first, second in combinations(self.participants, 2)
+        ))
+        return self.standings()
+
+    async def run_elimination(self) -> List[Dict[str, Any]]:
+        """Single-elimination bracket in the given order, with byes up the top seeds; returns the standings.
+
+        A drawn match is decided by lot so the bracket can go on.
+        """
+        await self._load()
+        alive = list(self.participants)
+        stage = 1
+        while len(alive) > 1:
+            # Top seeds get byes until the field is a power of two
+            byes = (1 << (len(alive) - 1).bit_length()) - len(alive)
+            advancing, playing = alive[:byes], alive[byes:]
+            pairs = [(playing[i], playing[len(playing) - 1 - i]) for i in range(len(playing) // 2)]
+            results = await asyncio.gather(*(self._match(f"round_{stage}", first, second) for first, second in pairs))
+            for (first, second), record in zip(pairs, results):
+                winner = record["winner"]
+                if winner is None:
+                    winner = self.random.choice([first.name, second.name])
+                    record["decided_by_lot"] = winner
+                advancing.append(first if winner == first.name else second)
+            # Keep seeding order for the next round
+            order = {p.name: index for index, p in enumerate(self.participants)}
+            alive = sorted(advancing, key=lambda p: order[p.name])
+            stage += 1
+        return self.standings()
+
+    def standings(self) -> List[Dict[str, Any]]:
+        """Personalities by points, then wins, from the matches played so far."""
+        table = {p.name: {"personality": p.name, "played": 0, "wins": 0, "draws": 0, "losses": 0, "points": 0.0} for p in self.participants}
+        for match in self.matches:
+            if "error" in match:
+                continue
+            winner = match.get("decided_by_lot") or match["winner"]
+            for name in match["participants"]:
+                row = table[name]
+                row["played"] += 1
+                if winner is None:
+                    row["draws"] += 1
+                    row["points"] += DRAW_POINTS
+                elif winner == name:
+                    row["wins"] += 1
+                    row["points"] += WIN_POINTS
+                else:
+                    row["losses"] += 1
+        return sorted(table.values(), key=lambda row: (-row["points"], -row["wins"], row["personality"]))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import Optional, List, Dict
 
 class ModelPreference(BaseModel):
@@ -21,9 +21,13 @@ class Personality(BaseModel):
     core_beliefs: Optional[list[str]] = None
     debate_style: Optional[DebateStyle] = None
     model_preferences: Optional[List[ModelPreference]] = None
+    # Rendered system prompt, built on first use
+    _full_system_prompt: Optional[str] = PrivateAttr(default=None)
     
     def get_full_system_prompt(self) -> str:
         """Generate a comprehensive system prompt for the personality."""
+        if self._full_system_prompt is not None:
+            return self._full_system_prompt
         prompt = f"""You are {self.name}, a philosophical thinker with the following characteristics:
 
 Description: {self.description}
@@ -46,4 +50,5 @@ Additional Instructions:
 6. Maintain consistency with your stated beliefs and style
 
 {self.system_prompt}"""
+        self._full_system_prompt = prompt
         return prompt 
\ No newline at end of file
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class Base(DeclarativeBase):
+    pass
+
+class DebateRecord(Base):
+    __tablename__ = "debates"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    topic: Mapped[str] = mapped_column(Text)
+    debate_format: Mapped[str] = mapped_column(String(32))
+    personalities: Mapped[List[str]] = mapped_column(JSON)
+    # "running" until the final summary is stored, then "finished"
+    status: Mapped[str] = mapped_column(String(16), default="running", index=True)
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class TurnRecord(Base):
+    """One generated message: a moderator message, a personality turn or a summary."""
+
+    __tablename__ = "turns"
+    __table_args__ = (Index("ix_turns_debate", "debate_id", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    debate_id: Mapped[str] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"))
+    # opening, intro, turn, conclusion, round_summary or summary
+    kind: Mapped[str] = mapped_column(String(16))
+    round_index: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    round_type: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    speaker: Mapped[str] = mapped_column(String(64))
+    content: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+
+class LLMCallRecord(Base):
+    __tablename__ = "llm_calls"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Calls outside a debate have no debate id; not a foreign key so calls are never dropped
+    debate_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    personality: Mapped[str] = mapped_column(String(64))
+    provider: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    model: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    ok: Mapped[bool] = mapped_column(Boolean)
+    latency: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    ttft: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cost: Mapped[float] = mapped_column(Float, default=0.0)
+    retries: Mapped[int] = mapped_column(Integer, default=0)
+    fallbacks: Mapped[int] = mapped_column(Integer, default=0)
+    cache_hit: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
@@ -0,0 +1,46 @@
+import queue
+import asyncio
+
+import bot.batch
+from bot.batch import TranscriptWriter, _collect
+
+class FakeProcess:
+    def __init__(self, alive: bool, exitcode=None):
+        self.alive = alive
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return self.alive
+
+def test_a_dead_worker_fails_its_debates_instead_of_hanging(tmp_path, monkeypatch):
+    monkeypatch.setattr("bot.batch.WORKER_POLL_INTERVAL", 0.01)
+    jobs = {job_id: {"id": job_id, "topic": "Is free will an illusion?"} for job_id in ("a", "b", "c")}
+    results = queue.Queue()
+    # Worker 0 finishes "a" and exits; worker 1 is killed while running "b" and "c"
+    results.put(("started", 0, "a"))
+    results.put(("started", 1, "b"))
+    results.put(("started", 1, "c"))
+    results.put(("record", 0, {"id": "a", "topic": "Is free will an illusion?", "status": "ok", "wall_seconds": 1.0}))
+    results.put(("exit", 0))
+    writer = TranscriptWriter(str(tmp_path / "out.jsonl"), len(jobs))
+
+    _collect([FakeProcess(False, 0), FakeProcess(False, -9)], results, jobs, writer)
+    writer.close()
+
+    assert writer.finished == 3
+    assert writer.failed == 2
+
+def test_each_worker_gets_its_share_of_the_rate_limits(monkeypatch):
+    orchestrators = []
+
+    class RecordingOrchestrator(bot.batch.DebateOrchestrator):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            orchestrators.append(self)
+
+    async def next_job():
+        return None
+
+    monkeypatch.setattr(bot.batch, "DebateOrchestrator", RecordingOrchestrator)
+    asyncio.run(bot.batch.run_jobs(next_job, lambda record: None, 2, admission_share=0.25))
+    assert orchestrators[0].llm_service.admission.share == 0.25
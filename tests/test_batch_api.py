@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.batch_api import BatchExecutor, BatchRequestError, FileBatchEndpoint
+
+async def _echo(request):
+    prompt = request["messages"][-1]["content"]
+    if prompt.startswith("fail"):
+        raise RuntimeError("model overloaded")
+    return f"re: {prompt}", SimpleNamespace(prompt_tokens=3, completion_tokens=2)
+
+def _request(prompt):
+    return {"model": "mock-fast", "messages": [{"role": "user", "content": prompt}], "max_tokens": 50}
+
+def _executor(tmp_path, batch_format, endpoint_class=FileBatchEndpoint, **options):
+    endpoint = endpoint_class(str(tmp_path), _echo, batch_format=batch_format, processing_delay=0.0, poll_interval=0.01)
+    return BatchExecutor({"mock": endpoint}, **options)
+
+@pytest.mark.parametrize("batch_format", ["openai", "anthropic"])
+def test_a_full_batch_is_submitted_without_waiting(tmp_path, batch_format):
+    async def scenario():
+        executor = _executor(tmp_path, batch_format, max_batch_size=3, flush_interval=60)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(executor.complete("mock", _request(f"turn {n}")) for n in range(3))), 5
+        )
+        # Every caller gets the answer to its own request back
+        assert [text for text, _ in results] == ["re: turn 0", "re: turn 1", "re: turn 2"]
+        usage = results[0][1]
+        assert (usage.prompt_tokens if batch_format == "openai" else usage.input_tokens) == 3
+        assert executor.stats["batches"] == 1
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("batch_format", ["openai", "anthropic"])
+def test_a_partial_batch_is_submitted_after_the_flush_interval(tmp_path, batch_format):
+    async def scenario():
+        executor = _executor(tmp_path, batch_format, max_batch_size=100, flush_interval=0.05)
+        first = asyncio.create_task(executor.complete("mock", _request("opening")))
+        await asyncio.sleep(0.01)
+        second = executor.complete("mock", _request("summary"))
+        results = await asyncio.wait_for(asyncio.gather(first, second), 5)
+        assert [text for text, _ in results] == ["re: opening", "re: summary"]
+        assert executor.stats["batches"] == 1
+        assert executor.stats["largest_batch"] == 2
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("batch_format", ["openai", "anthropic"])
+def test_an_errored_result_raises_in_its_caller(tmp_path, batch_format):
+    async def scenario():
+        executor = _executor(tmp_path, batch_format, max_batch_size=2)
+        ok, failed = await asyncio.wait_for(asyncio.gather(
+            executor.complete("mock", _request("turn")),
+            executor.complete("mock", _request("fail turn")),
+            return_exceptions=True
+        ), 5)
+        assert ok[0] == "re: turn"
+        assert isinstance(failed, BatchRequestError)
+        assert "model overloaded" in str(failed)
+        assert executor.stats["failed_requests"] == 1
+
+    asyncio.run(scenario())
+
+class LossyEndpoint(FileBatchEndpoint):
+    """Drops the last result line, as an expired batch does for requests it never ran."""
+
+    async def poll(self, batch_id):
+        lines = await super().poll(batch_id)
+        return lines[:-1] if lines else lines
+
+@pytest.mark.parametrize("batch_format", ["openai", "anthropic"])
+def test_a_result_missing_from_the_output_fails_instead_of_hanging(tmp_path, batch_format):
+    async def scenario():
+        executor = _executor(tmp_path, batch_format, LossyEndpoint, max_batch_size=2)
+        ok, missing = await asyncio.wait_for(asyncio.gather(
+            executor.complete("mock", _request("turn 0")),
+            executor.complete("mock", _request("turn 1")),
+            return_exceptions=True
+        ), 5)
+        assert ok[0] == "re: turn 0"
+        assert isinstance(missing, BatchRequestError)
+        assert "missing" in str(missing)
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+import asyncio
+
+from core.cache import CompletionCache
+
+def test_follower_recomputes_when_leader_is_cancelled():
+    async def scenario():
+        cache = CompletionCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return f"value {len(calls)}"
+
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        value = await follower
+        assert leader.cancelled()
+        assert not follower.cancelled()
+        assert value == "value 2"
+        assert await cache.get("key") == "value 2"
+
+    asyncio.run(scenario())
+
+def test_one_follower_takes_over_for_the_others():
+    async def scenario():
+        cache = CompletionCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await asyncio.gather(*followers) == ["value"] * 3
+        # The cancelled call and the one that took over
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+def test_followers_share_the_leaders_failure():
+    async def scenario():
+        cache = CompletionCache()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("upstream failed")
+
+        tasks = [asyncio.create_task(cache.get_or_compute("key", compute)) for _ in range(2)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await cache.get("key") is None
+
+    asyncio.run(scenario())
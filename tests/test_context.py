@@ -0,0 +1,37 @@
+import asyncio
+
+from core.context import ConversationContext
+from core.llm_service import LLMService
+from core.personality import PersonalityManager
+from models.personality import ModelPreference
+
+MODEL = ModelPreference(provider="anthropic", model_name="claude-3-opus-20240229")
+
+def _cached_prefix(request):
+    """The system prompt and the history texts up to and including the last cache breakpoint."""
+    history = request["messages"][0]["content"]
+    marked = max(index for index, block in enumerate(history) if "cache_control" in block)
+    return request["system"], [block["text"] for block in history[:marked + 1]]
+
+def test_consecutive_anthropic_requests_share_the_cached_prefix():
+    async def scenario():
+        service = LLMService(prompt_caching=True)
+        socrates = await PersonalityManager.shared().get_personality("socrates")
+        context = ConversationContext()
+        prefixes = []
+        for turn in range(24):
+            speaker = ("Socrates", "Nietzsche")[turn % 2]
+            context.append(speaker, f"Point {turn}. " + "The unexamined life is not worth living. " * 16, "rebuttal")
+            request = service._build_request(MODEL, *service._build_prompts(MODEL, socrates, "Is free will an illusion?", context))
+            prefixes.append(_cached_prefix(request))
+        await service.close()
+        return prefixes
+
+    prefixes = asyncio.run(scenario())
+    shared = 0
+    for (system, history), (next_system, next_history) in zip(prefixes, prefixes[1:]):
+        assert next_system == system
+        if next_history[:len(history)] == history:
+            shared += 1
+    # The window start moves at most once every few turns once the history outgrows its budget
+    assert shared >= (len(prefixes) - 1) * 3 // 4 - 1
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from core.debate import FORMATS, DebateFormat, DebateOrchestrator, StreamingTurn
+from core.llm_service import LLMService
+from models.personality import ModelPreference
+
+def _orchestrator() -> DebateOrchestrator:
+    service = LLMService(model_override=ModelPreference(provider="mock", model_name="mock-fast"))
+    service.model_configs["mock"]["mock-fast"]["mock"] = {
+        "ttft_mean": 0.002, "ttft_stddev": 0.001, "tokens_per_second": 100000, "response_tokens": 20,
+        "error_rate": 0.0, "refusal_rate": 0.0, "rate_limit_rate": 0.0
+    }
+    return DebateOrchestrator(service)
+
+async def _order(orchestrator, debate_format, pipelined):
+    debate = await orchestrator.start_debate(
+        "Is free will an illusion?",
+        ["socrates", "nietzsche", "john doe"],
+        debate_format=debate_format,
+        pipelined=pipelined,
+        incremental_summary=pipelined
+    )
+    messages = [(title, content, reply_to) async for title, content, reply_to in debate.run_rounds()]
+    contents = [content for _, content, _ in messages]
+    # Mock replies are random, so compare which earlier message each one replies to
+    return [(title, contents.index(reply_to) if reply_to else None) for title, _, reply_to in messages]
+
+@pytest.mark.parametrize("debate_format", sorted(FORMATS))
+def test_pipelined_runs_yield_messages_in_the_sequential_order(debate_format):
+    async def scenario():
+        orchestrator = _orchestrator()
+        sequential = await _order(orchestrator, debate_format, pipelined=False)
+        pipelined = await _order(orchestrator, debate_format, pipelined=True)
+        await orchestrator.llm_service.close()
+        return sequential, pipelined
+
+    sequential, pipelined = asyncio.run(scenario())
+    assert pipelined == sequential
+    assert sequential[-1][0] == "FINAL SUMMARY"
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_independent_stages_yield_messages_in_speaking_order(stream):
+    async def order(orchestrator, concurrent):
+        debate = await orchestrator.start_debate(
+            "Is free will an illusion?", ["socrates", "nietzsche", "john doe"], debate_format="classical"
+        )
+        if not concurrent:
+            shared = debate.current_format
+            debate.current_format = DebateFormat(shared.name, shared.description, shared.structure)
+        messages = []
+        async for title, content, reply_to in debate.run_rounds(stream=stream):
+            if isinstance(content, StreamingTurn):
+                content = await content.result()
+            messages.append((title, content, reply_to))
+        contents = [content for _, content, _ in messages]
+        return [(title, contents.index(reply_to) if reply_to else None) for title, _, reply_to in messages]
+
+    async def scenario():
+        orchestrator = _orchestrator()
+        sequential = await order(orchestrator, concurrent=False)
+        concurrent = await order(orchestrator, concurrent=True)
+        await orchestrator.llm_service.close()
+        return sequential, concurrent
+
+    sequential, concurrent = asyncio.run(scenario())
+    assert concurrent == sequential
@@ -0,0 +1,20 @@
+from core.length import LengthPolicy, StreamLimiter
+
+def test_deltas_pass_through_until_the_limit():
+    limiter = StreamLimiter(40)
+    assert limiter.feed("Socrates asks") == ("Socrates asks", False)
+    assert limiter.feed(" a question") == (" a question", False)
+    assert not limiter.truncated
+
+def test_stopped_stream_is_cut_back_to_a_sentence():
+    policy = LengthPolicy({"length": {"turn_chars": 20, "overrun": 2.0}})
+    limiter = StreamLimiter(policy.limit(20))
+    shown = ""
+    for delta in ["Virtue is knowledge. ", "Nobody errs willingly, ", "and so on and so forth."]:
+        text, stop = limiter.feed(delta)
+        shown += text
+        if stop:
+            break
+    assert stop and limiter.truncated
+    assert len(shown) == 41
+    assert policy.enforce(shown, 20) == ("Virtue is knowledge.", True)
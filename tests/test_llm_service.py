@@ -0,0 +1,46 @@
+import asyncio
+
+from core.cache import MODERATOR_CACHE
+from core.llm_service import LLMService
+from core.metrics import CallMetrics
+from models.personality import ModelPreference
+
+MODEL = ModelPreference(provider="mock", model_name="mock-fast")
+
+def _service(ttft: float = 0.05) -> LLMService:
+    service = LLMService(model_override=MODEL)
+    service.model_configs["mock"]["mock-fast"]["mock"] = {
+        "ttft_mean": ttft, "ttft_stddev": 0.0, "tokens_per_second": 100000, "response_tokens": 10,
+        "error_rate": 0.0, "refusal_rate": 0.0, "rate_limit_rate": 0.0
+    }
+    return service
+
+def _request(model_config: ModelPreference):
+    return {"model": model_config.model_name, "messages": [{"role": "user", "content": "Open the debate."}], "max_tokens": 50}
+
+def test_cached_and_shared_answers_dont_count_as_model_latency():
+    async def scenario():
+        service = _service()
+        # Three concurrent calls share one request, then three more are answered from the cache
+        await asyncio.gather(*(service._attempt(MODEL, _request, MODERATOR_CACHE) for _ in range(3)))
+        for _ in range(3):
+            await service._attempt(MODEL, _request, MODERATOR_CACHE)
+        assert service._get_stats(MODEL).count == 1
+        await service.close()
+
+    asyncio.run(scenario())
+
+def test_admission_wait_is_kept_out_of_model_latency():
+    async def scenario():
+        service = _service(ttft=0.2)
+        service.model_configs["mock"]["mock-fast"]["rate_limits"] = {"max_in_flight": 1}
+        calls = [CallMetrics("Socrates"), CallMetrics("Nietzsche")]
+        await asyncio.gather(*(service._attempt(MODEL, _request, call=call) for call in calls))
+        waits = sorted(call.queue_wait for call in calls)
+        # The second request queued behind the first, but the model answered both at the same speed
+        assert waits[1] >= 0.15
+        assert max(service._get_stats(MODEL).latencies) < 0.35
+        assert all(0.15 <= call.provider_latency < 0.35 for call in calls)
+        await service.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+from core.metrics import CallMetrics, MetricsCollector
+
+CONFIGS = {"openai": {"gpt": {"cost_per_1k_tokens": 0.5}}}
+
+def _call(collector, ok=True, cache_hit=False, debate_id="d1"):
+    call = CallMetrics("socrates", debate_id)
+    call.provider, call.model = "openai", "gpt"
+    call.cache_hit = cache_hit
+    collector.record_usage(call, "openai", "gpt", 1500, 500)
+    call.provider_latency = 1.5
+    call.queue_wait = 0.25
+    return call
+
+def test_calls_are_aggregated_per_model_personality_and_debate():
+    collector = MetricsCollector(CONFIGS)
+    finished = []
+    collector.listeners.append(finished.append)
+    collector.finish(_call(collector), ok=True)
+    collector.finish(_call(collector, cache_hit=True), ok=True)
+    collector.finish(_call(collector), ok=False)
+
+    aggregate = collector.by_model[("openai", "gpt", "socrates")]
+    assert aggregate.calls == 3
+    assert aggregate.errors == 1
+    assert aggregate.cache_hits == 1
+    assert aggregate.prompt_tokens == 4500
+    assert round(aggregate.cost, 6) == 3.0
+    assert aggregate.fresh_calls == 1
+    assert collector.by_personality["socrates"].calls == 3
+    assert collector.by_debate["d1"].queue_wait_sum == 0.75
+    assert len(finished) == 3
+
+def test_merged_calls_are_aggregated_without_listeners():
+    collector = MetricsCollector(CONFIGS)
+    finished = []
+    collector.listeners.append(finished.append)
+    call = _call(collector)
+    call.ok, call.latency = True, 2.0
+    collector.merge(call)
+
+    assert collector.by_model[("openai", "gpt", "socrates")].latency_sum == 2.0
+    assert collector.by_debate["d1"].calls == 1
+    assert finished == []
+
+def test_prometheus_text_and_snapshot_include_sources():
+    collector = MetricsCollector(CONFIGS)
+    collector.finish(_call(collector), ok=True)
+    collector.finish(_call(collector), ok=False)
+    collector.add_source("admission", lambda: {"openai/gpt": {"admitted": 2, "wait_seconds_total": 0.5}}, label="limiter")
+    collector.add_source("response_cache", lambda: {"hits": 3, "misses": 1})
+
+    text = collector.prometheus_text()
+    lines = text.splitlines()
+    labels = '{provider="openai",model="gpt",personality="socrates"'
+    assert "# TYPE thinktank_llm_calls_total counter" in lines
+    assert f'thinktank_llm_calls_total{labels},status="ok"}} 1' in lines
+    assert f'thinktank_llm_calls_total{labels},status="error"}} 1' in lines
+    assert f"thinktank_llm_prompt_tokens_total{labels}}} 3000" in lines
+    assert f"thinktank_llm_latency_seconds_count{labels}}} 2" in lines
+    assert "# TYPE thinktank_admission_wait_seconds_total gauge" in lines
+    assert 'thinktank_admission_admitted{limiter="openai/gpt"} 2' in lines
+    assert 'thinktank_admission_wait_seconds_total{limiter="openai/gpt"} 0.500000' in lines
+    assert "thinktank_response_cache_hits 3" in lines
+    assert text.endswith("\n")
+
+    snapshot = collector.snapshot()
+    assert snapshot["admission"] == {"openai/gpt": {"admitted": 2, "wait_seconds_total": 0.5}}
+    assert snapshot["response_cache"] == {"hits": 3, "misses": 1}
+    assert snapshot["models"][0]["calls"] == 2
+
+def test_a_failing_source_is_left_out():
+    collector = MetricsCollector(CONFIGS)
+
+    def broken():
+        raise RuntimeError("gone")
+
+    collector.add_source("broken", broken)
+    assert "broken" not in collector.snapshot()
+    assert "thinktank_broken" not in collector.prometheus_text()
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+
+from core.personality import PersonalityManager
+
+def _write(directory, filename, mtime, **data):
+    path = directory / filename
+    path.write_text(json.dumps({"description": "A thinker", "system_prompt": "Think.", **data}))
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_shared_registry():
+    assert PersonalityManager.shared() is PersonalityManager.shared()
+
+def test_personalities_are_validated_on_first_use(tmp_path):
+    _write(tmp_path, "socrates.json", 1000, name="Socrates")
+    # Indexed by name, but the missing system_prompt only shows once it is used
+    (tmp_path / "broken.json").write_text(json.dumps({"name": "Broken", "description": "No prompt"}))
+    manager = PersonalityManager(str(tmp_path))
+    assert sorted(manager.list_personalities()) == ["broken", "socrates"]
+    entry = manager._entries["socrates.json"]
+    assert entry.personality is None and entry.data is not None
+
+    async def scenario():
+        socrates = await manager.get_personality("SOCRATES")
+        assert socrates.name == "Socrates"
+        assert entry.personality is socrates and entry.data is None
+        assert await manager.get_personality("broken") is None
+
+    asyncio.run(scenario())
+
+def test_refresh_follows_file_mtimes(tmp_path):
+    path = _write(tmp_path, "socrates.json", 1000, name="Socrates")
+    (tmp_path / "bad.json").write_text("{not json")
+    manager = PersonalityManager(str(tmp_path))
+    assert manager.list_personalities() == ["socrates"]
+    assert "bad.json" in manager._failed
+
+    async def scenario():
+        first = await manager.get_personality("socrates")
+        await manager.refresh()
+        assert await manager.get_personality("socrates") is first
+
+        _write(tmp_path, "socrates.json", 2000, name="Socrates", description="Edited")
+        await manager.refresh()
+        assert (await manager.get_personality("socrates")).description == "Edited"
+
+        # A file added since the last scan is found on lookup
+        _write(tmp_path, "nietzsche.json", 1000, name="Nietzsche")
+        assert (await manager.get_personality("nietzsche")).name == "Nietzsche"
+
+        # A failed file is retried once it is edited
+        _write(tmp_path, "bad.json", 3000, name="Fixed")
+        await manager.refresh()
+        assert "bad.json" not in manager._failed
+        assert await manager.get_personality("fixed") is not None
+
+        path.unlink()
+        await manager.refresh()
+        assert await manager.get_personality("socrates") is None
+        assert sorted(manager.list_personalities()) == ["fixed", "nietzsche"]
+
+    asyncio.run(scenario())
+
+def test_scan_leaves_the_index_alone(tmp_path):
+    _write(tmp_path, "socrates.json", 1000, name="Socrates")
+    manager = PersonalityManager(str(tmp_path))
+    _write(tmp_path, "socrates.json", 2000, name="Socrates")
+    (tmp_path / "bad.json").write_text("{not json")
+
+    changed, failed, removed = manager._scan(*manager._snapshot())
+    assert [entry.filename for entry in changed] == ["socrates.json"]
+    assert list(failed) == ["bad.json"] and removed == []
+    # Nothing changes until the results are applied on the loop
+    assert manager._entries["socrates.json"].mtime == 1000
+    assert manager._failed == {}
+    manager._apply(changed, failed, removed)
+    assert manager._entries["socrates.json"].mtime == 2000
+    assert list(manager._failed) == ["bad.json"]
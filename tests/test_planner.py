@@ -0,0 +1,107 @@
+import time
+import asyncio
+
+from core.debate import FORMATS, DebateOrchestrator
+from core.llm_service import LLMService
+from core.metrics import CallMetrics
+from core.planner import DebateBudget, DebatePlanner
+from models.personality import ModelPreference, Personality
+
+FAST = ModelPreference(provider="mock", model_name="mock-fast")
+SLOW = ModelPreference(provider="mock", model_name="mock-slow")
+SOCRATIC = {"socratic": FORMATS["socratic"]}
+
+def _planner():
+    service = LLMService()
+    service.default_model = FAST
+    personalities = [
+        Personality(name=name, description=name, system_prompt="", model_preferences=[SLOW, FAST])
+        for name in ("Socrates", "Nietzsche")
+    ]
+    return DebatePlanner(service, seed=1), personalities
+
+def test_a_tight_budget_picks_cheaper_models_then_fewer_rounds():
+    planner, personalities = _planner()
+    full = planner.plan(personalities, DebateBudget(cost=10.0), SOCRATIC)
+    assert (full.tier, len(full.stages)) == ("preferred", 3)
+
+    cheaper = planner.plan(personalities, DebateBudget(cost=full.cost / 2), SOCRATIC)
+    assert cheaper.fits
+    assert len(cheaper.stages) == 3
+    assert {model.model_name for model in cheaper.models.values()} == {"mock-fast"}
+
+    shorter = planner.plan(personalities, DebateBudget(cost=cheaper.cost * 0.8), SOCRATIC)
+    assert shorter.fits
+    assert len(shorter.stages) < 3
+    # The closing round is kept when middle rounds are dropped
+    assert shorter.stages[-1] is FORMATS["socratic"].structure[-1]
+
+def test_observed_estimates_only_use_successful_uncached_calls():
+    planner, _ = _planner()
+    metrics = planner.llm_service.metrics
+
+    def finish(latency, ok=True, cache_hit=False):
+        call = CallMetrics("Socrates")
+        call.provider, call.model, call.cost, call.cache_hit = "mock", "mock-slow", 0.01, cache_hit
+        call.start = time.monotonic() - latency
+        metrics.finish(call, ok)
+
+    for _ in range(5):
+        finish(2.0)
+    finish(30.0, ok=False)
+    finish(0.0, cache_hit=True)
+    seconds, cost = planner.call_estimate("turn", SLOW)
+    assert abs(seconds - 2.0) < 0.05
+    assert abs(cost - 0.01) < 1e-9
+
+def _orchestrator():
+    service = LLMService(model_override=FAST)
+    service.model_configs["mock"]["mock-fast"]["mock"] = {
+        "ttft_mean": 0.002, "ttft_stddev": 0.001, "tokens_per_second": 100000, "response_tokens": 20,
+        "error_rate": 0.0, "refusal_rate": 0.0, "rate_limit_rate": 0.0
+    }
+    # Plan as if every call took a second, however fast the mock answers
+    service.model_configs["mock"]["mock-fast"]["expected_latency_seconds"] = 1.0
+    return DebateOrchestrator(service)
+
+def test_an_overrunning_debate_is_replanned_with_fewer_rounds():
+    async def scenario():
+        orchestrator = _orchestrator()
+        budget = DebateBudget(wall_seconds=30.0)
+        debate = await orchestrator.start_debate(
+            "Is free will an illusion?", ["socrates", "nietzsche"], debate_format="socratic", budget=budget
+        )
+        assert len(debate.plan.stages) == 3
+        debate.current_round = 1
+        debate.started_at = time.monotonic() - 1.0
+        assert orchestrator.planner.replan(debate, budget) is None
+        # A slow first round leaves room for only one more
+        debate.started_at = time.monotonic() - 20.0
+        plan = orchestrator.planner.replan(debate, budget)
+        await orchestrator.llm_service.close()
+        return debate, plan
+
+    debate, plan = asyncio.run(scenario())
+    structure = FORMATS["socratic"].structure
+    assert plan is not None
+    assert plan.stages[0] is structure[0]
+    assert plan.stages[1:] == [structure[-1]]
+
+def test_running_out_of_budget_ends_the_round_and_goes_to_the_summary():
+    async def scenario():
+        orchestrator = _orchestrator()
+        budget = DebateBudget(wall_seconds=60.0)
+        debate = await orchestrator.start_debate(
+            "Is free will an illusion?", ["socrates", "nietzsche"], debate_format="socratic", budget=budget
+        )
+        titles = []
+        async for title, _, _ in debate.run_rounds():
+            titles.append(title)
+            if title == "ROUND 1":
+                # The first round started late: the second speaker no longer fits
+                debate.started_at = time.monotonic() - 55.0
+        await orchestrator.llm_service.close()
+        return titles
+
+    titles = asyncio.run(scenario())
+    assert titles == ["DEBATE STARTED", "MODERATOR", "ROUND 1", "Socrates", "MODERATOR", "DEBATE ENDED", "FINAL SUMMARY"]
@@ -0,0 +1,20 @@
+from core.rate_limit import AdmissionController
+
+CONFIGS = {
+    "openai": {"gpt": {"rate_limits": {"max_in_flight": 5, "requests_per_minute": 600, "tokens_per_minute": 90000}}},
+    "provider_limits": {"openai": {"max_in_flight": 3}}
+}
+
+def test_a_share_of_the_limits_per_worker():
+    admission = AdmissionController(CONFIGS, share=0.25)
+    model = admission._limiter("openai", "gpt")
+    assert model.slots.max_in_flight == 1
+    assert model.requests.capacity == 150
+    assert model.tokens.capacity == 22500
+    # Every worker can still send one request at a time
+    assert admission._limiter("openai", None).slots.max_in_flight == 1
+
+def test_full_limits_by_default():
+    admission = AdmissionController(CONFIGS)
+    assert admission._limiter("openai", "gpt").slots.max_in_flight == 5
+    assert admission._limiter("openai", None).slots.max_in_flight == 3
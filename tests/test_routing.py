@@ -0,0 +1,35 @@
+import time
+
+from core.routing import ModelRouter
+from core.stats import RollingStats
+from models.personality import ModelPreference
+
+def _router():
+    stats = {}
+    return ModelRouter({}, lambda m: stats.setdefault((m.provider, m.model_name), RollingStats()))
+
+def _half_open(router, model_config):
+    for _ in range(router.failure_threshold):
+        router.record(model_config, ok=False)
+    router.breaker(model_config).opened_at = time.monotonic() - router.reset_seconds
+
+def test_ordering_leaves_a_half_open_probe_untaken():
+    router = _router()
+    first = ModelPreference(provider="mock", model_name="mock-fast")
+    second = ModelPreference(provider="mock", model_name="mock-slow")
+    _half_open(router, first)
+    for _ in range(3):
+        assert router.order([first, second]) == [first, second]
+    assert router.breaker(first).state == "half_open"
+
+def test_next_model_takes_the_probe_once():
+    router = _router()
+    first = ModelPreference(provider="mock", model_name="mock-fast")
+    second = ModelPreference(provider="mock", model_name="mock-slow")
+    _half_open(router, first)
+    remaining = router.order([first, second])
+    assert router.next_model(remaining) == first
+    # A concurrent call ordered while the breaker was half-open goes to the other model
+    assert router.next_model([first, second]) == second
+    # With nothing else left, the open model is still tried
+    assert router.next_model([first]) == first
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from core.scheduler import DebateCancelled, DebateScheduler, SchedulerFull
+
+def _blocked(release: asyncio.Event, started: list, key):
+    async def job():
+        started.append(key)
+        await release.wait()
+        return key
+    return job
+
+def test_per_guild_and_per_user_caps():
+    async def scenario():
+        scheduler = DebateScheduler(max_concurrent=4, max_per_guild=2, max_per_user=1)
+        release, started = asyncio.Event(), []
+        for key, guild, user in [("a1", 1, 10), ("a2", 1, 11), ("a3", 1, 12), ("b1", 2, 20), ("b2", 2, 20)]:
+            scheduler.submit(key, _blocked(release, started, key), guild, user)
+        await asyncio.sleep(0)
+        # Guild 1 is at its limit of two, and user 20 at their limit of one
+        assert sorted(started) == ["a1", "a2", "b1"]
+        assert [ticket.key for ticket in scheduler.waiting] == ["a3", "b2"]
+        release.set()
+
+    asyncio.run(scenario())
+
+def test_a_full_queue_rejects_new_debates():
+    async def scenario():
+        scheduler = DebateScheduler(max_concurrent=1, max_queue=1)
+        release, started = asyncio.Event(), []
+        scheduler.submit("first", _blocked(release, started, "first"), 1, 10)
+        scheduler.submit("second", _blocked(release, started, "second"), 2, 20)
+        with pytest.raises(SchedulerFull):
+            scheduler.submit("third", _blocked(release, started, "third"), 3, 30)
+        release.set()
+
+    asyncio.run(scenario())
+
+def test_positions_follow_the_fair_dispatch_order():
+    async def scenario():
+        scheduler = DebateScheduler(max_concurrent=2, max_per_guild=2, max_per_user=2)
+        releases = {key: asyncio.Event() for key in ("a1", "c1", "a2", "a3", "b1")}
+        started = []
+        positions = {}
+
+        def reporter(key):
+            async def on_position(position):
+                positions[key] = position
+            return on_position
+
+        for key, guild, user in [("a1", 1, 10), ("c1", 3, 30), ("a2", 1, 11), ("a3", 1, 12), ("b1", 2, 20)]:
+            scheduler.submit(key, _blocked(releases[key], started, key), guild, user, on_position=reporter(key))
+        await asyncio.sleep(0)
+        # Guild 2 has nothing running, so its debate is ahead of guild 1's second and third
+        assert positions == {"a1": 0, "c1": 0, "b1": 1, "a2": 2, "a3": 3}
+        releases["c1"].set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert started == ["a1", "c1", "b1"]
+        assert positions["a2"] == 1 and positions["a3"] == 2
+        for release in releases.values():
+            release.set()
+
+    asyncio.run(scenario())
+
+def test_cancelling_a_queued_debate():
+    async def scenario():
+        scheduler = DebateScheduler(max_concurrent=1)
+        release, started = asyncio.Event(), []
+        scheduler.submit("running", _blocked(release, started, "running"), 1, 10)
+        queued = scheduler.submit("queued", _blocked(release, started, "queued"), 2, 20)
+        assert scheduler.cancel("queued")
+        with pytest.raises(DebateCancelled):
+            await queued.wait()
+        release.set()
+        await asyncio.sleep(0)
+        assert started == ["running"]
+
+    asyncio.run(scenario())
+
+def test_cancelling_a_running_debate_starts_the_next():
+    async def scenario():
+        scheduler = DebateScheduler(max_concurrent=1)
+        release, started = asyncio.Event(), []
+        running = scheduler.submit("running", _blocked(release, started, "running"), 1, 10)
+        queued = scheduler.submit("queued", _blocked(release, started, "queued"), 2, 20)
+        await asyncio.sleep(0)
+        assert scheduler.cancel("running")
+        with pytest.raises(DebateCancelled):
+            await running.wait()
+        await asyncio.sleep(0)
+        assert started == ["running", "queued"]
+        release.set()
+        assert await queued.wait() == "queued"
+
+    asyncio.run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from bot.sender import ThreadSender
+
+class FakeMessage:
+    def __init__(self, thread, content):
+        self.thread = thread
+        self.content = content
+        self.edits = []
+
+    async def edit(self, content):
+        self.edits.append(content)
+        self.content = content
+        return self
+
+class FakeThread:
+    """Records every post with the loop time it was made at."""
+
+    def __init__(self):
+        self.posts = []
+
+    async def send(self, content, reference=None):
+        if content == "boom":
+            raise RuntimeError("403 Forbidden")
+        message = FakeMessage(self, content)
+        self.posts.append((asyncio.get_running_loop().time(), content, reference))
+        return message
+
+def test_adjacent_plain_messages_merge_up_to_the_limit():
+    async def scenario():
+        thread = FakeThread()
+        sender = ThreadSender(thread)
+        futures = [sender.send(letter * 900) for letter in "abc"]
+        await sender.close()
+        assert [content for _, content, _ in thread.posts] == ["a" * 900 + "\n" + "b" * 900, "c" * 900]
+        assert futures[0].result() is futures[1].result()
+        assert futures[1].result() is not futures[2].result()
+
+    asyncio.run(scenario())
+
+def test_referenced_and_editable_messages_are_never_merged():
+    async def scenario():
+        thread = FakeThread()
+        sender = ThreadSender(thread)
+        first = sender.send("Opening")
+        sender.send("Thinking...", editable=True)
+        sender.send("Moderator")
+        sender.send("Reply", reference=first)
+        await sender.close()
+        assert [content for _, content, _ in thread.posts] == ["Opening", "Thinking...", "Moderator", "Reply"]
+        assert thread.posts[3][2] is first.result()
+
+    asyncio.run(scenario())
+
+def test_a_burst_of_edits_collapses_to_the_latest_content():
+    async def scenario():
+        thread = FakeThread()
+        sender = ThreadSender(thread)
+        target = sender.send("Socrates is thinking...", editable=True)
+        message = await target
+        text = ""
+        for word in "The unexamined life is not worth living".split():
+            text += word + " "
+            sender.edit(target, text)
+        await sender.close()
+        assert message.edits == [text]
+        assert sender.stats["edits_coalesced"] == 6
+
+    asyncio.run(scenario())
+
+def test_posts_stay_within_the_rate_limit():
+    async def scenario():
+        thread = FakeThread()
+        sender = ThreadSender(thread, rate=5, per=0.2)
+        for n in range(12):
+            # Editable messages are posted one by one
+            sender.send(f"Turn {n}", editable=True)
+        await sender.close()
+        times = [at for at, _, _ in thread.posts]
+        assert len(times) == 12
+        for earlier, later in zip(times, times[5:]):
+            assert later - earlier >= 0.2 - 0.01
+        assert sender.stats["throttled_seconds"] > 0
+
+    asyncio.run(scenario())
+
+def test_a_failed_post_resolves_its_future_with_the_error():
+    async def scenario():
+        thread = FakeThread()
+        sender = ThreadSender(thread)
+        failed = sender.send("boom", editable=True)
+        sent = sender.send("Still here")
+        await sender.close()
+        with pytest.raises(RuntimeError, match="403"):
+            await failed
+        assert (await sent).content == "Still here"
+
+    asyncio.run(scenario())
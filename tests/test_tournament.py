@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.llm_service import LLMService
+from core.personality import PersonalityManager
+from core.tournament import Tournament, find_winner
+from models.personality import ModelPreference
+
+NAMES = ["Socrates", "Nietzsche", "John Doe"]
+
+def test_winner_from_the_verdict_line():
+    summary = (
+        "Socrates pressed Nietzsche on whether the will to power can ground any value, "
+        "and Nietzsche answered that Socratic reason is itself a symptom of decline.\n\n"
+        "Winner: Socrates, who out-argued Nietzsche."
+    )
+    assert find_winner(summary, NAMES) == "Socrates"
+
+def test_winner_with_markdown_emphasis():
+    assert find_winner("A close debate on free will.\n\n**Winner:** Nietzsche", NAMES) == "Nietzsche"
+    assert find_winner("Both made their case.\nWinner: **John Doe** for his plain examples.", NAMES) == "John Doe"
+
+def test_only_the_verdict_line_counts():
+    summary = "Many would say Socrates wins over Nietzsche on rhetoric alone.\nWinner: Nietzsche"
+    assert find_winner(summary, NAMES) == "Nietzsche"
+    assert find_winner("Socrates wins over Nietzsche.", NAMES) is None
+
+def test_draws_and_unknown_names():
+    assert find_winner("Evenly matched.\nWinner: Draw", NAMES) is None
+    assert find_winner("Evenly matched.\nWinner: Neither participant", NAMES) is None
+    assert find_winner("Winner: Plato", NAMES) is None
+
+def test_a_failed_opening_is_not_shared():
+    async def scenario():
+        service = LLMService(model_override=ModelPreference(provider="mock", model_name="mock-fast"))
+        mock = service.model_configs["mock"]["mock-fast"]["mock"]
+        socrates = await PersonalityManager.shared().get_personality("socrates")
+        tournament = Tournament(SimpleNamespace(llm_service=service), "Is free will an illusion?", personalities=["socrates"])
+
+        mock["error_rate"] = 1.0
+        assert await tournament._opening(socrates) is None
+        assert "Socrates" not in tournament._openings
+
+        mock["error_rate"] = 0.0
+        opening = await tournament._opening(socrates)
+        assert opening
+        assert await tournament._opening(socrates) == opening
+        await service.close()
+
+    asyncio.run(scenario())
+
+def test_a_summary_stopped_at_max_tokens_keeps_its_verdict():
+    async def scenario():
+        service = LLMService(model_override=ModelPreference(provider="mock", model_name="mock-fast"))
+        personalities = [await PersonalityManager.shared().get_personality(name) for name in ("socrates", "nietzsche")]
+
+        async def complete(request):
+            # A long-winded model that writes the sections in the order the prompt lists them,
+            # cut off at max_tokens like a provider would
+            prompt = request["messages"][-1]["content"]
+            verdict = "Winner: Socrates"
+            body = "Socrates kept asking what the will to power is for, and Nietzsche never said. " * 20
+            text = verdict + "\n\n" + body if prompt.index("Winner:") < prompt.index("Main arguments") else body + "\n\n" + verdict
+            text = text[:request["max_tokens"] * 4]
+            return text, service.mock_client.usage(request, text)
+
+        service.mock_client.complete = complete
+        history = [{"personality": "Socrates", "response": "What is the good?"}]
+        summary = await service.generate_summary("Is free will an illusion?", history, personalities, cache_policy=None)
+        assert summary.endswith("Winner: Socrates")
+        assert find_winner(summary, NAMES) == "Socrates"
+        await service.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import asyncio
+
+from core.metrics import CallMetrics
+from core.transcript_store import TranscriptStore
+
+def test_conflicting_rows_dont_drop_the_rest_of_the_batch(tmp_path):
+    async def scenario():
+        store = TranscriptStore(f"sqlite+aiosqlite:///{tmp_path / 'transcripts.db'}", flush_interval=60)
+        store.record_debate("first", "Is free will an illusion?", "classical", ["Socrates", "Nietzsche"])
+        await store.flush()
+
+        # The same debate id again, in a batch with another debate's rows
+        store.record_debate("first", "Is free will an illusion?", "classical", ["Socrates", "Nietzsche"])
+        store.record_debate("second", "Is morality objective?", "classical", ["Socrates", "Nietzsche"])
+        store.record_turn("second", "turn", 0, "opening", "Socrates", "Virtue is knowledge.")
+        call = CallMetrics("Socrates", "second")
+        call.provider, call.model, call.ok = "mock", "mock-fast", True
+        store.record_call(call)
+        store.record_turn("first", "turn", 0, "opening", "Nietzsche", "God is dead.")
+        store.finish_debate("second", "Winner: Socrates")
+        await store.flush()
+
+        assert store.stats["skipped"] == 1
+        second = await store.load_debate("second")
+        assert second["status"] == "finished"
+        assert [turn["content"] for turn in await store.load_turns("second")] == ["Virtue is knowledge."]
+        assert [turn["content"] for turn in await store.load_turns("first")] == ["God is dead."]
+        await store.close()
+
+    asyncio.run(scenario())